@@ -16,9 +16,12 @@ class Config:
     USERS_COLLECTION = 'users'
     WATCHLIST_COLLECTION = 'watchlists'
     STOCK_MAPPINGS_COLLECTION = 'stock_mappings'
-    NEWS_COLLECTION = 'company_news'  # Pre-fetched news from cron scraper
+    NEWS_COLLECTION = 'company_news'  # Per-ticker scrape status from cron scraper
+    NEWS_ARTICLES_COLLECTION = 'news_articles'  # One document per scraped article (keyed by URL hash)
     POSITIONS_COLLECTION = 'portfolio_positions'
     NOTIFICATIONS_COLLECTION = 'notifications'
+    INDICATORS_COLLECTION = 'stock_indicators'  # Rolling RSI/SMA state per symbol
+    ANALYSIS_JOBS_COLLECTION = 'analysis_jobs'  # Async analysis jobs and stored results
     
     # JWT
     JWT_SECRET_KEY = os.getenv('JWT_SECRET_KEY', 'dev-secret-key-change-in-production')
@@ -53,6 +56,32 @@ class Config:
     MAX_WORKERS = 8
     CACHE_DURATION = 3600  # 1 hour
     REQUEST_TIMEOUT = 15
+    MF_SNAPSHOT_TTL = 900  # 15 minutes - MF portfolio computation snapshots
+    MF_NAV_CACHE_TTL = 3600  # 1 hour - NAVs change once a day
+    MF_NAV_FETCH_DEADLINE = 8  # seconds - bound on a concurrent multi-fund NAV fetch
+    STOCK_METADATA_MAX_AGE_DAYS = 30  # Refetch sector/industry/market cap after this
+    STOCK_METADATA_RATE_LIMIT = 2  # Yahoo metadata requests per second
+    STOCK_METADATA_WORKERS = 4
+    STOCK_METADATA_REFRESH_BATCH = 500  # Stale mappings refreshed per nightly run
+    RISK_LOOKBACK_DAYS = 730  # Price history used for VaR/CVaR
+    RISK_MC_PATHS = 10000  # Default Monte Carlo paths
+    RISK_MC_MAX_PATHS = 200000  # Path budget: upper bound per request
+    RISK_MC_CHUNK_PATHS = 50000  # Paths per process-pool task
+    RISK_MC_PROCESSES = 2
+    RISK_SCENARIO_RETRY_SECONDS = 3600  # Stress-window downloads that failed are retried after this
+    OPTIMIZER_LOOKBACK_DAYS = 365  # Price history for optimizer covariance estimates
+    WHAT_IF_MAX_SCENARIOS = 10  # Scenarios compared in one what-if request
+    WHAT_IF_HORIZON_DAYS = 365  # Projection horizon for what-if XIRR
+    ANALYSIS_JOB_WORKERS = 2
+    ANALYSIS_JOB_TIMEOUT = 600  # seconds - unfinished jobs older than this are recomputed
+    ANALYSIS_JOB_TTL = 172800  # 2 days - stored jobs/results expire after this
+    ANALYSIS_JOB_MAX_WAIT = 25  # seconds - longest a poll request may wait for a job
+    ANALYSIS_JOB_SYNC_WAIT = 2  # seconds - how long a submit request waits before returning 202
+    HISTORY_CHUNK_SIZE = 40  # Symbols per yf.download call in bulk history loads
+    HISTORY_MAX_WORKERS = 4  # Chunks downloaded concurrently
+    HISTORY_THREADS_PER_CHUNK = 4
+    HISTORY_RETRIES = 2  # Extra rounds for symbols that came back empty
+    HISTORY_RETRY_BACKOFF = 1.0  # seconds, multiplied by the attempt number
     
     # Search
     SEARCH_LIMIT = 10
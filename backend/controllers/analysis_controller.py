@@ -70,19 +70,28 @@ class AnalysisController:
         Query parameters:
         - stock_name: Stock name or ticker (required)
         - ticker: Stock ticker (optional)
+        - max_articles: Page size (optional, default 20, max 100)
+        - cursor: next_cursor from the previous page (optional)
+        - collapse: 'false' to include near-duplicate copies of a story (optional, default true)
         
         Response:
         {
             "success": true,
-            "data": [
-                {
-                    "title": "...",
-                    "content": "...",
-                    "source": "Reuters",
-                    "premium": false,
-                    "published_at": "2024-12-04T10:00:00"
-                }
-            ],
+            "data": {
+                "articles": [
+                    {
+                        "title": "...",
+                        "content": "...",
+                        "source": "Reuters",
+                        "premium": false,
+                        "published_at": "2024-12-04T10:00:00Z",
+                        "story_id": "..."
+                    }
+                ],
+                "summary": {...},
+                "days": 2,
+                "next_cursor": "..." or null
+            },
             "error": null
         }
         """
@@ -101,6 +110,9 @@ class AnalysisController:
             
             stock_name = request.args.get('stock_name', '').strip()
             ticker = request.args.get('ticker', '').strip() if request.args.get('ticker') else None
+            max_articles = min(max(request.args.get('max_articles', 20, type=int), 1), 100)
+            cursor = request.args.get('cursor') or None
+            collapse = request.args.get('collapse', 'true').lower() != 'false'
             
             print(f"\n[NEWS] 📰 Request: stock_name='{stock_name}', ticker='{ticker}', days={days}")
             
@@ -109,9 +121,10 @@ class AnalysisController:
                 return error_response("stock_name query parameter is required", 400)
             
             print(f"[NEWS] 🔍 Fetching news for {stock_name}...")
-            success, message, articles = NewsService.fetch_news_by_days(stock_name, ticker, days)
+            success, message, page = NewsService.fetch_news_page(stock_name, ticker, days, max_articles, cursor, collapse)
             
             if success:
+                articles = page['articles']
                 # Include summary
                 summary = NewsService.get_news_summary(articles)
                 print(f"[NEWS] ✅ Success: {len(articles)} articles from {len(summary.get('sources', []))} sources")
@@ -119,7 +132,8 @@ class AnalysisController:
                 return success_response({
                     'articles': articles,
                     'summary': summary,
-                    'days': days
+                    'days': days,
+                    'next_cursor': page['next_cursor']
                 }, message, 200)
             else:
                 print(f"[NEWS] ❌ Failed: {message}")
@@ -7,6 +7,7 @@ from flask import request
 from services.mf_search_service import MutualFundSearchService
 from services.mf_price_service import MutualFundPriceService
 from services.mf_watchlist_service import MFWatchlistService
+from services.mf_risk_service import MFRiskService
 from utils.response import success_response, error_response
 
 class MFController:
@@ -106,6 +107,31 @@ class MFController:
         except Exception as e:
             return error_response(f"Error fetching performance: {str(e)}", 500)
 
+    @staticmethod
+    def get_fund_risk(scheme_code):
+        """
+        GET /api/mf/<scheme_code>/risk
+        Get risk metrics over the fund's full NAV history
+        """
+        try:
+            risk = MFRiskService.analyze([str(scheme_code).strip()])
+            
+            if not risk or not risk['funds']:
+                return error_response(f"Risk metrics not available for {scheme_code}", 404)
+            
+            fund_metrics = next(iter(risk['funds'].values()))
+            return success_response({
+                **fund_metrics,
+                'scheme_code': scheme_code,
+                'as_of': risk['as_of'],
+                'start_date': risk['start_date'],
+                'benchmark': risk['benchmark'],
+                'risk_free_rate': risk['risk_free_rate']
+            }, 'Risk metrics retrieved successfully', 200)
+            
+        except Exception as e:
+            return error_response(f"Error calculating risk metrics: {str(e)}", 500)
+
     @staticmethod
     def get_nav_on_date(scheme_code):
         """
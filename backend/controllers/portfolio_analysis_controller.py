@@ -1,20 +1,80 @@
 from flask import request, jsonify
-from services.portfolio_analysis_service import PortfolioAnalysisService
+from services.indicator_service import IndicatorService
+from services.portfolio_optimizer_service import OBJECTIVES
+from services.analysis_job_service import AnalysisJobService
+from services.what_if_service import WhatIfService
 from services.watchlist_service import WatchlistService
 from utils.response import success_response, error_response
+from utils.chart_utils import parse_chart_args
+from config import get_config
+
+config = get_config()
 
 class PortfolioAnalysisController:
     """Controller for portfolio analysis endpoints"""
     
+    @staticmethod
+    def _run_job(user_email, kind, positions, params):
+        """
+        Run a heavy analysis through the job pool
+        
+        With ?async=1 the job is returned right away (202) for polling.
+        Otherwise the request waits up to ANALYSIS_JOB_SYNC_WAIT seconds, so
+        quick analyses still answer inline, and returns the job (202) if it
+        takes longer. Results stored for the same inputs are returned
+        immediately.
+        """
+        job = AnalysisJobService.submit(user_email, kind, positions, params)
+        is_async = request.args.get('async', '').lower() in ('1', 'true', 'yes')
+        if not is_async and job["status"] not in ("done", "failed"):
+            job = AnalysisJobService.get_job(user_email, job["job_id"], wait=config.ANALYSIS_JOB_SYNC_WAIT)
+
+        if job["status"] == "done":
+            return success_response(job["result"], job.get("message") or "Analysis complete", 200)
+        if job["status"] == "failed":
+            return error_response(job.get("error") or "Analysis failed", 500)
+
+        job["poll_url"] = f"/api/{user_email}/analysis/jobs/{job['job_id']}"
+        return success_response(job, "Analysis job accepted", 202)
+
+    @staticmethod
+    def get_job(user_email, job_id):
+        """
+        GET /api/{user_email}/analysis/jobs/{job_id}?wait=20
+        Poll an analysis job; wait (seconds) long-polls until it finishes
+        """
+        try:
+            wait = request.args.get('wait', 0, type=float)
+            job = AnalysisJobService.get_job(user_email, job_id, wait=wait)
+            if not job:
+                return error_response("Job not found", 404)
+
+            return success_response(job, f"Job {job['status']}", 200)
+
+        except Exception as e:
+            return error_response(f"Error fetching job: {str(e)}", 500)
+
     @staticmethod
     def get_portfolio_analysis(user_email):
         """
-        GET /api/{user_email}/analysis/portfolio
+        GET /api/{user_email}/analysis/portfolio?format=compact&points=120
         Get comprehensive portfolio analytics
+        
+        format=compact returns performance_chart as {dates, series} and
+        correlation_matrix as {labels, values}; points downsamples the
+        performance chart server-side (LTTB)
         """
         try:
             # Get IDs from query parameters
             portfolio_id = request.args.get('portfolio_id', 'default')
+            # 'current' weights by today's holding values, 'lots' by the lots held on each date
+            weighting = request.args.get('weighting', 'current')
+            if weighting not in ('current', 'lots'):
+                return error_response("weighting must be 'current' or 'lots'", 400)
+            try:
+                compact, points = parse_chart_args(request.args)
+            except ValueError as e:
+                return error_response(str(e), 400)
             
             # Get tickers from portfolio positions (as requested: "based on the portfolio positions and not the watchlist")
             from models.position import Position
@@ -31,76 +91,121 @@ class PortfolioAnalysisController:
                     },
                     "sector_allocation": [],
                     "assets": [],
-                    "performance_chart": [],
+                    "performance_chart": {"dates": [], "series": {}} if compact else [],
                     "technical_signals": [],
-                    "correlation_matrix": []
+                    "correlation_matrix": {"labels": [], "values": []} if compact else []
                 }, "No positions found in this portfolio", 200)
 
-            tickers = list(set([p['symbol'] for p in positions]))
-            source_data = [{"ticker": p['symbol'], "sector": p.get('sector', 'Unknown')} for p in positions]
-            print(f"[ANALYSIS] Analyzing portfolio: {portfolio_id} ({len(tickers)} unique tickers)")
-            
-            if not tickers:
-                return success_response({
-                    "portfolio_health": {
-                        "beta": 0, "sharpe_ratio": 0, "diversification_score": 0,
-                        "var_95": "0%", "max_drawdown": "0%", "volatility": "0%"
-                    },
-                    "market_indicators": {
-                        "nifty_rsi": 50, "fear_greed_index": 50, "market_sentiment": "Neutral"
-                    },
-                    "sector_allocation": [],
-                    "assets": [],
-                    "performance_chart": [],
-                    "technical_signals": [],
-                    "correlation_matrix": []
-                }, "Watchlist is empty", 200)
-
-            # 2. Calculate Metrics
-            success_metrics, msg_metrics, metrics_data = PortfolioAnalysisService.calculate_portfolio_metrics(tickers)
-            if not success_metrics:
-                return error_response(msg_metrics, 500)
-                
-            # 3. Get Sector Distribution
-            sector_counts = {}
-            # Prefer sectors from metrics_data assets (dynamically fetched)
-            for asset in metrics_data.get('assets', []):
-                sec = asset.get('sector', 'Unknown')
-                if sec and sec != 'Unknown' and sec != 'N/A':
-                    sector_counts[sec] = sector_counts.get(sec, 0) + 1
-            
-            # Fallback to source_data if still empty
-            if not sector_counts:
-                for item in source_data:
-                    sec = item.get('sector', 'Unknown')
-                    if sec and sec != 'Unknown' and sec != 'N/A':
-                        sector_counts[sec] = sector_counts.get(sec, 0) + 1
-            
-            total_stocks = len(metrics_data.get('assets', [])) or len(tickers) or 1
-            sector_allocation = []
-            for sec, count in sector_counts.items():
-                sector_allocation.append({
-                    "name": sec,
-                    "value": round((count / total_stocks) * 100, 1),
-                    "count": count
-                })
-            sector_allocation.sort(key=lambda x: x['value'], reverse=True)
-            
-            # 4. Ensure assets have correct sector info (don't overwrite if already set)
-            for asset in metrics_data['assets']:
-                if not asset.get('sector') or asset.get('sector') == 'Unknown':
-                    # Find sector in source data (from DB)
-                    info_item = next((i for i in source_data if i['ticker'] == asset['ticker']), None)
-                    if info_item and info_item.get('sector') and info_item.get('sector') != 'Unknown':
-                        asset['sector'] = info_item.get('sector')
-
-            # Combine data
-            response_data = {
-                **metrics_data,
-                "sector_allocation": sector_allocation
-            }
-            
-            return success_response(response_data, "Portfolio analysis generated", 200)
+            print(f"[ANALYSIS] Analyzing portfolio: {portfolio_id} ({len(positions)} positions)")
+            return PortfolioAnalysisController._run_job(
+                user_email, "portfolio", positions, {"weighting": weighting, "compact": compact, "points": points}
+            )
 
         except Exception as e:
             return error_response(f"Error generating analysis: {str(e)}", 500)
+
+    @staticmethod
+    def screen_indicators(user_email):
+        """
+        GET /api/{user_email}/analysis/screen?rsi_below=30&trend=bullish&limit=50
+        Screen all stocks with stored indicators (RSI, SMA50/200 trend)
+        """
+        try:
+            rsi_below = request.args.get('rsi_below', type=float)
+            rsi_above = request.args.get('rsi_above', type=float)
+            trend = request.args.get('trend')
+            limit = min(request.args.get('limit', 100, type=int), 500)
+
+            results = IndicatorService.screen(rsi_below=rsi_below, rsi_above=rsi_above, trend=trend, limit=limit)
+            return success_response({"results": results, "count": len(results)}, "Indicator screen complete", 200)
+
+        except Exception as e:
+            return error_response(f"Error screening indicators: {str(e)}", 500)
+
+    @staticmethod
+    def get_portfolio_risk(user_email):
+        """
+        GET /api/{user_email}/analysis/risk?portfolio_id=default&paths=20000&horizons=1,10,21
+        VaR/CVaR (historical and Monte Carlo) and stress scenarios on current holdings
+        """
+        try:
+            portfolio_id = request.args.get('portfolio_id', 'default')
+            paths = request.args.get('paths', type=int)
+            horizons = request.args.get('horizons')
+            if horizons:
+                try:
+                    horizons = [int(h) for h in horizons.split(',') if h.strip()]
+                except ValueError:
+                    return error_response("horizons must be comma-separated trading days", 400)
+
+            from models.position import Position
+            positions = Position.get_positions(user_email, portfolio_id)
+            if not positions:
+                return success_response(None, "No positions found in this portfolio", 200)
+
+            return PortfolioAnalysisController._run_job(
+                user_email, "risk", positions, {"paths": paths, "horizons": horizons}
+            )
+
+        except Exception as e:
+            return error_response(f"Error generating risk analysis: {str(e)}", 500)
+
+    @staticmethod
+    def optimize_portfolio(user_email):
+        """
+        GET /api/{user_email}/analysis/optimize?portfolio_id=default&objective=all&step=1
+        Min-variance, max-Sharpe and risk-parity targets with rebalancing trades
+        """
+        try:
+            portfolio_id = request.args.get('portfolio_id', 'default')
+            objective = request.args.get('objective', 'all')
+            step = request.args.get('step', 1.0, type=float)
+            if objective != 'all' and objective not in OBJECTIVES:
+                return error_response(f"objective must be one of: all, {', '.join(OBJECTIVES)}", 400)
+
+            from models.position import Position
+            positions = Position.get_positions(user_email, portfolio_id)
+            if not positions:
+                return success_response(None, "No positions found in this portfolio", 200)
+
+            return PortfolioAnalysisController._run_job(
+                user_email, "optimize", positions, {"objective": objective, "step": step}
+            )
+
+        except Exception as e:
+            return error_response(f"Error optimizing portfolio: {str(e)}", 500)
+
+    @staticmethod
+    def what_if(user_email):
+        """
+        POST /api/{user_email}/analysis/what-if
+        Compare hypothetical trades against current holdings
+        
+        Body: {"portfolio_id": "default", "scenarios": [{"name": "Add TCS",
+               "trades": [{"symbol": "TCS", "amount": 50000}]}]}
+        Positive amounts (rupees) or quantities (shares) buy, negative ones sell.
+        """
+        try:
+            data = request.get_json(silent=True) or {}
+            portfolio_id = data.get('portfolio_id') or request.args.get('portfolio_id', 'default')
+            scenarios = data.get('scenarios')
+            if scenarios is None and data.get('trades') is not None:
+                scenarios = [{"name": data.get('name'), "trades": data.get('trades')}]
+            try:
+                scenarios = WhatIfService.parse_scenarios(scenarios)
+            except ValueError as e:
+                return error_response(str(e), 400)
+
+            from models.position import Position
+            positions = Position.get_positions(user_email, portfolio_id)
+            if not positions:
+                return error_response("No positions found in this portfolio", 404)
+
+            success, message, result = WhatIfService.simulate(positions, scenarios)
+            if not success:
+                return error_response(message, 500)
+
+            return success_response(result, message, 200)
+
+        except Exception as e:
+            return error_response(f"Error running what-if analysis: {str(e)}", 500)
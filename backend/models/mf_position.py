@@ -92,6 +92,36 @@ class MFPosition:
             
         return positions
 
+    @staticmethod
+    def get_positions_version(user_email, portfolio_id):
+        """
+        Get a cheap version stamp for the positions in a portfolio
+        
+        Any create, update or delete changes either the position count or
+        the latest updated_at, so the stamp can be used as a cache key
+        without loading the positions themselves.
+        
+        Returns:
+            str: Version stamp ("<count>:<latest updated_at>")
+        """
+        positions_col = get_mf_positions_collection()
+        pipeline = [
+            {"$match": {
+                "user_email": user_email.lower(),
+                "portfolio_id": portfolio_id
+            }},
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "last_updated": {"$max": "$updated_at"}
+            }}
+        ]
+        
+        result = list(positions_col.aggregate(pipeline))
+        if not result:
+            return "0:"
+        return f"{result[0]['count']}:{result[0].get('last_updated') or ''}"
+
     @staticmethod
     def get_position_by_id(user_email, position_id):
         """Get a specific MF position"""
@@ -0,0 +1,162 @@
+"""
+Mutual Fund SIP Model
+Manages SIP schedules in user portfolios (installments are never stored)
+"""
+
+from datetime import datetime
+import uuid
+from utils.db import Database
+
+def get_mf_sips_collection():
+    """Get MF SIP schedules collection"""
+    return Database.get_collection('mf_sips')
+
+class MFSip:
+    """MF SIP schedule model for portfolio management"""
+
+    @staticmethod
+    def create_sip(data):
+        """
+        Create a new SIP schedule
+
+        Args:
+            data: Dictionary containing SIP details
+                - user_email: User's email
+                - portfolio_id: Portfolio ID
+                - scheme_code: MF scheme code
+                - scheme_name: MF scheme name
+                - amount: Monthly installment amount
+                - day_of_month: Installment day (1-31, clipped to month length)
+                - start_date: First eligible date (ISO format YYYY-MM-DD)
+                - end_date: Last eligible date (ISO format, None = ongoing)
+                - step_up_percent: Yearly increase in the installment amount
+
+        Returns:
+            dict: Created SIP document
+        """
+        sips_col = get_mf_sips_collection()
+
+        sip_id = str(uuid.uuid4())
+        now = datetime.utcnow()
+
+        sip_doc = {
+            "sip_id": sip_id,
+            "user_email": data.get("user_email").lower(),
+            "portfolio_id": data.get("portfolio_id", "default"),
+            "scheme_code": str(data.get("scheme_code", "")).strip(),
+            "scheme_name": data.get("scheme_name", ""),
+            "amount": float(data.get("amount", 0)),
+            "day_of_month": int(data.get("day_of_month", 1)),
+            "start_date": data.get("start_date"),  # ISO format YYYY-MM-DD
+            "end_date": data.get("end_date"),  # ISO format YYYY-MM-DD or None
+            "step_up_percent": float(data.get("step_up_percent", 0) or 0),
+            "created_at": now.isoformat(),
+            "updated_at": now.isoformat()
+        }
+
+        sips_col.insert_one(sip_doc)
+
+        doc_to_return = sip_doc.copy()
+        if "_id" in doc_to_return:
+            del doc_to_return["_id"]
+
+        return doc_to_return
+
+    @staticmethod
+    def get_sips(user_email, portfolio_id=None, scheme_code=None):
+        """
+        Get SIP schedules filtered by user, portfolio, and scheme
+
+        Returns:
+            list: List of SIP documents
+        """
+        sips_col = get_mf_sips_collection()
+        query = {"user_email": user_email.lower()}
+
+        if portfolio_id:
+            query["portfolio_id"] = portfolio_id
+
+        if scheme_code:
+            query["scheme_code"] = str(scheme_code).strip()
+
+        cursor = sips_col.find(query).sort("start_date", -1)
+
+        sips = []
+        for doc in cursor:
+            if "_id" in doc:
+                del doc["_id"]
+            sips.append(doc)
+
+        return sips
+
+    @staticmethod
+    def get_sips_version(user_email, portfolio_id):
+        """
+        Get a cheap version stamp for the SIP schedules in a portfolio
+
+        Returns:
+            str: Version stamp ("<count>:<latest updated_at>")
+        """
+        sips_col = get_mf_sips_collection()
+        pipeline = [
+            {"$match": {
+                "user_email": user_email.lower(),
+                "portfolio_id": portfolio_id
+            }},
+            {"$group": {
+                "_id": None,
+                "count": {"$sum": 1},
+                "last_updated": {"$max": "$updated_at"}
+            }}
+        ]
+
+        result = list(sips_col.aggregate(pipeline))
+        if not result:
+            return "0:"
+        return f"{result[0]['count']}:{result[0].get('last_updated') or ''}"
+
+    @staticmethod
+    def get_sip_by_id(user_email, sip_id):
+        """Get a specific SIP schedule"""
+        sips_col = get_mf_sips_collection()
+        doc = sips_col.find_one({
+            "user_email": user_email.lower(),
+            "sip_id": sip_id
+        })
+
+        if doc and "_id" in doc:
+            del doc["_id"]
+
+        return doc
+
+    @staticmethod
+    def update_sip(user_email, sip_id, update_data):
+        """Update a SIP schedule"""
+        sips_col = get_mf_sips_collection()
+
+        update_data["updated_at"] = datetime.utcnow().isoformat()
+
+        if "scheme_code" in update_data:
+            update_data["scheme_code"] = str(update_data["scheme_code"]).strip()
+
+        result = sips_col.update_one(
+            {"user_email": user_email.lower(), "sip_id": sip_id},
+            {"$set": update_data}
+        )
+
+        if result.modified_count > 0:
+            return MFSip.get_sip_by_id(user_email, sip_id)
+        return None
+
+    @staticmethod
+    def delete_sip(user_email, sip_id):
+        """Delete a SIP schedule"""
+        sips_col = get_mf_sips_collection()
+        doc = MFSip.get_sip_by_id(user_email, sip_id)
+        if doc:
+            sips_col.delete_one({
+                "user_email": user_email.lower(),
+                "sip_id": sip_id
+            })
+            return doc
+        return None
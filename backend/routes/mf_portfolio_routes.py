@@ -5,7 +5,10 @@ API endpoints for MF portfolio management
 
 from flask import Blueprint, request, jsonify
 from services.mf_portfolio_service import MFPortfolioService
+from services.mf_sip_service import MFSipService
+from services.mf_risk_service import MFRiskService
 from models.mf_position import MFPosition
+from models.mf_sip import MFSip
 
 mf_portfolio_bp = Blueprint('mf_portfolio', __name__, url_prefix='/api/<string:user_email>/mf-portfolio')
 
@@ -45,6 +48,19 @@ def get_portfolio_positions_summary(user_email, portfolio_id):
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
 
+@mf_portfolio_bp.route('/<portfolio_id>/risk', methods=['GET'])
+def get_portfolio_risk(user_email, portfolio_id):
+    """
+    Get risk metrics (volatility, Sharpe, Sortino, drawdown, beta/alpha)
+    per fund and for the value-weighted portfolio
+    GET /api/<user_email>/mf-portfolio/<portfolio_id>/risk
+    """
+    try:
+        risk = MFRiskService.get_portfolio_risk(user_email, portfolio_id)
+        return jsonify(risk), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
 @mf_portfolio_bp.route('/<portfolio_id>/positions', methods=['GET'])
 def get_positions(user_email, portfolio_id):
     """
@@ -147,3 +163,89 @@ def get_portfolio_summary(user_email, portfolio_id):
         return jsonify({"success": True, "summary": summary}), 200
     except Exception as e:
         return jsonify({"success": False, "error": str(e)}), 500
+
+@mf_portfolio_bp.route('/<portfolio_id>/sips', methods=['GET'])
+def get_sips(user_email, portfolio_id):
+    """
+    Get all SIP schedules in a portfolio
+    GET /api/<user_email>/mf-portfolio/<portfolio_id>/sips
+    """
+    try:
+        sips = MFSip.get_sips(user_email, portfolio_id)
+        return jsonify({"success": True, "sips": sips}), 200
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@mf_portfolio_bp.route('/<portfolio_id>/sips', methods=['POST'])
+def add_sip(user_email, portfolio_id):
+    """
+    Add a SIP schedule to portfolio
+    POST /api/<user_email>/mf-portfolio/<portfolio_id>/sips
+    
+    Body:
+    {
+        "scheme_code": "120503",
+        "amount": 5000,
+        "day_of_month": 5,
+        "start_date": "2021-01-05",
+        "end_date": null,         // Optional, ongoing if omitted
+        "step_up_percent": 10     // Optional, yearly increase
+    }
+    """
+    try:
+        data = request.json
+        success, message, sip = MFSipService.add_sip(user_email, portfolio_id, data)
+        
+        if success:
+            return jsonify({"success": True, "message": message, "sip": sip}), 201
+        else:
+            return jsonify({"success": False, "message": message}), 400
+            
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@mf_portfolio_bp.route('/<portfolio_id>/sips/<sip_id>', methods=['PUT'])
+def update_sip(user_email, portfolio_id, sip_id):
+    """Update a SIP schedule"""
+    try:
+        data = request.json
+        success, message, sip = MFSipService.update_sip(user_email, sip_id, data)
+        
+        if success:
+            return jsonify({"success": True, "message": message, "sip": sip}), 200
+        else:
+            return jsonify({"success": False, "message": message}), 400
+            
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@mf_portfolio_bp.route('/<portfolio_id>/sips/<sip_id>', methods=['DELETE'])
+def delete_sip(user_email, portfolio_id, sip_id):
+    """Delete a SIP schedule"""
+    try:
+        success, message, sip = MFSipService.delete_sip(user_email, sip_id)
+        
+        if success:
+            return jsonify({"success": True, "message": message, "sip": sip}), 200
+        else:
+            return jsonify({"success": False, "message": message}), 404
+            
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
+
+@mf_portfolio_bp.route('/<portfolio_id>/sips/<sip_id>/installments', methods=['GET'])
+def get_sip_installments(user_email, portfolio_id, sip_id):
+    """
+    Get the installments generated from a SIP schedule (not stored)
+    GET /api/<user_email>/mf-portfolio/<portfolio_id>/sips/<sip_id>/installments
+    """
+    try:
+        success, message, data = MFSipService.get_installments(user_email, sip_id)
+        
+        if success:
+            return jsonify({"success": True, **data}), 200
+        else:
+            return jsonify({"success": False, "message": message}), 404
+            
+    except Exception as e:
+        return jsonify({"success": False, "error": str(e)}), 500
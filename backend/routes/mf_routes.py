@@ -15,6 +15,7 @@ mf_bp.route('/mf/popular', methods=['GET'])(MFController.get_popular_funds)
 mf_bp.route('/mf/<scheme_code>/nav', methods=['GET'])(MFController.get_fund_nav)
 mf_bp.route('/mf/<scheme_code>/nav-on-date', methods=['GET'])(MFController.get_nav_on_date)
 mf_bp.route('/mf/<scheme_code>/performance', methods=['GET'])(MFController.get_fund_performance)
+mf_bp.route('/mf/<scheme_code>/risk', methods=['GET'])(MFController.get_fund_risk)
 
 # Watchlist routes
 mf_bp.route('/<user_email>/mf/watchlist', methods=['GET'])(MFWatchlistController.get_watchlist)
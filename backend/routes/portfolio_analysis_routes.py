@@ -6,3 +6,8 @@ portfolio_analysis_bp = Blueprint('portfolio_analysis', __name__, url_prefix='/a
 
 # Register routes
 portfolio_analysis_bp.route('/portfolio', methods=['GET'])(PortfolioAnalysisController.get_portfolio_analysis)
+portfolio_analysis_bp.route('/screen', methods=['GET'])(PortfolioAnalysisController.screen_indicators)
+portfolio_analysis_bp.route('/risk', methods=['GET'])(PortfolioAnalysisController.get_portfolio_risk)
+portfolio_analysis_bp.route('/optimize', methods=['GET'])(PortfolioAnalysisController.optimize_portfolio)
+portfolio_analysis_bp.route('/what-if', methods=['POST'])(PortfolioAnalysisController.what_if)
+portfolio_analysis_bp.route('/jobs/<job_id>', methods=['GET'])(PortfolioAnalysisController.get_job)
@@ -3,6 +3,7 @@ from services.portfolio_service import PortfolioService
 from services.performance_service import PerformanceService
 from models.position import Position
 from werkzeug.exceptions import BadRequest, NotFound
+from utils.chart_utils import parse_chart_args
 
 portfolio_bp = Blueprint('portfolio', __name__, url_prefix='/api/<string:user_email>/portfolio')
 
@@ -98,10 +99,14 @@ def overall_transactions(user_email):
 
 @portfolio_bp.route('/performance-chart', methods=['GET'])
 def performance_chart(user_email):
-    """Get historical performance data for chart"""
+    """Get historical performance data for chart (?format=compact&points=N opt in)"""
     try:
         portfolio_id = request.args.get('portfolio_id', 'default')
-        result = PerformanceService.get_performance_chart_data(user_email, portfolio_id)
+        try:
+            compact, points = parse_chart_args(request.args)
+        except ValueError as e:
+            return jsonify({"message": str(e)}), 400
+        result = PerformanceService.get_performance_chart_data(user_email, portfolio_id, compact=compact, points=points)
         return jsonify(result)
     except Exception as e:
         import traceback
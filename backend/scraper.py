@@ -60,6 +60,17 @@ def smart_delay():
     time.sleep(random.uniform(*REQUEST_DELAY))
 
 
+# Optional politeness gate called with the URL before each request instead
+# of smart_delay (e.g. the cron scraper's per-domain token buckets)
+_request_gate = None
+
+
+def set_request_gate(gate):
+    """Install a callable(url) that blocks until the URL may be fetched (None restores smart_delay)"""
+    global _request_gate
+    _request_gate = gate
+
+
 @lru_cache(maxsize=30)  # Proven size from Streamlit deployment
 def fetch_url(url: str, retries: int = MAX_RETRIES, skip_delay: bool = False) -> Optional[requests.Response]:
     """Fetch URL with environment-aware delays and retries
@@ -72,7 +83,9 @@ def fetch_url(url: str, retries: int = MAX_RETRIES, skip_delay: bool = False) ->
     for attempt in range(retries):
         try:
             # Skip delay for RSS feeds or if explicitly requested
-            if not skip_delay:
+            if _request_gate is not None:
+                _request_gate(url)
+            elif not skip_delay:
                 smart_delay()
             
             response = requests.get(
@@ -289,13 +302,18 @@ def scrape_finviz(ticker):
     return articles
 
 
+def google_news_rss_url(query):
+    """Google News RSS search URL for a company's stock news"""
+    return f"https://news.google.com/rss/search?q={quote_plus(query + ' stock news')}&hl=en-US&gl=US&ceid=US:en"
+
+
 def scrape_google_news(query):
     """Google News aggregator using RSS"""
     import feedparser
     articles = []
     try:
         # Use Google News RSS feed which is more reliable than scraping HTML
-        url = f"https://news.google.com/rss/search?q={quote_plus(query + ' stock news')}&hl=en-US&gl=US&ceid=US:en"
+        url = google_news_rss_url(query)
         
         # Use fetch_url to get content with proper headers (User-Agent rotation)
         # This prevents blocking that happens with default feedparser headers
@@ -0,0 +1,59 @@
+"""
+Benchmark for the portfolio analytics core on local data
+Run this script from the backend directory: python scripts/benchmark_portfolio_analysis.py [holdings]
+
+Generates ~400 days of synthetic closes for N holdings plus the Nifty
+benchmark and times PortfolioAnalysisService.compute_analytics (no network).
+"""
+
+import sys
+import os
+import time
+from datetime import datetime
+import numpy as np
+import pandas as pd
+
+# Add parent directory to path to import services
+sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from services.portfolio_analysis_service import PortfolioAnalysisService
+
+
+def make_closes(holdings, days=400, seed=42):
+    """Correlated random-walk closes (dates x tickers, incl. ^NSEI)"""
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(end=datetime.now().date(), periods=days)
+    market = rng.normal(0.0004, 0.01, days)
+    betas = rng.uniform(0.5, 1.5, holdings)
+    returns = market[:, None] * betas + rng.normal(0, 0.015, (days, holdings))
+    tickers = [f"STOCK{i:03d}.NS" for i in range(holdings)]
+    closes = pd.DataFrame(100 * np.cumprod(1 + returns, axis=0), index=dates, columns=tickers)
+    closes["^NSEI"] = 20000 * np.cumprod(1 + market)
+    # A few late listings and missing days, as in real data
+    closes.iloc[:150, :3] = np.nan
+    closes.iloc[rng.integers(0, days, 40), rng.integers(0, holdings, 40)] = np.nan
+    return closes, {t: t.replace(".NS", "") for t in tickers}
+
+
+def main():
+    holdings = int(sys.argv[1]) if len(sys.argv) > 1 else 100
+    closes, ticker_map = make_closes(holdings)
+    end_date = closes.index[-1].to_pydatetime()
+
+    # Warm up (imports, allocator)
+    PortfolioAnalysisService.compute_analytics(closes, ticker_map, "^NSEI", end_date)
+
+    runs = 20
+    start = time.perf_counter()
+    for _ in range(runs):
+        result = PortfolioAnalysisService.compute_analytics(closes, ticker_map, "^NSEI", end_date)
+    elapsed = (time.perf_counter() - start) / runs
+
+    print(f"Holdings: {holdings}, days: {len(closes)}")
+    print(f"compute_analytics: {elapsed * 1000:.1f} ms per portfolio (mean of {runs} runs)")
+    print(f"Portfolio beta: {result['portfolio_health']['beta']}, "
+          f"correlation cells: {len(result['correlation_matrix'])}")
+
+
+if __name__ == "__main__":
+    main()
@@ -145,6 +145,24 @@ class AlertScheduler:
         except Exception as e:
             print(f"❌ Error in scheduled alert check: {e}")
     
+    def refresh_stock_metadata(self):
+        """Fill missing or stale stock metadata in bulk"""
+        try:
+            from services.stock_metadata_service import StockMetadataService
+            updated = StockMetadataService.refresh_metadata()
+            print(f"✅ Stock metadata refresh completed. Updated {updated} ticker(s)")
+        except Exception as e:
+            print(f"❌ Error in stock metadata refresh: {e}")
+    
+    def update_indicators(self):
+        """Advance stored RSI/SMA state with today's bars"""
+        try:
+            from services.indicator_service import IndicatorService
+            updated = IndicatorService.run_nightly_update()
+            print(f"✅ Indicator update completed. Updated {updated} symbol(s)")
+        except Exception as e:
+            print(f"❌ Error in indicator update: {e}")
+    
     def start(self):
         """Start the scheduler"""
         if self.is_running:
@@ -171,6 +189,24 @@ class AlertScheduler:
             replace_existing=True
         )
         
+        # Nightly fill of missing/stale sector, industry and market cap metadata
+        self.scheduler.add_job(
+            self.refresh_stock_metadata,
+            trigger=CronTrigger(hour=2, minute=0, timezone=ist),
+            id='stock_metadata_refresh',
+            name='Stock Metadata Refresh (Nightly)',
+            replace_existing=True
+        )
+        
+        # Incremental indicator update after the close (Mon-Fri evening)
+        self.scheduler.add_job(
+            self.update_indicators,
+            trigger=CronTrigger(day_of_week='mon-fri', hour=18, minute=30, timezone=ist),
+            id='indicator_update',
+            name='Indicator Update (Nightly)',
+            replace_existing=True
+        )
+        
         self.scheduler.start()
         self.is_running = True
         
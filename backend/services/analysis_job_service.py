@@ -0,0 +1,232 @@
+"""
+Analysis Job Service
+Runs heavy portfolio analyses on a worker pool. Jobs and results are stored
+in Mongo under an input fingerprint (holdings hash + as-of date), so an
+unchanged portfolio gets its stored result back immediately
+"""
+
+import hashlib
+import json
+import logging
+import threading
+import time
+import uuid
+import concurrent.futures
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Tuple
+import pytz
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from config import get_config
+from utils.db import get_analysis_jobs_collection
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+# Shared worker pool for analysis jobs (created on first use)
+_executor = None
+_executor_lock = threading.Lock()
+
+# job_id -> Event set when a job started in this process finishes
+_job_events = {}
+_job_events_lock = threading.Lock()
+
+
+def _run_portfolio(positions: List[Dict], params: Dict) -> Tuple[bool, str, Optional[Dict]]:
+    from services.portfolio_analysis_service import PortfolioAnalysisService
+    return PortfolioAnalysisService.analyze_portfolio(
+        positions, params.get("weighting", "current"),
+        compact=params.get("compact", False), points=params.get("points")
+    )
+
+
+def _run_risk(positions: List[Dict], params: Dict) -> Tuple[bool, str, Optional[Dict]]:
+    from services.risk_engine_service import RiskEngineService
+    return RiskEngineService.analyze_positions(positions, paths=params.get("paths"), horizons=params.get("horizons"))
+
+
+def _run_optimize(positions: List[Dict], params: Dict) -> Tuple[bool, str, Optional[Dict]]:
+    from services.portfolio_optimizer_service import PortfolioOptimizerService
+    return PortfolioOptimizerService.optimize_positions(
+        positions, objective=params.get("objective", "all"), step=params.get("step", 1.0)
+    )
+
+
+# Job kind -> runner(positions, params) returning (success, message, data)
+JOB_RUNNERS: Dict[str, Callable] = {
+    "portfolio": _run_portfolio,
+    "risk": _run_risk,
+    "optimize": _run_optimize,
+}
+
+
+def _get_executor():
+    """Shared ThreadPoolExecutor for analysis jobs"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=config.ANALYSIS_JOB_WORKERS, thread_name_prefix="analysis-job"
+            )
+        return _executor
+
+
+def _public(doc: Optional[Dict]) -> Optional[Dict]:
+    """Job document as returned to clients"""
+    if doc is None:
+        return None
+    doc = {k: v for k, v in doc.items() if k not in ("_id", "positions", "expires_at", "active")}
+    for field in ("created_at", "started_at", "completed_at"):
+        if isinstance(doc.get(field), datetime):
+            doc[field] = doc[field].isoformat()
+    return doc
+
+
+class AnalysisJobService:
+    """Service for asynchronous, fingerprinted analysis jobs"""
+
+    @staticmethod
+    def fingerprint(kind: str, positions: List[Dict], params: Dict) -> str:
+        """
+        Hash of everything an analysis result depends on
+
+        Holdings (symbol, quantity, buy date), job parameters and the IST
+        as-of date: a new trading day or any position edit changes it.
+        """
+        holdings = sorted(
+            (str(p.get("symbol", "")).upper(), float(p.get("quantity", 0) or 0), str(p.get("buy_date") or ""))
+            for p in positions
+        )
+        as_of = datetime.now(pytz.timezone('Asia/Kolkata')).date().isoformat()
+        payload = json.dumps([kind, holdings, params, as_of], sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode()).hexdigest()
+
+    @staticmethod
+    def submit(user_email: str, kind: str, positions: List[Dict], params: Dict) -> Dict:
+        """
+        Submit an analysis job (or reuse one with the same fingerprint)
+
+        A completed job is returned as-is; a queued or running job for the
+        same inputs is joined instead of starting a second computation.
+
+        Returns:
+            dict: Job document (status queued, running, done or failed)
+        """
+        if kind not in JOB_RUNNERS:
+            raise ValueError(f"Unknown analysis job type: {kind}")
+
+        jobs_col = get_analysis_jobs_collection()
+        fingerprint = AnalysisJobService.fingerprint(kind, positions, params)
+        now = datetime.utcnow()
+
+        owner = {"fingerprint": fingerprint, "user_email": user_email.lower()}
+
+        existing = jobs_col.find_one({**owner, "status": "done"}, sort=[("created_at", -1)])
+        if existing:
+            return _public(existing)
+
+        # Jobs from a worker that died are abandoned after the timeout
+        jobs_col.update_many(
+            {**owner, "active": True,
+             "created_at": {"$lte": now - timedelta(seconds=config.ANALYSIS_JOB_TIMEOUT)}},
+            {"$set": {"status": "failed", "error": "Analysis job timed out", "completed_at": now},
+             "$unset": {"active": "", "positions": ""}}
+        )
+
+        job = {
+            "job_id": str(uuid.uuid4()),
+            "kind": kind,
+            "params": params,
+            "status": "queued",
+            "result": None,
+            "error": None,
+            "positions": positions,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=config.ANALYSIS_JOB_TTL)
+        }
+        # At most one active job per fingerprint (unique partial index on
+        # active jobs): the upsert either creates it or joins the one a
+        # concurrent request created
+        try:
+            created = jobs_col.update_one(
+                {**owner, "active": True}, {"$setOnInsert": job}, upsert=True
+            ).upserted_id is not None
+        except DuplicateKeyError:
+            created = False
+        if not created:
+            existing = jobs_col.find_one({**owner, "active": True})
+            if existing:
+                return _public(existing)
+            # Finished between the upsert and this read
+            return _public(jobs_col.find_one(owner, sort=[("created_at", -1)]))
+        job.update(owner, active=True)
+
+        with _job_events_lock:
+            _job_events[job["job_id"]] = threading.Event()
+        _get_executor().submit(AnalysisJobService._run, job["job_id"])
+
+        return _public(job)
+
+    @staticmethod
+    def _run(job_id: str):
+        """Worker: compute a job and store its result"""
+        jobs_col = get_analysis_jobs_collection()
+        try:
+            job = jobs_col.find_one_and_update(
+                {"job_id": job_id, "status": "queued"},
+                {"$set": {"status": "running", "started_at": datetime.utcnow()}},
+                return_document=ReturnDocument.AFTER
+            )
+            if not job:
+                return
+
+            start = time.time()
+            success, message, data = JOB_RUNNERS[job["kind"]](job["positions"], job["params"])
+            update = {
+                "status": "done" if success else "failed",
+                "message": message,
+                "result": data if success else None,
+                "error": None if success else message,
+                "completed_at": datetime.utcnow(),
+                "duration_seconds": round(time.time() - start, 2)
+            }
+            jobs_col.update_one({"job_id": job_id}, {"$set": update, "$unset": {"positions": "", "active": ""}})
+            logger.info(f"Analysis job {job_id} ({job['kind']}) {update['status']} in {update['duration_seconds']}s")
+
+        except Exception as e:
+            logger.error(f"Analysis job {job_id} failed: {e}")
+            jobs_col.update_one(
+                {"job_id": job_id},
+                {"$set": {"status": "failed", "error": str(e), "completed_at": datetime.utcnow()},
+                 "$unset": {"positions": "", "active": ""}}
+            )
+        finally:
+            with _job_events_lock:
+                event = _job_events.pop(job_id, None)
+            if event:
+                event.set()
+
+    @staticmethod
+    def get_job(user_email: str, job_id: str, wait: float = 0) -> Optional[Dict]:
+        """
+        Get a job, optionally waiting up to `wait` seconds for it to finish
+
+        Jobs running in this process are awaited on their completion event;
+        jobs from other workers are polled in Mongo.
+        """
+        jobs_col = get_analysis_jobs_collection()
+        query = {"job_id": job_id, "user_email": user_email.lower()}
+        deadline = time.time() + min(max(wait, 0), config.ANALYSIS_JOB_MAX_WAIT)
+
+        while True:
+            doc = jobs_col.find_one(query, {"positions": 0})
+            remaining = deadline - time.time()
+            if doc is None or doc["status"] in ("done", "failed") or remaining <= 0:
+                return _public(doc)
+
+            with _job_events_lock:
+                event = _job_events.get(job_id)
+            if event:
+                event.wait(min(remaining, 1.0))
+            else:
+                time.sleep(min(remaining, 0.5))
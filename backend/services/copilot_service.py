@@ -389,6 +389,34 @@ Structure ALL sections this way with clear h2 headings, spacing, lists, and tabl
         return False, f"Error performing fundamental analysis: {str(e)}", None
 
 
+def _optimizer_context(user_email, portfolio_id):
+    """Format optimizer target weights and trades for the portfolio prompt"""
+    from models.position import Position
+    from services.portfolio_optimizer_service import PortfolioOptimizerService
+
+    try:
+        positions = Position.get_positions(user_email, portfolio_id)
+        success, message, data = PortfolioOptimizerService.optimize_positions(positions)
+        if not success:
+            logger.info(f"Optimizer context skipped: {message}")
+            return ""
+
+        context = f"\n\nOPTIMIZER TARGETS (shrinkage covariance, data as of {data['as_of']}):\n"
+        context += (f"Current: expected return {data['current']['expected_return'] * 100:.1f}%, "
+                    f"volatility {data['current']['volatility'] * 100:.1f}%, Sharpe {data['current']['sharpe_ratio']}\n")
+        for name, target in data['targets'].items():
+            context += (f"\n{name.replace('_', ' ').title()}: expected return {target['expected_return'] * 100:.1f}%, "
+                        f"volatility {target['volatility'] * 100:.1f}%, Sharpe {target['sharpe_ratio']}\n")
+            for trade in target['trades']:
+                if trade['action'] != 'HOLD':
+                    context += (f"- {trade['action']} {trade['shares']} {trade['ticker']} "
+                                f"(weight {trade['current_weight'] * 100:.1f}% -> {trade['target_weight'] * 100:.1f}%)\n")
+        return context
+    except Exception as e:
+        logger.error(f"Error building optimizer context: {e}")
+        return ""
+
+
 def handle_portfolio_query(query, user_email, portfolio_id=None, previous_conversation=None):
     """
     Handle portfolio-specific queries using Perplexity Sonar with user's portfolio data
@@ -465,6 +493,10 @@ HOLDINGS ({len(portfolio_summary['symbol_allocations'])} stocks):
             for txn in portfolio_transactions['transactions'][:10]:  # Show last 10 transactions
                 portfolio_context += f"- {txn['symbol']}: Bought {txn['quantity']} shares on {txn['buy_date']} for ₹{txn['invested_amount']:,.2f}\n"
             
+            # Rebalancing questions get optimizer targets instead of raw holdings only
+            if any(k in query.lower() for k in ('rebalanc', 'optimi', 'allocat', 'diversif')):
+                portfolio_context += _optimizer_context(user_email, portfolio_id)
+            
         except Exception as e:
             logger.error(f"Error fetching portfolio data: {e}", exc_info=True)
             return False, f"Could not fetch portfolio data: {str(e)}", None
@@ -9,11 +9,10 @@ import feedparser
 import time
 import random
 import requests  # For direct HTTP calls with custom headers
-from datetime import datetime
 from urllib.parse import quote_plus
 import re
 from scraper import fetch_url  # Import the robust fetcher with headers
-from utils.date_utils import parse_published_date, sort_articles_by_date
+from utils.date_utils import normalize_timestamp, format_utc_iso, sort_articles_by_date
 
 
 class GoogleNewsRSSFetcher:
@@ -169,24 +168,11 @@ class GoogleNewsRSSFetcher:
                 # Clean HTML tags from summary
                 content = re.sub(r'<[^>]+>', '', content)
             
-            # Extract published date using shared utility
-            published_at = ''
-            if hasattr(entry, 'published'):
-                published_at = entry.published
-            elif hasattr(entry, 'published_parsed'):
-                try:
-                    published_dt = datetime(*entry.published_parsed[:6])
-                    published_at = published_dt.isoformat()
-                except:
-                    pass
-            
-            # Parse to ensure consistent format (don't use datetime.now() as fallback)
-            if published_at:
-                try:
-                    published_dt = parse_published_date(published_at)
-                    published_at = published_dt.isoformat()
-                except:
-                    published_at = ''  # Empty string instead of current time
+            # Normalize the published date once (feedparser's struct_time is the fast path)
+            published_dt, _ = normalize_timestamp(
+                getattr(entry, 'published_parsed', None) or getattr(entry, 'published', None)
+            )
+            published_at = format_utc_iso(published_dt) if published_dt else ''  # No current-time fallback
             
             # Determine if premium
             premium_sources = ['Bloomberg', 'WSJ', 'Wall Street Journal', 'Financial Times', 'Barron\'s', 'Morningstar']
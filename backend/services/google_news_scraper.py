@@ -14,7 +14,7 @@ import random
 from functools import lru_cache
 from concurrent.futures import ThreadPoolExecutor, as_completed
 import re
-from utils.date_utils import parse_published_date, sort_articles_by_date
+from utils.date_utils import normalize_timestamp, format_utc_iso, sort_articles_by_date
 
 # User agents for rotation
 USER_AGENTS = [
@@ -335,14 +335,9 @@ class GoogleNewsSearcher:
                 if date_elem.name == 'time' and date_elem.get('datetime'):
                     published_at = date_elem.get('datetime')
             
-            # Convert relative date to ISO format using shared utility
-            published_iso = ''
-            if published_at:
-                try:
-                    published_dt = parse_published_date(published_at)
-                    published_iso = published_dt.isoformat()
-                except:
-                    published_iso = ''  # Empty string instead of current time
+            # Normalize the date once (empty string instead of current time)
+            published_dt, _ = normalize_timestamp(published_at)
+            published_iso = format_utc_iso(published_dt) if published_dt else ''
             
             # Determine if premium
             premium_sources = ['Bloomberg', 'WSJ', 'Financial Times', 'Barron\'s', 'Morningstar']
@@ -415,14 +410,9 @@ class GoogleNewsSearcher:
                     published_at = text
                     break
             
-            # Parse date using shared utility
-            published_iso = ''
-            if published_at:
-                try:
-                    published_dt = parse_published_date(published_at)
-                    published_iso = published_dt.isoformat()
-                except:
-                    published_iso = ''
+            # Normalize the date once (empty string instead of current time)
+            published_dt, _ = normalize_timestamp(published_at)
+            published_iso = format_utc_iso(published_dt) if published_dt else ''
             
             premium_sources = ['Bloomberg', 'WSJ', 'Financial Times', 'Barron\'s', 'Morningstar']
             is_premium = any(ps.lower() in source.lower() for ps in premium_sources)
@@ -0,0 +1,127 @@
+"""
+History Loader Service
+Bulk daily close loader: splits symbol sets into bounded chunks, downloads
+the chunks concurrently, retries only the symbols that failed and returns
+one canonical aligned (dates x symbols) float32 close matrix
+"""
+
+import logging
+import time
+import concurrent.futures
+from datetime import datetime
+from typing import List, Tuple
+import numpy as np
+import pandas as pd
+import yfinance as yf
+from config import get_config
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+
+class HistoryLoaderService:
+    """Service for loading aligned close-price history"""
+
+    @staticmethod
+    def extract_closes(raw: pd.DataFrame, symbols: List[str]) -> pd.DataFrame:
+        """
+        Canonical close matrix from a yfinance download
+
+        Accepts every shape yf.download returns: (Price, Ticker) or
+        (Ticker, Price) MultiIndex columns, or flat OHLC columns for a single
+        symbol. Symbols without any close are left out.
+
+        Args:
+            raw: DataFrame returned by yf.download
+            symbols: Symbols that were requested
+
+        Returns:
+            DataFrame: tz-naive daily DatetimeIndex x symbols (request order), float32
+        """
+        if raw is None or raw.empty:
+            return pd.DataFrame(dtype=np.float32)
+
+        columns = raw.columns
+        if isinstance(columns, pd.MultiIndex):
+            level = next((i for i in range(columns.nlevels) if 'Close' in columns.get_level_values(i)), None)
+            if level is None:
+                return pd.DataFrame(dtype=np.float32)
+            closes = raw.xs('Close', axis=1, level=level)
+        elif 'Close' in columns and len(symbols) == 1:
+            closes = raw[['Close']].set_axis(symbols, axis=1)
+        else:
+            return pd.DataFrame(dtype=np.float32)
+
+        closes = closes.reindex(columns=[s for s in symbols if s in closes.columns])
+        closes = closes.apply(pd.to_numeric, errors='coerce').replace(0, np.nan).dropna(axis=1, how='all')
+
+        index = pd.DatetimeIndex(closes.index)
+        if index.tz is not None:
+            index = index.tz_localize(None)
+        closes.index = index.normalize()
+        closes = closes[~closes.index.duplicated(keep='last')].sort_index()
+
+        return closes.astype(np.float32)
+
+    @staticmethod
+    def _download_chunk(symbols: List[str], start_date: datetime, end_date: datetime) -> pd.DataFrame:
+        """Download one chunk of symbols (empty frame on failure)"""
+        try:
+            raw = yf.download(
+                symbols, start=start_date, end=end_date, progress=False, group_by='column',
+                threads=config.HISTORY_THREADS_PER_CHUNK, timeout=config.REQUEST_TIMEOUT
+            )
+            return HistoryLoaderService.extract_closes(raw, symbols)
+        except Exception as e:
+            logger.warning(f"History download failed for {len(symbols)} symbols: {e}")
+            return pd.DataFrame(dtype=np.float32)
+
+    @staticmethod
+    def load_closes(symbols: List[str], start_date: datetime, end_date: datetime) -> Tuple[pd.DataFrame, List[str]]:
+        """
+        Load daily closes for symbols
+
+        Symbols are downloaded in chunks of HISTORY_CHUNK_SIZE on a bounded
+        pool; after each round only the symbols that came back empty are
+        retried (up to HISTORY_RETRIES times, with backoff).
+
+        Args:
+            symbols: Yahoo symbols (e.g. RELIANCE.NS, ^NSEI)
+            start_date: First date
+            end_date: End date (exclusive, as in yf.download)
+
+        Returns:
+            tuple: (DataFrame dates x symbols float32 in request order, failed symbols)
+        """
+        symbols = list(dict.fromkeys(s for s in symbols if s))
+        frames = []
+        pending = symbols
+
+        for attempt in range(config.HISTORY_RETRIES + 1):
+            if not pending:
+                break
+            if attempt:
+                time.sleep(config.HISTORY_RETRY_BACKOFF * attempt)
+                logger.info(f"Retrying history for {len(pending)} symbols (attempt {attempt + 1})")
+
+            size = config.HISTORY_CHUNK_SIZE
+            chunks = [pending[i:i + size] for i in range(0, len(pending), size)]
+            with concurrent.futures.ThreadPoolExecutor(max_workers=min(config.HISTORY_MAX_WORKERS, len(chunks))) as executor:
+                results = list(executor.map(lambda c: HistoryLoaderService._download_chunk(c, start_date, end_date), chunks))
+
+            loaded = set()
+            for frame in results:
+                if not frame.empty:
+                    frames.append(frame)
+                    loaded.update(frame.columns)
+            pending = [s for s in pending if s not in loaded]
+
+        if pending:
+            logger.warning(f"No history for {len(pending)} symbols: {pending}")
+
+        if not frames:
+            return pd.DataFrame(dtype=np.float32), pending
+
+        closes = pd.concat(frames, axis=1).sort_index()
+        closes = closes.reindex(columns=[s for s in symbols if s in closes.columns])
+        return closes.astype(np.float32), pending
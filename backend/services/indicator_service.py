@@ -0,0 +1,261 @@
+"""
+Indicator Service
+Incremental RSI(14) / SMA50 / SMA200 engine. Rolling state is stored per
+symbol in stock_indicators and advanced by one bar per trading day, so
+requests read indicators instead of recomputing them from ~400 days of history
+"""
+
+import logging
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+import numpy as np
+from pymongo import ReplaceOne
+from services.history_loader_service import HistoryLoaderService
+from utils.db import get_indicators_collection, get_positions_collection, get_watchlist_collection
+
+logger = logging.getLogger(__name__)
+
+RSI_PERIOD = 14
+SMA_SHORT = 50
+SMA_LONG = 200
+SEED_HISTORY_DAYS = 400  # Calendar days of history used to seed a new symbol
+MAX_GAP_DAYS = 30  # State older than this is reseeded instead of downloading the gap
+STALE_AFTER_DAYS = 4  # Stored state this far behind the latest bar is not used (covers weekends)
+ADJUSTMENT_TOLERANCE = 1e-4  # Relative as_of close mismatch that means history was adjusted
+BENCHMARK = "^NSEI"
+
+
+def normalize_symbol(ticker: str) -> str:
+    """Yahoo symbol for a ticker (bare NSE tickers need .NS)"""
+    ticker = str(ticker).strip().upper()
+    if ticker.startswith("^") or "." in ticker:
+        return ticker
+    return f"{ticker}.NS"
+
+
+class IndicatorService:
+    """Service for incrementally maintained technical indicators"""
+
+    @staticmethod
+    def new_state(symbol: str) -> Dict:
+        """Empty indicator state for a symbol"""
+        return {
+            "symbol": symbol,
+            "as_of": None,
+            "bars": 0,
+            "last_close": None,
+            "avg_gain": 0.0,
+            "avg_loss": 0.0,
+            "closes": [],  # Last SMA_LONG closes, oldest first
+            "sum_short": 0.0,
+            "sum_long": 0.0,
+            "rsi": None,
+            "sma50": None,
+            "sma200": None,
+            "trend": "Neutral"
+        }
+
+    @staticmethod
+    def update_state(state: Dict, bar_date: str, close: float) -> Dict:
+        """
+        Advance indicator state by one daily bar in O(1)
+
+        RSI uses Wilder smoothing (the first 14 changes are a plain average),
+        SMAs use running sums over the stored close window.
+
+        Args:
+            state: Indicator state (modified in place)
+            bar_date: Bar date (YYYY-MM-DD), must be after state["as_of"]
+            close: Closing price
+
+        Returns:
+            dict: The updated state
+        """
+        close = float(close)
+        if state["last_close"] is not None:
+            delta = close - state["last_close"]
+            n = min(state["bars"], RSI_PERIOD)  # Number of changes incl. this one
+            state["avg_gain"] = (state["avg_gain"] * (n - 1) + max(delta, 0.0)) / n
+            state["avg_loss"] = (state["avg_loss"] * (n - 1) + max(-delta, 0.0)) / n
+
+        closes = state["closes"]
+        closes.append(close)
+        state["sum_short"] += close
+        state["sum_long"] += close
+        if len(closes) > SMA_SHORT:
+            state["sum_short"] -= closes[-SMA_SHORT - 1]
+        if len(closes) > SMA_LONG:
+            state["sum_long"] -= closes.pop(0)
+
+        state["bars"] += 1
+        state["last_close"] = close
+        state["as_of"] = bar_date
+
+        if state["bars"] > RSI_PERIOD:
+            if state["avg_loss"] > 0:
+                state["rsi"] = 100 - 100 / (1 + state["avg_gain"] / state["avg_loss"])
+            else:
+                state["rsi"] = 100.0 if state["avg_gain"] > 0 else 50.0
+        state["sma50"] = state["sum_short"] / SMA_SHORT if len(closes) >= SMA_SHORT else None
+        state["sma200"] = state["sum_long"] / SMA_LONG if len(closes) >= SMA_LONG else None
+        if state["sma50"] is not None and state["sma200"] is not None:
+            state["trend"] = "Bullish" if state["sma50"] > state["sma200"] else "Bearish"
+        else:
+            state["trend"] = "Neutral"
+
+        return state
+
+    @staticmethod
+    def is_fresh(state: Dict, last_bar_date: str) -> bool:
+        """Whether stored state is recent enough to stand in for a symbol's latest bar (YYYY-MM-DD)"""
+        as_of = state.get("as_of")
+        if not as_of:
+            return False
+        gap = datetime.fromisoformat(last_bar_date) - datetime.fromisoformat(as_of)
+        return gap <= timedelta(days=STALE_AFTER_DAYS)
+
+    @staticmethod
+    def _matches_history(state: Dict, bar_dates: np.ndarray, closes: np.ndarray) -> bool:
+        """
+        Whether downloaded history still agrees with the state's last bar
+
+        Yahoo history is adjusted for splits, bonuses and dividends, so after
+        a corporate action the as_of close no longer matches last_close and
+        the rolling sums and RSI averages have to be rebuilt.
+        """
+        at = np.flatnonzero(bar_dates == state["as_of"])
+        if not len(at) or not np.isfinite(closes[at[0]]) or not state.get("last_close"):
+            return False
+        return abs(closes[at[0]] / state["last_close"] - 1) <= ADJUSTMENT_TOLERANCE
+
+    @staticmethod
+    def get_indicators(symbols: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Get stored indicators for symbols with one indexed $in read
+
+        Args:
+            symbols: Tickers (with or without .NS)
+
+        Returns:
+            dict: normalized symbol -> {"as_of", "rsi", "sma50", "sma200", "trend", "last_close"}
+        """
+        symbols = list(dict.fromkeys(normalize_symbol(s) for s in symbols if s))
+        if not symbols:
+            return {}
+
+        cursor = get_indicators_collection().find(
+            {"symbol": {"$in": symbols}},
+            {"_id": 0, "symbol": 1, "as_of": 1, "rsi": 1, "sma50": 1, "sma200": 1, "trend": 1, "last_close": 1}
+        )
+        return {doc["symbol"]: doc for doc in cursor}
+
+    @staticmethod
+    def screen(rsi_below: Optional[float] = None, rsi_above: Optional[float] = None,
+               trend: Optional[str] = None, limit: int = 100) -> List[Dict]:
+        """
+        Screen the whole indicator universe (e.g. oversold or bullish stocks)
+
+        Returns:
+            list: Matching indicator documents, most extreme RSI first
+        """
+        query = {}
+        if rsi_below is not None or rsi_above is not None:
+            query["rsi"] = {}
+            if rsi_below is not None:
+                query["rsi"]["$lt"] = float(rsi_below)
+            if rsi_above is not None:
+                query["rsi"]["$gt"] = float(rsi_above)
+        if trend:
+            query["trend"] = trend.capitalize()
+
+        sort_dir = -1 if rsi_above is not None and rsi_below is None else 1
+        cursor = get_indicators_collection().find(
+            query,
+            {"_id": 0, "symbol": 1, "as_of": 1, "rsi": 1, "sma50": 1, "sma200": 1, "trend": 1, "last_close": 1}
+        ).sort("rsi", sort_dir).limit(limit)
+        return list(cursor)
+
+    @staticmethod
+    def run_nightly_update(symbols: Optional[List[str]] = None) -> int:
+        """
+        Advance stored indicator state with the bars published since its as_of
+
+        Existing symbols only need the bars since their as_of: they are
+        downloaded in one batch per as_of date, so a single stale symbol
+        doesn't widen everyone's window. Symbols without state, state older
+        than MAX_GAP_DAYS, and symbols whose as_of close no longer matches the
+        (split/dividend adjusted) history are seeded from SEED_HISTORY_DAYS.
+
+        Args:
+            symbols: Symbols to update; None updates every stored symbol plus
+                     everything held or watched and the Nifty benchmark
+
+        Returns:
+            int: Number of symbols written
+        """
+        indicators_col = get_indicators_collection()
+        if symbols is None:
+            symbols = set(indicators_col.distinct("symbol"))
+            symbols.update(get_positions_collection().distinct("symbol"))
+            symbols.update(get_watchlist_collection().distinct("ticker"))
+            symbols.add(BENCHMARK)
+        symbols = list(dict.fromkeys(normalize_symbol(s) for s in symbols if s))
+        if not symbols:
+            return 0
+
+        states = {doc["symbol"]: doc for doc in indicators_col.find({"symbol": {"$in": symbols}}, {"_id": 0})}
+        end_date = datetime.now() + timedelta(days=1)
+        min_as_of = (end_date - timedelta(days=MAX_GAP_DAYS)).strftime('%Y-%m-%d')
+
+        by_as_of = {}
+        reseed = []
+        for s in symbols:
+            as_of = states[s].get("as_of") if s in states else None
+            if as_of and as_of >= min_as_of:
+                by_as_of.setdefault(as_of, []).append(s)
+            else:
+                reseed.append(s)
+
+        operations = []
+
+        def apply_bars(group, data, seed):
+            bar_dates = data.index.strftime('%Y-%m-%d').to_numpy()
+            for symbol in group:
+                if symbol not in data.columns:
+                    continue
+                closes = data[symbol].to_numpy(dtype=np.float64)
+                if seed:
+                    state = IndicatorService.new_state(symbol)
+                else:
+                    state = states[symbol]
+                    if not IndicatorService._matches_history(state, bar_dates, closes):
+                        reseed.append(symbol)
+                        continue
+                fresh = (bar_dates > (state.get("as_of") or "")) & np.isfinite(closes) & (closes > 0)
+                if not fresh.any():
+                    continue
+                for bar_date, close in zip(bar_dates[fresh], closes[fresh]):
+                    IndicatorService.update_state(state, bar_date, close)
+                state["updated_at"] = datetime.utcnow()
+                operations.append(ReplaceOne({"symbol": symbol}, state, upsert=True))
+
+        # Incremental groups: the download includes the as_of bar to check adjustments
+        for as_of, group in sorted(by_as_of.items()):
+            data, failed = HistoryLoaderService.load_closes(group, datetime.fromisoformat(as_of), end_date)
+            if data.empty:
+                logger.warning(f"Indicator update: no data for {len(group)} symbols since {as_of}")
+                continue
+            apply_bars(group, data, seed=False)
+
+        if reseed:
+            logger.info(f"Indicator update: seeding {len(reseed)} new, stale or adjusted symbols")
+            data, failed = HistoryLoaderService.load_closes(reseed, end_date - timedelta(days=SEED_HISTORY_DAYS), end_date)
+            if data.empty:
+                logger.warning(f"Indicator update: no data for {len(reseed)} symbols")
+            else:
+                apply_bars(reseed, data, seed=True)
+
+        if operations:
+            indicators_col.bulk_write(operations, ordered=False)
+        logger.info(f"Indicator update wrote {len(operations)} of {len(symbols)} symbols")
+        return len(operations)
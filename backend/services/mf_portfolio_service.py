@@ -4,14 +4,20 @@ Handles MF portfolio analysis, XIRR calculation, and performance metrics
 """
 
 import logging
+import threading
 import concurrent.futures
 from datetime import datetime, date, timedelta
 from typing import List, Dict, Optional, Tuple
-import pandas as pd
+import numpy as np
+import pytz
+from config import get_config
 from models.mf_position import MFPosition
+from models.mf_sip import MFSip
 from services.mf_price_service import MutualFundPriceService
+from services.mf_sip_service import MFSipService
 
 logger = logging.getLogger(__name__)
+config = get_config()
 
 # Global cache for Nifty data to avoid redundant slow yfinance fetches
 _nifty_cache = {
@@ -19,6 +25,15 @@ _nifty_cache = {
     "last_updated": None
 }
 
+# Shared portfolio computation snapshots (see MFPortfolioService.get_portfolio_snapshot)
+_snapshot_cache = {}     # (user, portfolio, positions version, NAV date) -> {"snapshot", "created_at"}
+_snapshot_inflight = {}  # same key -> Future for the computation in progress
+_snapshot_lock = threading.Lock()
+
+# Enriched position fields only exposed by the full /analysis projection
+_ANALYSIS_ONLY_FIELDS = {"returns", "returns_percent", "day_change", "day_change_percent", "fund_name", "fund_xirr",
+                         "nifty_current_value"}
+
 class MFPortfolioService:
     """Service for MF portfolio management and analysis"""
     
@@ -43,61 +58,14 @@ class MFPortfolioService:
             # Sort cashflows by date
             cashflows = sorted(cashflows, key=lambda x: x[0])
             
-            # Check if all cashflows are zero or same sign (invalid for XIRR)
-            amounts = [cf[1] for cf in cashflows]
-            if all(a >= 0 for a in amounts) or all(a <= 0 for a in amounts):
-                logger.warning("All cashflows have same sign, cannot calculate XIRR")
-                return None
-            
             # Base date (first cashflow date)
             base_date = cashflows[0][0]
             
             # Convert to days from base date
-            days_and_amounts = []
-            for date, amount in cashflows:
-                days = (date - base_date).days
-                days_and_amounts.append((days, amount))
-            
-            # Try multiple initial guesses if first one doesn't converge
-            guesses = [guess, 0.01, -0.01, 0.5, -0.5]
-            
-            for initial_guess in guesses:
-                # Newton-Raphson method to find IRR
-                rate = initial_guess
-                max_iterations = 100
-                tolerance = 1e-6
-                
-                for iteration in range(max_iterations):
-                    npv = 0
-                    dnpv = 0
-                    
-                    for days, amount in days_and_amounts:
-                        if days == 0:
-                            npv += amount
-                        else:
-                            factor = (1 + rate) ** (days / 365.0)
-                            npv += amount / factor
-                            dnpv -= (days / 365.0) * amount / (factor * (1 + rate))
-                    
-                    if abs(npv) < tolerance:
-                        result = rate * 100  # Convert to percentage
-                        logger.info(f"XIRR converged to {result}% after {iteration} iterations with guess {initial_guess}")
-                        return result
-                    
-                    if dnpv == 0:
-                        break  # Try next guess
-                    
-                    rate = rate - npv / dnpv
-                    
-                    # Prevent extreme values
-                    if rate < -0.99:
-                        rate = -0.99
-                    elif rate > 10:
-                        rate = 10
-            
-            # If we didn't converge with any guess
-            logger.warning(f"XIRR did not converge after trying {len(guesses)} initial guesses")
-            return None
+            days = np.array([(d - base_date).days for d, _ in cashflows], dtype=np.float64)
+            amounts = np.array([amount for _, amount in cashflows], dtype=np.float64)
+            
+            return MFPortfolioService.calculate_xirr_arrays(days, amounts, guess)
             
         except Exception as e:
             logger.error(f"Error calculating XIRR: {str(e)}")
@@ -105,94 +73,238 @@ class MFPortfolioService:
             return None
     
     @staticmethod
-    def calculate_nifty_xirr(cashflows: List[Tuple[datetime, float]]) -> Optional[float]:
+    def calculate_xirr_arrays(days: np.ndarray, amounts: np.ndarray, guess=0.1) -> Optional[float]:
         """
-        Calculate Nifty 50 XIRR for the same investment dates
+        Vectorized XIRR over parallel arrays of cashflow offsets and amounts
         
-        This simulates what the return would have been if the same amounts
-        were invested in Nifty 50 on the same dates
+        Args:
+            days: Days of each cashflow from the first one (any order)
+            amounts: Cashflow amounts (negative for investments)
+            guess: Initial guess for IRR (default 0.1 = 10%)
+            
+        Returns:
+            float: XIRR as a percentage, or None if calculation fails
+        """
+        if len(amounts) < 2:
+            logger.warning(f"Insufficient cashflows for XIRR: {len(amounts)}")
+            return None
+        
+        # Check if all cashflows are zero or same sign (invalid for XIRR)
+        if np.all(amounts >= 0) or np.all(amounts <= 0):
+            logger.warning("All cashflows have same sign, cannot calculate XIRR")
+            return None
+        
+        years = np.asarray(days, dtype=np.float64) / 365.0
+        amounts = np.asarray(amounts, dtype=np.float64)
+        
+        # Try multiple initial guesses if first one doesn't converge
+        guesses = [guess, 0.01, -0.01, 0.5, -0.5]
+        
+        for initial_guess in guesses:
+            # Newton-Raphson method to find IRR
+            rate = initial_guess
+            max_iterations = 100
+            tolerance = 1e-6
+            
+            for iteration in range(max_iterations):
+                discounted = amounts / (1 + rate) ** years
+                npv = discounted.sum()
+                dnpv = -(years * discounted).sum() / (1 + rate)
+                
+                if abs(npv) < tolerance:
+                    result = float(rate * 100)  # Convert to percentage
+                    logger.info(f"XIRR converged to {result}% after {iteration} iterations with guess {initial_guess}")
+                    return result
+                
+                if dnpv == 0:
+                    break  # Try next guess
+                
+                rate = rate - npv / dnpv
+                
+                # Prevent extreme values
+                if rate < -0.99:
+                    rate = -0.99
+                elif rate > 10:
+                    rate = 10
+        
+        # If we didn't converge with any guess
+        logger.warning(f"XIRR did not converge after trying {len(guesses)} initial guesses")
+        return None
+    
+    @staticmethod
+    def calculate_terminal_xirr(flow_dates: np.ndarray, amounts: np.ndarray, terminal_value: float,
+                                valuation_date=None) -> Optional[float]:
+        """
+        XIRR of dated investment arrays closed out by a single terminal value
         
         Args:
-            cashflows: List of (date, amount) tuples from portfolio
+            flow_dates: datetime64[D] array of cashflow dates
+            amounts: Cashflow amounts (negative for investments)
+            terminal_value: Value on the valuation date (positive)
+            valuation_date: Date of the terminal value (default: today)
             
         Returns:
-            float: Nifty XIRR as a percentage, or None if calculation fails
+            float: XIRR as a percentage, or None
         """
-        try:
-            import yfinance as yf
+        if len(flow_dates) == 0:
+            return None
+        
+        flow_dates = np.asarray(flow_dates, dtype='datetime64[D]')
+        valuation_date = np.datetime64(valuation_date or date.today(), 'D')
+        start = flow_dates.min()
+        days = np.append((flow_dates - start).astype(np.float64),
+                         float((valuation_date - start).astype(np.int64)))
+        flows = np.append(np.asarray(amounts, dtype=np.float64), terminal_value)
+        return MFPortfolioService.calculate_xirr_arrays(days, flows)
+    
+    @staticmethod
+    def _get_nifty_closes() -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get cached Nifty 50 closes as (datetime64[D] dates, float64 closes)
+        
+        History is refetched from yfinance at most every 4 hours.
+        """
+        import yfinance as yf
+        
+        global _nifty_cache
+        now = datetime.now()
+        
+        # Cache Nifty history for 4 hours to avoid redundant hits
+        if (_nifty_cache["data"] is not None and 
+            _nifty_cache["last_updated"] is not None and 
+            (now - _nifty_cache["last_updated"]) < timedelta(hours=4)):
+            return _nifty_cache["data"]
+        
+        # Fetch the full Nifty history so old lots and SIP installments are
+        # matched to their own close
+        logger.info("Fetching fresh Nifty data from yfinance")
+        hist = yf.Ticker("^NSEI").history(period="max")
+        if hist.empty:
+            return None
+        
+        # yfinance returns timezone-aware (Asia/Kolkata) timestamps; keep the local trading date
+        index = hist.index.tz_localize(None) if hist.index.tz is not None else hist.index
+        dates = index.values.astype('datetime64[D]')
+        closes = hist['Close'].to_numpy(dtype=np.float64)
+        
+        _nifty_cache["data"] = (dates, closes)
+        _nifty_cache["last_updated"] = now
+        logger.info(f"Cached {len(dates)} days of Nifty data")
+        return _nifty_cache["data"]
+    
+    @staticmethod
+    def mirror_benchmark(flow_dates: np.ndarray, amounts: np.ndarray, bench_dates: np.ndarray,
+                         bench_closes: np.ndarray, valuation_date=None) -> Optional[Dict]:
+        """
+        Mirror investment cashflows into a benchmark index
+        
+        Every investment buys benchmark units at the close on or before its
+        date (never a later close), matched for all cashflows in a single
+        searchsorted. Cashflows before the start of the history have no such
+        close: they get no units, are left out of invested and the XIRR, and
+        are reported as unbenchmarked.
+        
+        Args:
+            flow_dates: datetime64[D] array of investment dates
+            amounts: Array of investment amounts (negative = money in)
+            bench_dates: Sorted datetime64[D] array of benchmark dates
+            bench_closes: Benchmark closes aligned with bench_dates
+            valuation_date: Date of the terminal value (default: today)
+            
+        Returns:
+            dict: units, lot_values, invested, terminal_value, terminal_price,
+                  xirr, benchmarked (per-cashflow mask) and unbenchmarked_invested
+        """
+        if len(bench_dates) == 0:
+            return None
+        
+        flow_dates = np.asarray(flow_dates, dtype='datetime64[D]')
+        amounts = np.asarray(amounts, dtype=np.float64)
+        invested = np.where(amounts < 0, -amounts, 0.0)
+        
+        idx = np.searchsorted(bench_dates, flow_dates, side='right') - 1
+        benchmarked = idx >= 0
+        
+        units = np.zeros(len(invested))
+        units[benchmarked] = invested[benchmarked] / bench_closes[idx[benchmarked]]
+        terminal_price = float(bench_closes[-1])
+        lot_values = units * terminal_price
+        terminal_value = float(lot_values.sum())
+        
+        mask = (invested > 0) & benchmarked
+        xirr = MFPortfolioService.calculate_terminal_xirr(flow_dates[mask], -invested[mask],
+                                                          terminal_value, valuation_date)
+        
+        return {
+            "units": units,
+            "lot_values": lot_values,
+            "invested": float(invested[benchmarked].sum()),
+            "terminal_value": terminal_value,
+            "terminal_price": terminal_price,
+            "xirr": xirr,
+            "benchmarked": benchmarked,
+            "unbenchmarked_invested": float(invested[~benchmarked].sum())
+        }
+    
+    @staticmethod
+    def calculate_nifty_comparison(cashflows: List[Tuple[datetime, float]]) -> Optional[Dict]:
+        """
+        Mirror portfolio cashflows into Nifty 50 and return per-lot values
+        
+        Args:
+            cashflows: List of (date, amount) tuples from portfolio; the last
+                       one is the current value and is not mirrored
             
+        Returns:
+            dict: See mirror_benchmark (lot arrays follow the input order), or None
+        """
+        try:
             if not cashflows or len(cashflows) < 2:
                 logger.warning(f"Insufficient cashflows for Nifty XIRR: {len(cashflows) if cashflows else 0}")
                 return None
             
-            # Sort cashflows
-            cashflows = sorted(cashflows, key=lambda x: x[0])
-            logger.info(f"Calculating Nifty XIRR for {len(cashflows)} cashflows")
-            
-            # Check cache first
-            global _nifty_cache
-            now = datetime.now()
-            
-            # Cache Nifty history for 4 hours to avoid redundant hits
-            if (_nifty_cache["data"] is not None and 
-                _nifty_cache["last_updated"] is not None and 
-                (now - _nifty_cache["last_updated"]) < timedelta(hours=4)):
-                hist = _nifty_cache["data"]
-                logger.info("Using cached Nifty data")
-            else:
-                # Fetch Nifty data (get last 5 years to be safe for most portfolios)
-                logger.info("Fetching fresh Nifty data from yfinance")
-                nifty = yf.Ticker("^NSEI")
-                hist = nifty.history(period="5y")
-                if not hist.empty:
-                    _nifty_cache["data"] = hist
-                    _nifty_cache["last_updated"] = now
-                    logger.info(f"Cached {len(hist)} days of Nifty data")
-            
-            if hist.empty:
+            bench = MFPortfolioService._get_nifty_closes()
+            if bench is None:
                 logger.warning("No Nifty data available")
                 return None
             
-            # Calculate Nifty cashflows
-            nifty_cashflows = []
-            total_nifty_units = 0
+            investments = cashflows[:-1]  # Exclude last cashflow (current value)
+            flow_dates = np.array([d.date() if isinstance(d, datetime) else d for d, _ in investments],
+                                  dtype='datetime64[D]')
+            amounts = np.array([amount for _, amount in investments], dtype=np.float64)
             
-            for d, amount in cashflows[:-1]:  # Exclude last cashflow (current value)
-                # Find closest Nifty price
-                # Ensure we use date part only for matching
-                target_dt = d.date()
-                
-                # Convert to timezone-aware timestamp to match hist.index
-                # yfinance returns timezone-aware data (Asia/Kolkata)
-                target_ts = pd.Timestamp(target_dt)
-                if hist.index.tz is not None:
-                    # Make target timezone-aware to match the index
-                    target_ts = target_ts.tz_localize(hist.index.tz)
-                
-                idx = hist.index.get_indexer([target_ts], method='nearest')[0]
-                nifty_price = hist.iloc[idx]['Close']
-                
-                if amount < 0:  # Investment
-                    units = abs(amount) / nifty_price
-                    total_nifty_units += units
-                    nifty_cashflows.append((d, amount))
+            return MFPortfolioService.mirror_benchmark(flow_dates, amounts, bench[0], bench[1])
             
-            logger.info(f"Total Nifty units purchased: {total_nifty_units}")
-            
-            # Calculate current Nifty value
-            current_nifty_price = hist.iloc[-1]['Close']
-            current_nifty_value = total_nifty_units * current_nifty_price
-            nifty_cashflows.append((now, current_nifty_value))
-            
-            logger.info(f"Current Nifty value: {current_nifty_value}, Price: {current_nifty_price}")
-            logger.info(f"Nifty cashflows count: {len(nifty_cashflows)}")
+        except ImportError:
+            logger.warning("yfinance not installed, cannot calculate Nifty XIRR")
+            return None
+        except Exception as e:
+            logger.error(f"Error calculating Nifty XIRR: {str(e)}")
+            logger.exception(e)
+            return None
+    
+    @staticmethod
+    def calculate_nifty_comparison_arrays(flow_dates: np.ndarray, amounts: np.ndarray) -> Optional[Dict]:
+        """
+        Array form of calculate_nifty_comparison (investment cashflows only)
+        
+        Args:
+            flow_dates: datetime64[D] array of investment dates
+            amounts: Investment amounts (negative = money in)
             
-            # Calculate XIRR for Nifty
-            nifty_xirr = MFPortfolioService.calculate_xirr(nifty_cashflows)
+        Returns:
+            dict: See mirror_benchmark, or None
+        """
+        try:
+            if len(flow_dates) == 0:
+                return None
             
-            logger.info(f"Calculated Nifty XIRR: {nifty_xirr}")
+            bench = MFPortfolioService._get_nifty_closes()
+            if bench is None:
+                logger.warning("No Nifty data available")
+                return None
             
-            return nifty_xirr
+            return MFPortfolioService.mirror_benchmark(flow_dates, amounts, bench[0], bench[1])
             
         except ImportError:
             logger.warning("yfinance not installed, cannot calculate Nifty XIRR")
@@ -202,17 +314,289 @@ class MFPortfolioService:
             logger.exception(e)
             return None
     
+    @staticmethod
+    def calculate_nifty_xirr(cashflows: List[Tuple[datetime, float]]) -> Optional[float]:
+        """
+        Calculate Nifty 50 XIRR for the same investment dates
+        
+        This simulates what the return would have been if the same amounts
+        were invested in Nifty 50 on the same dates
+        
+        Args:
+            cashflows: List of (date, amount) tuples from portfolio
+            
+        Returns:
+            float: Nifty XIRR as a percentage, or None if calculation fails
+        """
+        comparison = MFPortfolioService.calculate_nifty_comparison(cashflows)
+        return comparison["xirr"] if comparison else None
+    
+    @staticmethod
+    def _compute_portfolio_snapshot(user_email: str, portfolio_id: str) -> Dict:
+        """
+        Compute the full MF portfolio snapshot: enriched positions and SIPs,
+        totals, per-fund XIRR, portfolio XIRR and Nifty comparison.
+        
+        Cashflows are kept as datetime64/float64 arrays (one block per
+        lump-sum position or SIP) so SIP installments are never materialised
+        as documents or Python tuples.
+        
+        SIPs whose fund has no NAV history can't be valued; they are listed
+        with zero value and a valuation_error, left out of the totals and
+        XIRR, and reported in summary["unvalued_sips"].
+        
+        Returns:
+            dict: {"positions": [...], "summary": {...}} (summary is None when empty)
+        """
+        positions = MFPosition.get_positions(user_email, portfolio_id)
+        sips = MFSip.get_sips(user_email, portfolio_id)
+        
+        if not positions and not sips:
+            return {"positions": [], "summary": None}
+        
+        # Identify unique scheme codes to avoid redundant NAV fetching
+        scheme_codes = list(set(p.get("scheme_code") for p in positions + sips if p.get("scheme_code")))
+        nav_map = MutualFundPriceService.get_multiple_fund_navs(scheme_codes)
+
+        # Enrich positions with current NAV and calculate metrics
+        enriched_positions = []
+        total_invested = 0
+        total_current_value = 0
+        total_day_change = 0
+        
+        # Cashflow blocks for XIRR: parallel lists of date/amount arrays and the row they belong to
+        flow_dates = []
+        flow_amounts = []
+        flow_rows = []
+        
+        # For per-fund XIRR
+        fund_groups = {} # scheme_code -> {"dates": [], "amounts": [], "current_value": 0}
+        unvalued_sips = []
+
+        def add_row(row, scheme_code, units, invested_amount, dates, amounts, fund_data):
+            nonlocal total_invested, total_current_value, total_day_change
+            
+            current_nav = fund_data.get("nav", 0) if fund_data else 0
+            day_nav_change = fund_data.get("change", 0) if fund_data else 0
+            day_change_percent = fund_data.get("change_percent", 0) if fund_data else 0
+            
+            # Calculate current value and returns
+            current_value = units * current_nav
+            returns = current_value - invested_amount
+            returns_percent = (returns / invested_amount * 100) if invested_amount > 0 else 0
+            
+            # Day change logic
+            day_change = units * day_nav_change
+            
+            # Add to totals
+            total_invested += invested_amount
+            total_current_value += current_value
+            total_day_change += day_change
+            
+            group = fund_groups.setdefault(scheme_code, {"dates": [], "amounts": [], "current_value": 0})
+            group["current_value"] += current_value
+            
+            enriched_position = {
+                **row,
+                "current_nav": current_nav,
+                "current_value": current_value,
+                "returns": returns,
+                "returns_percent": returns_percent,
+                "day_change": day_change,
+                "day_change_percent": day_change_percent,
+                "fund_name": fund_data.get("scheme_name", row.get("scheme_name", "")) if fund_data else row.get("scheme_name", ""),
+                "fund_house": fund_data.get("fund_house", "") if fund_data else ""
+            }
+            enriched_positions.append(enriched_position)
+            
+            if len(dates):
+                flow_dates.append(dates)
+                flow_amounts.append(amounts)
+                flow_rows.append(enriched_position)
+                group["dates"].append(dates)
+                group["amounts"].append(amounts)
+
+        for position in positions:
+            invested_amount = position.get("invested_amount", 0)
+            purchase_date_str = position.get("purchase_date")
+            
+            # Add cashflow for XIRR (negative for investment)
+            dates = np.array([], dtype='datetime64[D]')
+            if purchase_date_str:
+                try:
+                    purchase_date = datetime.fromisoformat(purchase_date_str.replace('Z', '+00:00')).date()
+                    dates = np.array([purchase_date], dtype='datetime64[D]')
+                except:
+                    pass
+            
+            add_row(position, position.get("scheme_code"), position.get("units", 0), invested_amount,
+                    dates, np.full(len(dates), -invested_amount, dtype=np.float64),
+                    nav_map.get(position.get("scheme_code")))
+        
+        for sip in sips:
+            expanded = MFSipService.expand_installments(sip)
+            if expanded is None:
+                _, amounts = MFSipService.expand_schedule(sip)
+                unvalued_sips.append(sip.get("sip_id"))
+                enriched_positions.append({
+                    **sip,
+                    "is_sip": True,
+                    "units": 0,
+                    "invested_amount": float(amounts.sum()),
+                    "installment_count": len(amounts),
+                    "purchase_date": sip.get("start_date"),
+                    "purchase_nav": 0,
+                    "current_nav": 0,
+                    "current_value": 0,
+                    "returns": 0,
+                    "returns_percent": 0,
+                    "day_change": 0,
+                    "day_change_percent": 0,
+                    "fund_name": sip.get("scheme_name", ""),
+                    "fund_house": "",
+                    "valuation_error": "NAV history not available"
+                })
+                continue
+            
+            units = float(expanded["units"].sum())
+            invested_amount = float(expanded["amounts"].sum())
+            sip_row = {
+                **sip,
+                "is_sip": True,
+                "units": units,
+                "invested_amount": invested_amount,
+                "installment_count": len(expanded["dates"]),
+                "purchase_date": sip.get("start_date"),
+                "purchase_nav": (invested_amount / units) if units > 0 else 0
+            }
+            add_row(sip_row, sip.get("scheme_code"), units, invested_amount,
+                    expanded["dates"], -expanded["amounts"], nav_map.get(sip.get("scheme_code")))
+        
+        # Calculate per-fund XIRR
+        fund_xirrs = {}
+        for sc, g_data in fund_groups.items():
+            if g_data["dates"]:
+                fund_xirrs[sc] = MFPortfolioService.calculate_terminal_xirr(
+                    np.concatenate(g_data["dates"]), np.concatenate(g_data["amounts"]), g_data["current_value"])
+            else:
+                fund_xirrs[sc] = None
+        
+        # Inject fund-wise XIRR into enriched positions
+        for ep in enriched_positions:
+            ep["fund_xirr"] = fund_xirrs.get(ep.get("scheme_code"))
+        
+        all_dates = np.concatenate(flow_dates) if flow_dates else np.array([], dtype='datetime64[D]')
+        all_amounts = np.concatenate(flow_amounts) if flow_amounts else np.array([], dtype=np.float64)
+        
+        # Calculate XIRR (current value closes out the cashflows)
+        xirr = MFPortfolioService.calculate_terminal_xirr(all_dates, all_amounts, total_current_value)
+        
+        # Mirror the same investments into Nifty for comparison
+        nifty = MFPortfolioService.calculate_nifty_comparison_arrays(all_dates, all_amounts)
+        nifty_xirr = nifty["xirr"] if nifty else None
+        nifty_unbenchmarked = nifty["unbenchmarked_invested"] if nifty else 0.0
+        
+        # Per-row value today had the same amounts gone into Nifty on the same
+        # dates (None for rows with investments older than the Nifty history)
+        if nifty:
+            block_starts = np.cumsum([0] + [len(d) for d in flow_dates[:-1]])
+            block_values = np.add.reduceat(nifty["lot_values"], block_starts)
+            block_missing = np.add.reduceat((~nifty["benchmarked"]).astype(np.int64), block_starts)
+            for ep, value, missing in zip(flow_rows, block_values, block_missing):
+                ep["nifty_current_value"] = float(value) if not missing else None
+        
+        # Calculate summary
+        total_returns = total_current_value - total_invested
+        total_returns_percent = (total_returns / total_invested * 100) if total_invested > 0 else 0
+        
+        # Calculate alpha (portfolio XIRR - Nifty XIRR); not comparable when
+        # part of the money went in before the Nifty history starts
+        alpha = None
+        if xirr is not None and nifty_xirr is not None and not nifty_unbenchmarked:
+            alpha = xirr - nifty_xirr
+        
+        summary = {
+            "total_invested": total_invested,
+            "current_value": total_current_value,
+            "total_returns": total_returns,
+            "total_returns_percent": total_returns_percent,
+            "xirr": xirr,
+            "nifty_xirr": nifty_xirr,
+            "nifty_unbenchmarked_invested": nifty_unbenchmarked,
+            "alpha": alpha,
+            "position_count": len(enriched_positions),
+            "unvalued_sips": unvalued_sips,
+            "total_day_change": total_day_change,
+            "total_day_change_percent": (total_day_change / (total_current_value - total_day_change) * 100) if (total_current_value - total_day_change) > 0 else 0
+        }
+        
+        return {"positions": enriched_positions, "summary": summary}
+    
+    @staticmethod
+    def get_portfolio_snapshot(user_email: str, portfolio_id: str) -> Dict:
+        """
+        Get the shared computation snapshot for an MF portfolio.
+        
+        Snapshots are keyed by (user, portfolio, positions version, NAV date)
+        and cached for MF_SNAPSHOT_TTL seconds, so /overview, /positions-summary
+        and /analysis all project from a single computation. Concurrent callers
+        for the same key wait on the in-flight computation instead of starting
+        their own.
+        
+        Returns:
+            dict: {"positions": [...], "summary": {...} or None}
+        """
+        nav_date = datetime.now(pytz.timezone('Asia/Kolkata')).date().isoformat()
+        version = (MFPosition.get_positions_version(user_email, portfolio_id) + "|" +
+                   MFSip.get_sips_version(user_email, portfolio_id))
+        key = (user_email.lower(), portfolio_id, version, nav_date)
+        
+        with _snapshot_lock:
+            entry = _snapshot_cache.get(key)
+            if entry and (datetime.now() - entry["created_at"]).total_seconds() < config.MF_SNAPSHOT_TTL:
+                return entry["snapshot"]
+            
+            future = _snapshot_inflight.get(key)
+            is_owner = future is None
+            if is_owner:
+                future = concurrent.futures.Future()
+                _snapshot_inflight[key] = future
+        
+        if not is_owner:
+            logger.info(f"Waiting on in-flight MF snapshot for {key}")
+            return future.result()
+        
+        try:
+            snapshot = MFPortfolioService._compute_portfolio_snapshot(user_email, portfolio_id)
+        except Exception as e:
+            with _snapshot_lock:
+                _snapshot_inflight.pop(key, None)
+            future.set_exception(e)
+            raise
+        
+        now = datetime.now()
+        with _snapshot_lock:
+            # Evict expired snapshots so superseded versions don't pile up
+            expired = [k for k, v in _snapshot_cache.items()
+                       if (now - v["created_at"]).total_seconds() >= config.MF_SNAPSHOT_TTL]
+            for k in expired:
+                del _snapshot_cache[k]
+            _snapshot_cache[key] = {"snapshot": snapshot, "created_at": now}
+            _snapshot_inflight.pop(key, None)
+        
+        future.set_result(snapshot)
+        return snapshot
+    
     @staticmethod
     def get_simple_portfolio_analysis(user_email: str, portfolio_id: str) -> Dict:
         """
-        Lightweight portfolio analysis that skips heavy XIRR/Benchmark calculations.
-        Used for the Positions table to ensure fast loading.
+        Lightweight portfolio analysis (positions + current NAV only).
+        Used for the Positions table; projected from the shared portfolio snapshot.
         """
         try:
-            # Get all positions
-            positions = MFPosition.get_positions(user_email, portfolio_id)
+            snapshot = MFPortfolioService.get_portfolio_snapshot(user_email, portfolio_id)
             
-            if not positions:
+            if not snapshot["positions"]:
                 return {
                     "success": True,
                     "positions": [],
@@ -223,74 +607,21 @@ class MFPortfolioService:
                     }
                 }
             
-            # Identify unique scheme codes to avoid redundant NAV fetching
-            scheme_codes = list(set(p.get("scheme_code") for p in positions if p.get("scheme_code")))
-            
-            # Fetch NAVs IN PARALLEL
-            nav_map = {}
-            try:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                    future_to_code = {executor.submit(MutualFundPriceService.get_fund_nav, code): code for code in scheme_codes}
-                    for future in concurrent.futures.as_completed(future_to_code):
-                        code = future_to_code[future]
-                        try:
-                            fund_data = future.result()
-                            if fund_data:
-                                nav_map[code] = fund_data
-                        except Exception as exc:
-                            logger.error(f"Scheme {code} generated an exception: {exc}")
-            except RuntimeError as e:
-                # Fallback to sequential if parallel execution fails (e.g., during Flask reload)
-                logger.warning(f"Parallel execution failed, falling back to sequential: {e}")
-                for code in scheme_codes:
-                    try:
-                        fund_data = MutualFundPriceService.get_fund_nav(code)
-                        if fund_data:
-                            nav_map[code] = fund_data
-                    except Exception as exc:
-                        logger.error(f"Scheme {code} error: {exc}")
-            
-            # Enrich positions
-            enriched_positions = []
-            total_invested = 0
-            total_current_value = 0
-            
-            for position in positions:
-                scheme_code = position.get("scheme_code")
-                units = position.get("units", 0)
-                invested_amount = position.get("invested_amount", 0)
-                
-                # Get current NAV from our pre-fetched map
-                fund_data = nav_map.get(scheme_code)
-                current_nav = fund_data.get("nav", 0) if fund_data else 0
-                
-                # Calculate current value
-                current_value = units * current_nav
-                
-                # Add to totals
-                total_invested += invested_amount
-                total_current_value += current_value
-                
-                # Enrich position with minimal extra info
-                enriched_position = {
-                    **position,
-                    "current_nav": current_nav,
-                    "current_value": current_value,
-                    "fund_house": fund_data.get("fund_house", "") if fund_data else ""
-                }
-                
-                enriched_positions.append(enriched_position)
-            
-            summary = {
-                "total_invested": total_invested,
-                "current_value": total_current_value,
-                "position_count": len(positions)
-            }
+            positions = [
+                {k: v for k, v in ep.items() if k not in _ANALYSIS_ONLY_FIELDS}
+                for ep in snapshot["positions"]
+            ]
+            summary = snapshot["summary"]
             
             return {
                 "success": True,
-                "positions": enriched_positions,
-                "summary": summary
+                "positions": positions,
+                "summary": {
+                    "total_invested": summary["total_invested"],
+                    "current_value": summary["current_value"],
+                    "position_count": summary["position_count"],
+                    "unvalued_sips": summary["unvalued_sips"]
+                }
             }
             
         except Exception as e:
@@ -305,14 +636,13 @@ class MFPortfolioService:
     @staticmethod
     def get_portfolio_overview(user_email: str, portfolio_id: str) -> Dict:
         """
-        Calculates only high-level KPIs and benchmarks.
-        Skips building the enriched positions list to save resources.
-        Optimized by fetching unique NAVs only once.
+        High-level KPIs and benchmarks only (no positions list).
+        Projected from the shared portfolio snapshot.
         """
         try:
-            positions = MFPosition.get_positions(user_email, portfolio_id)
+            snapshot = MFPortfolioService.get_portfolio_snapshot(user_email, portfolio_id)
             
-            if not positions:
+            if not snapshot["positions"]:
                 return {
                     "success": True,
                     "summary": {
@@ -322,86 +652,10 @@ class MFPortfolioService:
                         "total_day_change_percent": 0
                     }
                 }
-
-            total_invested = 0
-            total_current_value = 0
-            total_day_change = 0
-            cashflows = []
-            scheme_codes = list(set(p.get("scheme_code") for p in positions if p.get("scheme_code")))
-            
-            # Fetch NAVs IN PARALLEL
-            nav_map = {}
-            try:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                    future_to_code = {executor.submit(MutualFundPriceService.get_fund_nav, code): code for code in scheme_codes}
-                    for future in concurrent.futures.as_completed(future_to_code):
-                        code = future_to_code[future]
-                        try:
-                            fund_data = future.result()
-                            if fund_data:
-                                nav_map[code] = fund_data
-                        except Exception as exc:
-                            logger.error(f"Scheme {code} error: {exc}")
-            except RuntimeError as e:
-                # Fallback to sequential if parallel execution fails (e.g., during Flask reload)
-                logger.warning(f"Parallel execution failed, falling back to sequential: {e}")
-                for code in scheme_codes:
-                    try:
-                        fund_data = MutualFundPriceService.get_fund_nav(code)
-                        if fund_data:
-                            nav_map[code] = fund_data
-                    except Exception as exc:
-                        logger.error(f"Scheme {code} error: {exc}")
-
-            for position in positions:
-                scheme_code = position.get("scheme_code")
-                invested_amount = position.get("invested_amount", 0)
-                units = position.get("units", 0)
-                purchase_date_str = position.get("purchase_date")
-                
-                nav_data = nav_map.get(scheme_code)
-                current_nav = nav_data.get("nav", 0) if nav_data else 0
-                day_nav_change = nav_data.get("change", 0) if nav_data else 0
-                
-                total_invested += invested_amount
-                current_val = units * current_nav
-                total_current_value += current_val
-                total_day_change += (units * day_nav_change)
-                
-                if purchase_date_str:
-                    try:
-                        p_date = datetime.fromisoformat(purchase_date_str.replace('Z', '+00:00'))
-                        cashflows.append((p_date, -invested_amount))
-                    except: pass
-
-            now = datetime.now()
-            cashflows.append((now, total_current_value))
-            
-            logger.info(f"Calculating portfolio XIRR with {len(cashflows)} cashflows")
-            xirr = MFPortfolioService.calculate_xirr(cashflows)
-            
-            logger.info(f"Calculating Nifty XIRR with {len(cashflows)} cashflows")
-            logger.info(f"First cashflow: {cashflows[0] if cashflows else 'None'}, Last: {cashflows[-1] if cashflows else 'None'}")
-            nifty_xirr = MFPortfolioService.calculate_nifty_xirr(cashflows)
-            
-            total_returns = total_current_value - total_invested
-            total_returns_percent = (total_returns / total_invested * 100) if total_invested > 0 else 0
-            alpha = (xirr - nifty_xirr) if (xirr is not None and nifty_xirr is not None) else None
             
             return {
                 "success": True,
-                "summary": {
-                    "total_invested": total_invested,
-                    "current_value": total_current_value,
-                    "total_returns": total_returns,
-                    "total_returns_percent": total_returns_percent,
-                    "xirr": xirr,
-                    "nifty_xirr": nifty_xirr,
-                    "alpha": alpha,
-                    "position_count": len(positions),
-                    "total_day_change": total_day_change,
-                    "total_day_change_percent": (total_day_change / (total_current_value - total_day_change) * 100) if (total_current_value - total_day_change) > 0 else 0
-                }
+                "summary": dict(snapshot["summary"])
             }
         except Exception as e:
             logger.error(f"Error in portfolio overview: {str(e)}")
@@ -420,10 +674,9 @@ class MFPortfolioService:
             dict: Portfolio analysis with positions, metrics, and XIRR
         """
         try:
-            # Get all positions
-            positions = MFPosition.get_positions(user_email, portfolio_id)
+            snapshot = MFPortfolioService.get_portfolio_snapshot(user_email, portfolio_id)
             
-            if not positions:
+            if not snapshot["positions"]:
                 return {
                     "success": True,
                     "positions": [],
@@ -439,148 +692,10 @@ class MFPortfolioService:
                     }
                 }
             
-            # Identify unique scheme codes to avoid redundant NAV fetching
-            scheme_codes = list(set(p.get("scheme_code") for p in positions if p.get("scheme_code")))
-            
-            # Fetch NAVs IN PARALLEL to significantly reduce wait time
-            nav_map = {}
-            try:
-                with concurrent.futures.ThreadPoolExecutor(max_workers=10) as executor:
-                    # Map scheme codes to futures
-                    future_to_code = {executor.submit(MutualFundPriceService.get_fund_nav, code): code for code in scheme_codes}
-                    for future in concurrent.futures.as_completed(future_to_code):
-                        code = future_to_code[future]
-                        try:
-                            fund_data = future.result()
-                            if fund_data:
-                                nav_map[code] = fund_data
-                        except Exception as exc:
-                            logger.error(f"Scheme {code} generated an exception: {exc}")
-            except RuntimeError as e:
-                # Fallback to sequential if parallel execution fails (e.g., during Flask reload)
-                logger.warning(f"Parallel execution failed, falling back to sequential: {e}")
-                for code in scheme_codes:
-                    try:
-                        fund_data = MutualFundPriceService.get_fund_nav(code)
-                        if fund_data:
-                            nav_map[code] = fund_data
-                    except Exception as exc:
-                        logger.error(f"Scheme {code} error: {exc}")
-
-            # Enrich positions with current NAV and calculate metrics
-            enriched_positions = []
-            total_invested = 0
-            total_current_value = 0
-            total_day_change = 0
-            cashflows = []  # For XIRR calculation
-            
-            # For per-fund XIRR
-            fund_groups = {} # scheme_code -> {"cashflows": [], "current_value": 0}
-
-            for position in positions:
-                scheme_code = position.get("scheme_code")
-                units = position.get("units", 0)
-                invested_amount = position.get("invested_amount", 0)
-                purchase_date_str = position.get("purchase_date")
-                purchase_nav = position.get("purchase_nav", 0)
-                
-                # Get current NAV from optimized map
-                fund_data = nav_map.get(scheme_code)
-                current_nav = fund_data.get("nav", 0) if fund_data else 0
-                day_nav_change = fund_data.get("change", 0) if fund_data else 0
-                day_change_percent = fund_data.get("change_percent", 0) if fund_data else 0
-                
-                # Calculate current value and returns
-                current_value = units * current_nav
-                returns = current_value - invested_amount
-                returns_percent = (returns / invested_amount * 100) if invested_amount > 0 else 0
-                
-                # Day change logic
-                day_change = units * day_nav_change
-                
-                # Add to totals
-                total_invested += invested_amount
-                total_current_value += current_value
-                total_day_change += day_change
-                
-                if scheme_code not in fund_groups:
-                    fund_groups[scheme_code] = {"cashflows": [], "current_value": 0}
-                
-                # Add cashflow for XIRR (negative for investment)
-                if purchase_date_str:
-                    try:
-                        purchase_date = datetime.fromisoformat(purchase_date_str.replace('Z', '+00:00'))
-                        cashflows.append((purchase_date, -invested_amount))
-                        fund_groups[scheme_code]["cashflows"].append((purchase_date, -invested_amount))
-                    except:
-                        pass
-                
-                fund_groups[scheme_code]["current_value"] += current_value
-                
-                # Enrich position
-                enriched_position = {
-                    **position,
-                    "current_nav": current_nav,
-                    "current_value": current_value,
-                    "returns": returns,
-                    "returns_percent": returns_percent,
-                    "day_change": day_change,
-                    "day_change_percent": day_change_percent,
-                    "fund_name": fund_data.get("scheme_name", position.get("scheme_name", "")) if fund_data else position.get("scheme_name", ""),
-                    "fund_house": fund_data.get("fund_house", "") if fund_data else ""
-                }
-                
-                enriched_positions.append(enriched_position)
-            
-            # Calculate per-fund XIRR
-            now = datetime.now()
-            fund_xirrs = {}
-            for sc, g_data in fund_groups.items():
-                if g_data["cashflows"]:
-                    f_cashflows = g_data["cashflows"] + [(now, g_data["current_value"])]
-                    fund_xirrs[sc] = MFPortfolioService.calculate_xirr(f_cashflows)
-                else:
-                    fund_xirrs[sc] = None
-            
-            # Inject fund-wise XIRR into enriched positions
-            for ep in enriched_positions:
-                ep["fund_xirr"] = fund_xirrs.get(ep.get("scheme_code"))
-            
-            # Add final cashflow (current value as positive)
-            cashflows.append((now, total_current_value))
-            
-            # Calculate XIRR
-            xirr = MFPortfolioService.calculate_xirr(cashflows)
-            
-            # Calculate Nifty XIRR for comparison
-            nifty_xirr = MFPortfolioService.calculate_nifty_xirr(cashflows)
-            
-            # Calculate summary
-            total_returns = total_current_value - total_invested
-            total_returns_percent = (total_returns / total_invested * 100) if total_invested > 0 else 0
-            
-            # Calculate alpha (portfolio XIRR - Nifty XIRR)
-            alpha = None
-            if xirr is not None and nifty_xirr is not None:
-                alpha = xirr - nifty_xirr
-            
-            summary = {
-                "total_invested": total_invested,
-                "current_value": total_current_value,
-                "total_returns": total_returns,
-                "total_returns_percent": total_returns_percent,
-                "xirr": xirr,
-                "nifty_xirr": nifty_xirr,
-                "alpha": alpha,
-                "position_count": len(positions),
-                "total_day_change": total_day_change,
-                "total_day_change_percent": (total_day_change / (total_current_value - total_day_change) * 100) if (total_current_value - total_day_change) > 0 else 0
-            }
-            
             return {
                 "success": True,
-                "positions": enriched_positions,
-                "summary": summary
+                "positions": [dict(ep) for ep in snapshot["positions"]],
+                "summary": dict(snapshot["summary"])
             }
         except Exception as e:
             logger.error(f"Error in portfolio analysis: {str(e)}")
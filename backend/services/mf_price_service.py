@@ -5,11 +5,28 @@ Fetches current NAV and historical data for mutual funds using MFapi.in and mfto
 
 import requests
 import logging
-from typing import Dict, Optional, List
+import threading
+import concurrent.futures
+from typing import Dict, Optional, List, Tuple
 from datetime import datetime, timedelta
+import numpy as np
+import pandas as pd
+import pytz
 from mftool import Mftool
+from config import get_config
 
 logger = logging.getLogger(__name__)
+config = get_config()
+
+# Current NAV data ((scheme_code, NAV date) -> {"data": ..., "last_updated": datetime})
+_nav_cache = {}
+_nav_cache_lock = threading.Lock()
+
+# Parsed MFapi.in scheme histories, shared by current-NAV and history lookups
+# (scheme_code -> {"data": {"dates", "navs", "meta"}, "last_updated": datetime})
+_nav_history_cache = {}
+_nav_history_cache_lock = threading.Lock()
+_NAV_HISTORY_TTL = timedelta(seconds=config.MF_NAV_CACHE_TTL)
 
 class MutualFundPriceService:
     """Service for fetching mutual fund NAV and historical data"""
@@ -23,6 +40,9 @@ class MutualFundPriceService:
         """
         Get current NAV and performance metrics for a mutual fund scheme
         
+        Reads the scheme's cached NAV history (see get_scheme_history), so
+        valuing a fund and loading its history download it once.
+        
         Args:
             scheme_code: Mutual fund scheme code
             
@@ -30,105 +50,62 @@ class MutualFundPriceService:
             Dict with NAV data, previous NAV, and performance metrics (1Y, 3Y, 5Y, 10Y returns)
         """
         try:
-            url = f"https://api.mfapi.in/mf/{scheme_code}"
-            response = requests.get(url, timeout=10)
+            history = MutualFundPriceService.get_scheme_history(scheme_code)
+            if not history:
+                return None
             
-            if response.status_code == 200:
-                data = response.json()
-                
-                if data and 'data' in data and len(data['data']) > 0:
-                    latest = data['data'][0]
-                    current_nav = float(latest['nav'])
-                    
-                    # Get previous day NAV
-                    prev_nav = 0
-                    change = 0
-                    change_percent = 0
-                    if len(data['data']) > 1:
-                        prev_nav = float(data['data'][1]['nav'])
-                        change = current_nav - prev_nav
-                        change_percent = (change / prev_nav) * 100 if prev_nav > 0 else 0
-                    
-                    # Calculate performance returns as CAGR (Compound Annual Growth Rate)
-                    # CAGR = ((Ending Value / Beginning Value)^(1/Years) - 1) × 100
-                    performance = {}
-                    historical_data = data['data']
-                    
-                    # 1 Year CAGR (~252 trading days)
-                    if len(historical_data) > 252:
-                        nav_1y = float(historical_data[252]['nav'])
-                        if nav_1y > 0:
-                            cagr_1y = ((current_nav / nav_1y) ** (1/1) - 1) * 100
-                            performance['return_1y'] = cagr_1y
-                        else:
-                            performance['return_1y'] = None
-                    else:
-                        performance['return_1y'] = None
-                    
-                    # 3 Year CAGR (~756 trading days)
-                    if len(historical_data) > 756:
-                        nav_3y = float(historical_data[756]['nav'])
-                        if nav_3y > 0:
-                            cagr_3y = ((current_nav / nav_3y) ** (1/3) - 1) * 100
-                            performance['return_3y'] = cagr_3y
-                        else:
-                            performance['return_3y'] = None
-                    else:
-                        performance['return_3y'] = None
-                    
-                    # 5 Year CAGR (~1260 trading days)
-                    if len(historical_data) > 1260:
-                        nav_5y = float(historical_data[1260]['nav'])
-                        if nav_5y > 0:
-                            cagr_5y = ((current_nav / nav_5y) ** (1/5) - 1) * 100
-                            performance['return_5y'] = cagr_5y
-                        else:
-                            performance['return_5y'] = None
-                    else:
-                        performance['return_5y'] = None
-                    
-                    # 10 Year CAGR (~2520 trading days)
-                    if len(historical_data) > 2520:
-                        nav_10y = float(historical_data[2520]['nav'])
-                        if nav_10y > 0:
-                            cagr_10y = ((current_nav / nav_10y) ** (1/10) - 1) * 100
-                            performance['return_10y'] = cagr_10y
-                        else:
-                            performance['return_10y'] = None
-                    else:
-                        performance['return_10y'] = None
-                    
-                    return {
-                        'scheme_code': scheme_code,
-                        'scheme_name': data.get('meta', {}).get('scheme_name', ''),
-                        'nav': current_nav,
-                        'prev_nav': prev_nav,
-                        'date': latest['date'],
-                        'change': change,
-                        'change_percent': change_percent,
-                        'fund_house': data.get('meta', {}).get('fund_house', ''),
-                        'scheme_type': data.get('meta', {}).get('scheme_type', ''),
-                        'scheme_category': data.get('meta', {}).get('scheme_category', ''),
-                        'return_1y': performance.get('return_1y'),
-                        'return_3y': performance.get('return_3y'),
-                        'return_5y': performance.get('return_5y'),
-                        'return_10y': performance.get('return_10y')
-                    }
+            navs, meta = history["navs"], history["meta"]
+            current_nav = float(navs[-1])
             
-            return None
+            # Get previous day NAV
+            prev_nav = 0
+            change = 0
+            change_percent = 0
+            if len(navs) > 1:
+                prev_nav = float(navs[-2])
+                change = current_nav - prev_nav
+                change_percent = (change / prev_nav) * 100 if prev_nav > 0 else 0
+            
+            # Performance returns as CAGR (Compound Annual Growth Rate) over
+            # ~252 trading days a year:
+            # CAGR = ((Ending Value / Beginning Value)^(1/Years) - 1) × 100
+            performance = {}
+            for years in (1, 3, 5, 10):
+                lag = 252 * years
+                past_nav = float(navs[-1 - lag]) if len(navs) > lag else 0
+                performance[f'return_{years}y'] = (
+                    ((current_nav / past_nav) ** (1 / years) - 1) * 100 if past_nav > 0 else None
+                )
+            
+            return {
+                'scheme_code': scheme_code,
+                'scheme_name': meta.get('scheme_name', ''),
+                'nav': current_nav,
+                'prev_nav': prev_nav,
+                'date': pd.Timestamp(history["dates"][-1]).strftime("%d-%m-%Y"),
+                'change': change,
+                'change_percent': change_percent,
+                'fund_house': meta.get('fund_house', ''),
+                'scheme_type': meta.get('scheme_type', ''),
+                'scheme_category': meta.get('scheme_category', ''),
+                'return_1y': performance.get('return_1y'),
+                'return_3y': performance.get('return_3y'),
+                'return_5y': performance.get('return_5y'),
+                'return_10y': performance.get('return_10y')
+            }
             
         except Exception as e:
             logger.error(f"Error fetching NAV for {scheme_code}: {str(e)}")
             return None
     
     @staticmethod
-    def get_historical_nav(scheme_code: str, days: int = 365) -> Optional[List[Dict]]:
+    def get_historical_nav(scheme_code: str, days: Optional[int] = 365) -> Optional[List[Dict]]:
         """
         Get historical NAV data for a mutual fund
         
         Args:
             scheme_code: Mutual fund scheme code
-            days: Number of days of history to fetch
+            days: Number of days of history to fetch (None for the full history)
             
         Returns:
             List of historical NAV data
@@ -150,6 +127,79 @@ class MutualFundPriceService:
             logger.error(f"Error fetching historical NAV for {scheme_code}: {str(e)}")
             return None
 
+    @staticmethod
+    def get_scheme_history(scheme_code: str) -> Optional[Dict]:
+        """
+        Get a scheme's full MFapi.in history, parsed and cached
+        
+        One download serves both the current NAV (get_fund_nav) and the
+        history arrays; entries are kept for MF_NAV_CACHE_TTL and dropped on
+        a new day.
+        
+        Args:
+            scheme_code: Mutual fund scheme code
+            
+        Returns:
+            dict: {"dates": datetime64[D], "navs": float64 (ascending by date),
+                   "meta": scheme metadata}, or None
+        """
+        now = datetime.now()
+        with _nav_history_cache_lock:
+            cached = _nav_history_cache.get(scheme_code)
+        if cached and cached["last_updated"].date() == now.date() and (now - cached["last_updated"]) < _NAV_HISTORY_TTL:
+            return cached["data"]
+        
+        try:
+            response = requests.get(f"https://api.mfapi.in/mf/{scheme_code}", timeout=10)
+            if response.status_code != 200:
+                return None
+            payload = response.json()
+        except Exception as e:
+            logger.error(f"Error fetching NAV history for {scheme_code}: {str(e)}")
+            return None
+        
+        history = (payload or {}).get('data')
+        if not history:
+            return None
+        
+        try:
+            dates = pd.to_datetime([entry['date'] for entry in history], format="%d-%m-%Y").values.astype('datetime64[D]')
+            navs = np.array([entry['nav'] for entry in history], dtype=np.float64)
+        except (KeyError, ValueError) as e:
+            logger.error(f"Error parsing NAV history for {scheme_code}: {str(e)}")
+            return None
+        
+        order = np.argsort(dates, kind='stable')
+        data = {"dates": dates[order], "navs": navs[order], "meta": payload.get('meta') or {}}
+        with _nav_history_cache_lock:
+            # Drop histories from previous days or past their TTL
+            expired = [k for k, v in _nav_history_cache.items()
+                       if v["last_updated"].date() != now.date() or (now - v["last_updated"]) >= _NAV_HISTORY_TTL]
+            for k in expired:
+                del _nav_history_cache[k]
+            _nav_history_cache[scheme_code] = {"data": data, "last_updated": now}
+        return data
+
+    @staticmethod
+    def get_nav_history_arrays(scheme_code: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        Get the full NAV history of a scheme as ascending NumPy arrays
+        
+        Served from the shared scheme history cache (see get_scheme_history),
+        so repeated valuations (e.g. SIP expansion) don't re-download or
+        re-parse.
+        
+        Args:
+            scheme_code: Mutual fund scheme code
+            
+        Returns:
+            tuple: (datetime64[D] dates, float64 NAVs) sorted by date, or None
+        """
+        history = MutualFundPriceService.get_scheme_history(scheme_code)
+        if not history:
+            return None
+        return history["dates"], history["navs"]
+
     @staticmethod
     def get_nav_on_date(scheme_code: str, target_date: str) -> Optional[float]:
         """
@@ -325,21 +375,107 @@ class MutualFundPriceService:
             return None
     
     @staticmethod
-    def get_multiple_fund_navs(scheme_codes: List[str]) -> Dict[str, Dict]:
+    def _nav_cache_key(scheme_code: str) -> Tuple[str, str]:
+        """Cache key for a scheme's current NAV: (scheme_code, IST NAV date)"""
+        nav_date = datetime.now(pytz.timezone('Asia/Kolkata')).date().isoformat()
+        return str(scheme_code).strip(), nav_date
+    
+    @staticmethod
+    def get_cached_fund_nav(scheme_code: str) -> Optional[Dict]:
+        """Get NAV data from the shared cache if it is still fresh"""
+        key = MutualFundPriceService._nav_cache_key(scheme_code)
+        with _nav_cache_lock:
+            entry = _nav_cache.get(key)
+        if entry and (datetime.now() - entry["last_updated"]).total_seconds() < config.MF_NAV_CACHE_TTL:
+            return entry["data"]
+        return None
+    
+    @staticmethod
+    def get_fund_nav_cached(scheme_code: str) -> Optional[Dict]:
+        """
+        Get current NAV data through the shared TTL cache
+        
+        Entries are keyed by scheme code and NAV date, so a repeat view
+        on the same day doesn't hit MFapi.in again.
+        
+        Args:
+            scheme_code: Mutual fund scheme code
+            
+        Returns:
+            Dict with NAV data (see get_fund_nav), or None
+        """
+        cached = MutualFundPriceService.get_cached_fund_nav(scheme_code)
+        if cached is not None:
+            return cached
+        
+        nav_data = MutualFundPriceService.get_fund_nav(scheme_code)
+        if nav_data:
+            now = datetime.now()
+            key = MutualFundPriceService._nav_cache_key(scheme_code)
+            with _nav_cache_lock:
+                # Drop entries from previous NAV dates or past their TTL
+                expired = [k for k, v in _nav_cache.items()
+                           if k[1] != key[1] or (now - v["last_updated"]).total_seconds() >= config.MF_NAV_CACHE_TTL]
+                for k in expired:
+                    del _nav_cache[k]
+                _nav_cache[key] = {"data": nav_data, "last_updated": now}
+        return nav_data
+    
+    @staticmethod
+    def get_multiple_fund_navs(scheme_codes: List[str], deadline: Optional[float] = None) -> Dict[str, Dict]:
         """
         Get NAV data for multiple funds
         
+        Cached NAVs are returned immediately; the rest are fetched concurrently.
+        With a deadline, funds that haven't arrived in time are left out of the
+        result (their fetch still completes in the background and fills the cache).
+        
         Args:
             scheme_codes: List of scheme codes
+            deadline: Max seconds to wait for uncached funds (None waits for all)
             
         Returns:
             Dict mapping scheme_code to NAV data
         """
         results = {}
+        missing = []
+        
+        for code in dict.fromkeys(scheme_codes):
+            cached = MutualFundPriceService.get_cached_fund_nav(code)
+            if cached is not None:
+                results[code] = cached
+            else:
+                missing.append(code)
+        
+        if not missing:
+            return results
+        
+        try:
+            executor = concurrent.futures.ThreadPoolExecutor(max_workers=min(config.MAX_WORKERS, len(missing)))
+        except RuntimeError as e:
+            # Fallback to sequential if parallel execution fails (e.g., during Flask reload)
+            logger.warning(f"Parallel execution failed, falling back to sequential: {e}")
+            for code in missing:
+                nav_data = MutualFundPriceService.get_fund_nav_cached(code)
+                if nav_data:
+                    results[code] = nav_data
+            return results
+        
+        future_to_code = {executor.submit(MutualFundPriceService.get_fund_nav_cached, code): code for code in missing}
+        done, not_done = concurrent.futures.wait(future_to_code, timeout=deadline)
+        executor.shutdown(wait=False)
+        
+        for future in done:
+            code = future_to_code[future]
+            try:
+                nav_data = future.result()
+                if nav_data:
+                    results[code] = nav_data
+            except Exception as exc:
+                logger.error(f"Scheme {code} generated an exception: {exc}")
         
-        for code in scheme_codes:
-            nav_data = MutualFundPriceService.get_fund_nav(code)
-            if nav_data:
-                results[code] = nav_data
+        if not_done:
+            logger.warning(f"NAV fetch deadline of {deadline}s hit, skipping {len(not_done)} schemes: "
+                           f"{[future_to_code[f] for f in not_done]}")
         
         return results
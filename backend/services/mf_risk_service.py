@@ -0,0 +1,248 @@
+"""
+Mutual Fund Risk Service
+Vectorized risk analytics (volatility, Sharpe, Sortino, drawdown, beta/alpha)
+over the full daily NAV history of a portfolio's funds
+"""
+
+import logging
+import threading
+import warnings
+import concurrent.futures
+from datetime import datetime
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+import pytz
+from config import get_config
+from services.mf_price_service import MutualFundPriceService
+from services.mf_portfolio_service import MFPortfolioService
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.07  # Annual, same assumption as the equity analytics
+
+# Risk results ((scheme codes, weights, NAV date) -> result)
+_risk_cache = {}
+_risk_cache_lock = threading.Lock()
+
+class MFRiskService:
+    """Service for batched MF risk metrics"""
+
+    @staticmethod
+    def build_nav_matrix(scheme_codes: List[str]) -> Optional[pd.DataFrame]:
+        """
+        Align the full NAV histories of several funds on one date index
+
+        Histories are fetched concurrently (and cached by the price service).
+        Each fund is forward-filled after its first NAV and NaN before it.
+
+        Returns:
+            DataFrame: dates x scheme codes of NAVs, or None if nothing is available
+        """
+        histories = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=min(config.MAX_WORKERS, max(1, len(scheme_codes)))) as executor:
+            future_to_code = {executor.submit(MutualFundPriceService.get_nav_history_arrays, code): code for code in scheme_codes}
+            for future in concurrent.futures.as_completed(future_to_code):
+                code = future_to_code[future]
+                try:
+                    history = future.result()
+                    if history is not None and len(history[0]) > 1:
+                        histories[code] = pd.Series(history[1], index=pd.DatetimeIndex(history[0]))
+                except Exception as exc:
+                    logger.error(f"Scheme {code} NAV history error: {exc}")
+
+        if not histories:
+            return None
+
+        # Keep the caller's column order for the funds that have history
+        navs = pd.DataFrame({code: histories[code] for code in scheme_codes if code in histories})
+        return navs.sort_index().ffill()
+
+    @staticmethod
+    def compute_metrics(dates: np.ndarray, levels: np.ndarray, bench_levels: Optional[np.ndarray] = None) -> Dict[str, np.ndarray]:
+        """
+        Compute risk metrics for every column of a level matrix in one pass
+
+        Args:
+            dates: datetime64[D] array (T,)
+            levels: NAV/index levels (T, K), NaN where a series hasn't started
+            bench_levels: Benchmark levels aligned with dates (T,), optional
+
+        Returns:
+            dict: metric name -> array of shape (K,) (NaN where undefined)
+        """
+        rf_daily = RISK_FREE_RATE / TRADING_DAYS
+
+        # Columns without data legitimately produce all-NaN slices
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+            returns = levels[1:] / levels[:-1] - 1
+            valid = ~np.isnan(returns)
+            n = valid.sum(axis=0)
+
+            mean = np.nanmean(returns, axis=0)
+            std = np.nanstd(returns, axis=0, ddof=1)
+            volatility = std * np.sqrt(TRADING_DAYS)
+            sharpe = (mean - rf_daily) / std * np.sqrt(TRADING_DAYS)
+
+            downside = np.where(valid, np.minimum(returns - rf_daily, 0.0), np.nan)
+            downside_dev = np.sqrt(np.nanmean(downside ** 2, axis=0))
+            sortino = (mean - rf_daily) / downside_dev * np.sqrt(TRADING_DAYS)
+
+            # Drawdowns: running peak ignores the NaN lead-in of late-starting series
+            peak = np.fmax.accumulate(levels, axis=0)
+            drawdown = levels / peak - 1
+            has_data = ~np.all(np.isnan(drawdown), axis=0)
+            trough = np.nanargmin(np.where(has_data, drawdown, 0.0), axis=0)
+            max_drawdown = np.where(has_data, drawdown[trough, np.arange(levels.shape[1])], np.nan)
+
+            t = np.arange(levels.shape[0])[:, None]
+            at_peak = (drawdown == 0) & (t <= trough)
+            peak_idx = levels.shape[0] - 1 - np.argmax(at_peak[::-1], axis=0)
+            peak_level = peak[trough, np.arange(levels.shape[1])]
+            recovered = (levels >= peak_level) & (t > trough)
+            is_recovered = recovered.any(axis=0)
+            recovery_idx = np.argmax(recovered, axis=0)
+
+            day_numbers = dates.astype(np.int64)
+            drawdown_days = day_numbers[trough] - day_numbers[peak_idx]
+            recovery_days = np.where(is_recovered, day_numbers[recovery_idx] - day_numbers[trough], -1)
+
+            metrics = {
+                "observations": n,
+                "volatility": volatility,
+                "sharpe_ratio": sharpe,
+                "sortino_ratio": sortino,
+                "max_drawdown": max_drawdown,
+                "drawdown_days": np.where(has_data, drawdown_days, -1),
+                "recovery_days": np.where(has_data, recovery_days, -1)
+            }
+
+            if bench_levels is not None:
+                bench_returns = bench_levels[1:] / bench_levels[:-1] - 1
+                both = valid & ~np.isnan(bench_returns)[:, None]
+                m = both.sum(axis=0)
+                r = np.where(both, returns, 0.0)
+                b = np.where(both, bench_returns[:, None], 0.0)
+                mean_r = r.sum(axis=0) / m
+                mean_b = b.sum(axis=0) / m
+                cov = ((r - mean_r) * (b - mean_b) * both).sum(axis=0) / (m - 1)
+                var_b = (((b - mean_b) ** 2) * both).sum(axis=0) / (m - 1)
+                beta = cov / var_b
+                metrics["beta"] = beta
+                # Jensen's alpha, annualized
+                metrics["alpha"] = ((mean_r - rf_daily) - beta * (mean_b - rf_daily)) * TRADING_DAYS
+
+        return metrics
+
+    @staticmethod
+    def analyze(scheme_codes: List[str], weights: Optional[List[float]] = None) -> Optional[Dict]:
+        """
+        Per-fund and (optionally) weighted portfolio risk metrics, cached per NAV date
+
+        Args:
+            scheme_codes: Funds to analyze
+            weights: Optional holding values or weights aligned with scheme_codes
+
+        Returns:
+            dict: {"funds": {code: metrics}, "portfolio": metrics or None, ...}, or None
+        """
+        nav_date = datetime.now(pytz.timezone('Asia/Kolkata')).date().isoformat()
+        weight_key = tuple(round(float(w), 2) for w in weights) if weights is not None else None
+        key = (tuple(scheme_codes), weight_key, nav_date)
+
+        with _risk_cache_lock:
+            if key in _risk_cache:
+                return _risk_cache[key]
+
+        navs = MFRiskService.build_nav_matrix(scheme_codes)
+        if navs is None:
+            return None
+
+        codes = list(navs.columns)
+        dates = navs.index.values.astype('datetime64[D]')
+        levels = navs.to_numpy(dtype=np.float64)
+
+        if weights is not None:
+            w = np.array([float(weights[scheme_codes.index(c)]) for c in codes])
+            if w.sum() > 0:
+                # Portfolio daily return: weights renormalized over funds that have started
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    fund_returns = levels[1:] / levels[:-1] - 1
+                    live = ~np.isnan(fund_returns)
+                    port_returns = np.nansum(fund_returns * w, axis=1) / (live * w).sum(axis=1)
+                port_levels = np.concatenate([[1.0], np.cumprod(1 + np.nan_to_num(port_returns))])
+                # The portfolio series starts with its first fund
+                started = ~np.isnan(port_returns)
+                if started.any():
+                    port_levels[:np.argmax(started)] = np.nan
+                levels = np.column_stack([levels, port_levels])
+
+        bench_levels = None
+        try:
+            bench = MFPortfolioService._get_nifty_closes()
+            if bench is not None:
+                idx = np.searchsorted(bench[0], dates, side='right') - 1
+                bench_levels = np.where(idx >= 0, bench[1][np.maximum(idx, 0)], np.nan)
+        except Exception as e:
+            logger.warning(f"Nifty benchmark unavailable for MF risk metrics: {e}")
+
+        metrics = MFRiskService.compute_metrics(dates, levels, bench_levels)
+
+        def column(k):
+            result = {}
+            for name, values in metrics.items():
+                value = values[k]
+                if name in ("observations", "drawdown_days", "recovery_days"):
+                    result[name] = int(value) if value >= 0 else None
+                else:
+                    result[name] = float(round(value, 4)) if np.isfinite(value) else None
+            return result
+
+        result = {
+            "as_of": str(dates[-1]),
+            "start_date": str(dates[0]),
+            "risk_free_rate": RISK_FREE_RATE,
+            "benchmark": "^NSEI" if bench_levels is not None else None,
+            "funds": {code: column(i) for i, code in enumerate(codes)},
+            "portfolio": column(len(codes)) if levels.shape[1] > len(codes) else None
+        }
+
+        with _risk_cache_lock:
+            # Only today's NAV date is worth keeping
+            for k in [k for k in _risk_cache if k[2] != nav_date]:
+                del _risk_cache[k]
+            _risk_cache[key] = result
+
+        return result
+
+    @staticmethod
+    def get_portfolio_risk(user_email: str, portfolio_id: str) -> Dict:
+        """
+        Risk metrics for an MF portfolio, weighted by current holding values
+
+        Returns:
+            dict: {"success": ..., "risk": ...}
+        """
+        try:
+            snapshot = MFPortfolioService.get_portfolio_snapshot(user_email, portfolio_id)
+            if not snapshot["positions"]:
+                return {"success": True, "risk": None}
+
+            values = {}
+            for p in snapshot["positions"]:
+                code = p.get("scheme_code")
+                if code:
+                    values[code] = values.get(code, 0) + p.get("current_value", 0)
+
+            codes = sorted(values)
+            risk = MFRiskService.analyze(codes, [values[c] for c in codes])
+            if risk is None:
+                return {"success": False, "error": "NAV history not available for portfolio funds", "risk": None}
+
+            return {"success": True, "risk": risk}
+        except Exception as e:
+            logger.error(f"Error in MF portfolio risk analysis: {str(e)}")
+            return {"success": False, "error": str(e), "risk": None}
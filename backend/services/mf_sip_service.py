@@ -0,0 +1,232 @@
+"""
+Mutual Fund SIP Service
+Manages SIP schedules and expands them lazily into installment cashflows
+"""
+
+import logging
+from datetime import date
+from typing import Dict, Optional, Tuple
+import numpy as np
+from models.mf_sip import MFSip
+from services.mf_price_service import MutualFundPriceService
+
+logger = logging.getLogger(__name__)
+
+class MFSipService:
+    """Service for SIP schedules (installments are generated, never stored)"""
+
+    @staticmethod
+    def expand_schedule(sip: Dict, until: Optional[date] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Expand a SIP schedule into installment dates and amounts
+
+        One installment per month on day_of_month (clipped to the month's
+        length), between start_date and the earlier of end_date and `until`.
+        The amount grows by step_up_percent after every 12 installments.
+
+        Args:
+            sip: SIP document
+            until: Last date to expand to (default: today)
+
+        Returns:
+            tuple: (datetime64[D] dates, float64 amounts)
+        """
+        start = np.datetime64(str(sip["start_date"])[:10], 'D')
+        end = np.datetime64(until or date.today(), 'D')
+        if sip.get("end_date"):
+            end = min(end, np.datetime64(str(sip["end_date"])[:10], 'D'))
+
+        if end < start:
+            return np.array([], dtype='datetime64[D]'), np.array([], dtype=np.float64)
+
+        months = np.arange(start.astype('datetime64[M]'), end.astype('datetime64[M]') + 1)
+        month_start = months.astype('datetime64[D]')
+        month_len = ((months + 1).astype('datetime64[D]') - month_start).astype(np.int64)
+        day = np.minimum(int(sip.get("day_of_month", 1)), month_len)
+        dates = month_start + (day - 1)
+        dates = dates[(dates >= start) & (dates <= end)]
+
+        step_up = 1 + float(sip.get("step_up_percent", 0) or 0) / 100
+        amounts = float(sip["amount"]) * step_up ** (np.arange(len(dates)) // 12)
+
+        return dates, amounts
+
+    @staticmethod
+    def expand_installments(sip: Dict, nav_history: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+                            until: Optional[date] = None) -> Optional[Dict]:
+        """
+        Expand a SIP into installments with allotted NAVs and units
+
+        Each installment is allotted at the first NAV on or after its date
+        (the next business day for holidays), matched for the whole schedule
+        in one searchsorted. Installments newer than the latest published NAV
+        use the latest NAV.
+
+        Args:
+            sip: SIP document
+            nav_history: Optional (dates, navs) arrays; fetched if not given
+            until: Last date to expand to (default: today)
+
+        Returns:
+            dict: Parallel arrays (dates, amounts, navs, units) plus latest_nav
+                  and prev_nav, or None if no NAV history is available
+        """
+        if nav_history is None:
+            nav_history = MutualFundPriceService.get_nav_history_arrays(sip["scheme_code"])
+        if nav_history is None or len(nav_history[0]) == 0:
+            logger.warning(f"No NAV history for SIP {sip.get('sip_id')} ({sip.get('scheme_code')})")
+            return None
+
+        nav_dates, navs = nav_history
+        dates, amounts = MFSipService.expand_schedule(sip, until)
+
+        idx = np.minimum(np.searchsorted(nav_dates, dates, side='left'), len(navs) - 1)
+        allotted_navs = navs[idx]
+
+        return {
+            "dates": dates,
+            "amounts": amounts,
+            "navs": allotted_navs,
+            "units": amounts / allotted_navs,
+            "latest_nav": float(navs[-1]),
+            "prev_nav": float(navs[-2]) if len(navs) > 1 else float(navs[-1])
+        }
+
+    @staticmethod
+    def get_installments(user_email: str, sip_id: str) -> Tuple[bool, str, Optional[Dict]]:
+        """
+        Get the generated installments of a SIP
+
+        Returns:
+            tuple: (success, message, data)
+        """
+        try:
+            sip = MFSip.get_sip_by_id(user_email, sip_id)
+            if not sip:
+                return False, "SIP not found", None
+
+            expanded = MFSipService.expand_installments(sip)
+            if expanded is None:
+                return False, f"NAV history not available for {sip['scheme_code']}", None
+
+            installments = [
+                {"date": str(d), "amount": float(a), "nav": float(n), "units": float(u)}
+                for d, a, n, u in zip(expanded["dates"], expanded["amounts"], expanded["navs"], expanded["units"])
+            ]
+
+            return True, "Installments generated", {
+                "sip": sip,
+                "installment_count": len(installments),
+                "invested_amount": float(expanded["amounts"].sum()),
+                "units": float(expanded["units"].sum()),
+                "installments": installments
+            }
+        except Exception as e:
+            logger.error(f"Error expanding SIP: {str(e)}")
+            return False, f"Error expanding SIP: {str(e)}", None
+
+    @staticmethod
+    def add_sip(user_email: str, portfolio_id: str, sip_data: Dict) -> Tuple[bool, str, Optional[Dict]]:
+        """
+        Add a new SIP schedule to a portfolio
+
+        Args:
+            user_email: User's email
+            portfolio_id: Portfolio ID
+            sip_data: SIP details (scheme_code, amount, day_of_month, start_date,
+                      optional end_date and step_up_percent)
+
+        Returns:
+            tuple: (success, message, sip_doc)
+        """
+        try:
+            required_fields = ["scheme_code", "amount", "day_of_month", "start_date"]
+            for field in required_fields:
+                if field not in sip_data:
+                    return False, f"Missing required field: {field}", None
+
+            error = MFSipService._validate(sip_data)
+            if error:
+                return False, error, None
+
+            scheme_code = str(sip_data.get("scheme_code")).strip()
+            fund_data = MutualFundPriceService.get_fund_nav(scheme_code)
+            if not fund_data:
+                return False, f"Invalid scheme code: {scheme_code}", None
+
+            sip_doc = {
+                **sip_data,
+                "user_email": user_email,
+                "portfolio_id": portfolio_id,
+                "scheme_code": scheme_code,
+                "scheme_name": fund_data.get("scheme_name", "")
+            }
+
+            created_sip = MFSip.create_sip(sip_doc)
+            return True, "SIP added successfully", created_sip
+
+        except Exception as e:
+            logger.error(f"Error adding SIP: {str(e)}")
+            return False, f"Error adding SIP: {str(e)}", None
+
+    @staticmethod
+    def update_sip(user_email: str, sip_id: str, update_data: Dict) -> Tuple[bool, str, Optional[Dict]]:
+        """Update an existing SIP schedule"""
+        try:
+            existing = MFSip.get_sip_by_id(user_email, sip_id)
+            if not existing:
+                return False, "SIP not found", None
+
+            error = MFSipService._validate({**existing, **update_data})
+            if error:
+                return False, error, None
+
+            allowed = {"amount", "day_of_month", "start_date", "end_date", "step_up_percent"}
+            updates = {k: v for k, v in update_data.items() if k in allowed}
+            for field, cast in (("amount", float), ("day_of_month", int), ("step_up_percent", float)):
+                if field in updates:
+                    updates[field] = cast(updates[field] or 0)
+
+            updated_sip = MFSip.update_sip(user_email, sip_id, updates)
+            if updated_sip:
+                return True, "SIP updated successfully", updated_sip
+            else:
+                return False, "Failed to update SIP", None
+
+        except Exception as e:
+            logger.error(f"Error updating SIP: {str(e)}")
+            return False, f"Error updating SIP: {str(e)}", None
+
+    @staticmethod
+    def delete_sip(user_email: str, sip_id: str) -> Tuple[bool, str, Optional[Dict]]:
+        """Delete a SIP schedule"""
+        try:
+            deleted_sip = MFSip.delete_sip(user_email, sip_id)
+
+            if deleted_sip:
+                return True, "SIP deleted successfully", deleted_sip
+            else:
+                return False, "SIP not found", None
+
+        except Exception as e:
+            logger.error(f"Error deleting SIP: {str(e)}")
+            return False, f"Error deleting SIP: {str(e)}", None
+
+    @staticmethod
+    def _validate(sip_data: Dict) -> Optional[str]:
+        """Validate SIP fields, returning an error message or None"""
+        try:
+            if float(sip_data.get("amount", 0)) <= 0:
+                return "amount must be greater than 0"
+            if not 1 <= int(sip_data.get("day_of_month", 0)) <= 31:
+                return "day_of_month must be between 1 and 31"
+            if float(sip_data.get("step_up_percent", 0) or 0) < 0:
+                return "step_up_percent cannot be negative"
+            start = date.fromisoformat(str(sip_data.get("start_date"))[:10])
+            if sip_data.get("end_date"):
+                end = date.fromisoformat(str(sip_data["end_date"])[:10])
+                if end < start:
+                    return "end_date cannot be before start_date"
+        except (TypeError, ValueError):
+            return "Invalid SIP fields: amount, day_of_month and dates (YYYY-MM-DD) are required"
+        return None
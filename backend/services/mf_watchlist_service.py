@@ -5,9 +5,11 @@ Manage user's mutual fund watchlists
 
 from models.mf_watchlist import MFWatchlist
 from services.mf_price_service import MutualFundPriceService
+from config import get_config
 import logging
 
 logger = logging.getLogger(__name__)
+config = get_config()
 
 class MFWatchlistService:
     """Service for managing mutual fund watchlists"""
@@ -41,10 +43,14 @@ class MFWatchlistService:
             
             scheme_codes = MFWatchlist.get_user_watchlist(email, watchlist_id)
             
-            # Get fund details for each scheme
+            # Get fund details for all schemes concurrently (cached per NAV date)
+            nav_map = MutualFundPriceService.get_multiple_fund_navs(
+                scheme_codes, deadline=config.MF_NAV_FETCH_DEADLINE
+            )
+            
             watchlist_with_details = []
             for code in scheme_codes:
-                fund_info = MutualFundPriceService.get_fund_nav(code)
+                fund_info = nav_map.get(code)
                 if fund_info:
                     # Include all fields from fund_info
                     watchlist_with_details.append({
@@ -101,7 +107,7 @@ class MFWatchlistService:
             scheme_code = str(scheme_code).strip()
             
             # Validate scheme exists by fetching NAV
-            fund_data = MutualFundPriceService.get_fund_nav(scheme_code)
+            fund_data = MutualFundPriceService.get_fund_nav_cached(scheme_code)
             if not fund_data or not fund_data.get('nav'):
                 return False, f"Mutual fund scheme '{scheme_code}' not found or invalid", None
             
@@ -193,7 +199,9 @@ class MFWatchlistService:
                 return True, "Watchlist is empty", {}
             
             # Fetch NAVs for all funds
-            nav_data = MutualFundPriceService.get_multiple_fund_navs(scheme_codes)
+            nav_data = MutualFundPriceService.get_multiple_fund_navs(
+                scheme_codes, deadline=config.MF_NAV_FETCH_DEADLINE
+            )
             
             return True, "NAVs retrieved successfully", nav_data
         
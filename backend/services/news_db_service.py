@@ -4,53 +4,124 @@ Reads pre-fetched news from MongoDB (populated by cron scraper)
 Fast, reliable alternative to live scraping
 """
 
+import base64
 from datetime import datetime, timedelta
 from typing import List, Dict, Optional, Tuple
-from utils.db import get_news_collection
+from utils.db import get_news_collection, get_news_articles_collection
 import logging
 
 logger = logging.getLogger(__name__)
 
+EPOCH = datetime(1970, 1, 1)
+
+# Fields returned for an article
+ARTICLE_PROJECTION = {'_id': 0, 'url_hash': 1, 'title': 1, 'content': 1, 'lead': 1, 'source': 1, 'url': 1,
+                      'published_at': 1, 'story_id': 1}
+
+
+def encode_cursor(published_at: datetime, url_hash: str) -> str:
+    """Opaque pagination cursor for the last article of a page"""
+    millis = int((published_at.replace(tzinfo=None) - EPOCH).total_seconds() * 1000)
+    raw = f"{millis}:{url_hash}"
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[datetime, str]:
+    """
+    Decode a pagination cursor
+    
+    Raises:
+        ValueError: If the cursor is malformed
+    """
+    try:
+        millis, url_hash = base64.urlsafe_b64decode(cursor.encode()).decode().split(':', 1)
+        return EPOCH + timedelta(milliseconds=int(millis)), url_hash
+    except Exception:
+        raise ValueError("Invalid cursor")
+
 
 class NewsDBService:
     """Service for reading pre-fetched news from MongoDB"""
     
     @staticmethod
-    def get_news_for_ticker(ticker: str, days: Optional[int] = None, max_articles: int = 20) -> Tuple[bool, str, Optional[List[Dict]]]:
+    def _article_query(ticker: str, days: Optional[int] = None, cursor: Optional[str] = None,
+                       collapse: bool = True) -> Dict:
+        """
+        Indexed query for a ticker's articles (tickers + published_at index)
+        
+        Pages are ordered by (published_at, url_hash) descending; a cursor
+        resumes strictly after the last article of the previous page. With
+        collapse, near-duplicate copies of a story are left out and only its
+        canonical article (the first one ingested) is returned.
+        """
+        query = {'tickers': ticker.upper()}
+        if collapse:
+            query['is_duplicate'] = {'$ne': True}
+        if days:
+            query['published_at'] = {'$gte': datetime.utcnow() - timedelta(days=int(days))}
+        if cursor:
+            published_at, url_hash = decode_cursor(cursor)
+            query['$or'] = [
+                {'published_at': {'$lt': published_at}},
+                {'published_at': published_at, 'url_hash': {'$lt': url_hash}}
+            ]
+        return query
+    
+    @staticmethod
+    def _format_article(article: Dict) -> Dict:
+        """API shape of a stored article"""
+        published_at = article.get('published_at')
+        return {
+            'title': article.get('title', ''),
+            'content': article.get('lead') or article.get('content', ''),  # Extracted text when the cron has it
+            'source': article.get('source', ''),
+            'url': article.get('url', ''),
+            'published_at': published_at.isoformat() + 'Z' if isinstance(published_at, datetime) else (published_at or ''),
+            'story_id': article.get('story_id') or article.get('url_hash'),
+            'premium': False  # Pre-fetched news is free
+        }
+    
+    @staticmethod
+    def get_news_for_ticker(ticker: str, days: Optional[int] = None, max_articles: int = 20,
+                            cursor: Optional[str] = None, collapse: bool = True) -> Tuple[bool, str, Optional[List[Dict]]]:
         """
         Get pre-fetched news for a single ticker from MongoDB
         
         Args:
             ticker: Stock ticker symbol
             days: Filter articles from last N days (None = all articles)
-            max_articles: Maximum number of articles to return
+            max_articles: Maximum number of articles to return (page size)
+            cursor: next_cursor from a previous page
+            collapse: Return one article per story (skip near-duplicates)
         
         Returns:
-            tuple: (success: bool, message: str, data: list or None)
+            tuple: (success: bool, message: str, data: dict or None) where data is
+                   {'articles', 'metadata', 'next_cursor'}
         """
         try:
-            news_collection = get_news_collection()
-            
-            # Find news document for ticker
-            news_doc = news_collection.find_one({'ticker': ticker.upper()})
+            news_doc = get_news_collection().find_one(
+                {'ticker': ticker.upper()},
+                {'last_updated': 1, 'scrape_status': 1}
+            )
             
             if not news_doc:
                 return False, f"No pre-fetched news found for {ticker}", None
             
-            # Get articles
-            articles = news_doc.get('articles', [])
-            
-            logger.info(f"[NewsDBService] Found {len(articles)} articles in MongoDB for {ticker}")
-            
-            if not articles:
-                return True, f"No articles available for {ticker}", []
+            # One extra document tells whether another page exists
+            articles = list(
+                get_news_articles_collection()
+                .find(NewsDBService._article_query(ticker, days, cursor, collapse), ARTICLE_PROJECTION)
+                .sort([('published_at', -1), ('url_hash', -1)])
+                .limit(max_articles + 1)
+            )
             
-            # Skip date filtering - articles are already fresh from recent scrape
-            # The scraper only runs periodically, so all articles in MongoDB are recent
-            # Date filtering was causing issues with RFC 2822 format dates
+            next_cursor = None
+            if len(articles) > max_articles:
+                articles = articles[:max_articles]
+                last = articles[-1]
+                next_cursor = encode_cursor(last['published_at'], last['url_hash'])
             
-            # Limit articles
-            articles = articles[:max_articles]
+            logger.info(f"[NewsDBService] Found {len(articles)} articles in MongoDB for {ticker}")
             
             # Add metadata
             metadata = {
@@ -60,23 +131,14 @@ class NewsDBService:
                 'data_age_minutes': NewsDBService._calculate_data_age(news_doc.get('last_updated'))
             }
             
-            # Format response
-            formatted_articles = []
-            for article in articles:
-                formatted_articles.append({
-                    'title': article.get('title', ''),
-                    'content': article.get('content', ''),
-                    'source': article.get('source', ''),
-                    'url': article.get('url', ''),
-                    'published_at': article.get('published_date', ''),
-                    'premium': False  # Pre-fetched news is free
-                })
-            
-            return True, f"Found {len(formatted_articles)} articles", {
-                'articles': formatted_articles,
-                'metadata': metadata
+            return True, f"Found {len(articles)} articles", {
+                'articles': [NewsDBService._format_article(a) for a in articles],
+                'metadata': metadata,
+                'next_cursor': next_cursor
             }
         
+        except ValueError as e:
+            return False, str(e), None
         except Exception as e:
             logger.error(f"Error fetching news for {ticker}: {e}")
             return False, f"Error fetching news: {str(e)}", None
@@ -86,6 +148,9 @@ class NewsDBService:
         """
         Get pre-fetched news for multiple tickers (batch operation)
         
+        Each ticker is one indexed range query limited to max_articles, so
+        only the returned articles are read.
+        
         Args:
             tickers: List of stock ticker symbols
             days: Filter articles from last N days (None = all articles)
@@ -97,43 +162,16 @@ class NewsDBService:
         news_data = {}
         
         try:
-            news_collection = get_news_collection()
-            
-            # Batch fetch all tickers
-            ticker_list = [t.upper() for t in tickers]
-            news_docs = news_collection.find({'ticker': {'$in': ticker_list}})
-            
-            # Create lookup map
-            news_map = {doc['ticker']: doc for doc in news_docs}
-            
-            # Process each ticker
-            for ticker in ticker_list:
-                news_doc = news_map.get(ticker)
-                
-                if not news_doc:
-                    news_data[ticker] = []
-                    continue
-                
-                articles = news_doc.get('articles', [])
-                
-                # Skip date filtering - return all cached articles
-                # Articles are already fresh from recent scraper run
-                
-                # Limit and format articles
-                articles = articles[:max_articles]
-                formatted_articles = []
-                
-                for article in articles:
-                    formatted_articles.append({
-                        'title': article.get('title', ''),
-                        'content': article.get('content', ''),
-                        'source': article.get('source', ''),
-                        'url': article.get('url', ''),
-                        'published_at': article.get('published_date', ''),
-                        'premium': False
-                    })
-                
-                news_data[ticker] = formatted_articles
+            articles_collection = get_news_articles_collection()
+            
+            for ticker in [t.upper() for t in tickers]:
+                articles = (
+                    articles_collection
+                    .find(NewsDBService._article_query(ticker, days), ARTICLE_PROJECTION)
+                    .sort([('published_at', -1), ('url_hash', -1)])
+                    .limit(max_articles)
+                )
+                news_data[ticker] = [NewsDBService._format_article(a) for a in articles]
         
         except Exception as e:
             logger.error(f"Error fetching news for multiple tickers: {e}")
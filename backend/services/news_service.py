@@ -20,7 +20,8 @@ class NewsService:
     
     @staticmethod
     def fetch_news(stock_name, ticker=None, include_global=True, include_indian=True, 
-                   max_articles=20, use_google_news=True, time_filter='week', sort_by='date', use_cached=True):
+                   max_articles=20, use_google_news=True, time_filter='week', sort_by='date', use_cached=True,
+                   days=None):
         """
         Fetch news for a single stock with MongoDB caching
         
@@ -34,48 +35,23 @@ class NewsService:
             time_filter: Time filter (hour, day, week, month, year, recent)
             sort_by: Sort option (date, relevance)
             use_cached: Use MongoDB cached data if available (default: True)
+            days: Only articles from the last N days (default: derived from time_filter)
         
         Returns:
             tuple: (success: bool, message: str, data: list or None)
         """
         try:
             # Strategy: Try MongoDB first (fast), fall back to live scraping if stale/missing
-            from services.news_db_service import NewsDBService
-            from utils.date_utils import map_time_filter_to_days
-            
             ticker_symbol = ticker if ticker else stock_name
-            days = map_time_filter_to_days(time_filter) if time_filter else None
+            if days is None:
+                days = map_time_filter_to_days(time_filter) if time_filter else None
             
             # Try MongoDB first if caching is enabled
             if use_cached:
-                success, message, data = NewsDBService.get_news_for_ticker(
-                    ticker_symbol,
-                    days=days,
-                    max_articles=max_articles
-                )
-                
-                print(f"[NEWS DEBUG] NewsDBService returned: success={success}, message={message}, data type={type(data)}")
-                if data:
-                    print(f"[NEWS DEBUG] Data keys: {data.keys() if isinstance(data, dict) else 'not a dict'}")
-                    if isinstance(data, dict):
-                        print(f"[NEWS DEBUG] Articles in data: {len(data.get('articles', []))}")
-                
-                if success and data:
-                    articles = data.get('articles', [])
-                    metadata = data.get('metadata', {})
-                    
-                    print(f"[NEWS DEBUG] Extracted {len(articles)} articles from data")
-                    
-                    # Check if data is fresh (less than 1 hour old)
-                    data_age = metadata.get('data_age_minutes', 999)
-                    
-                    if data_age < 60:  # Data is fresh
-                        print(f"[NEWS] Using cached data for {ticker_symbol} (age: {data_age} min)")
-                        return True, f"Found {len(articles)} cached articles", articles
-                    else:
-                        print(f"[NEWS] Cached data for {ticker_symbol} is stale ({data_age} min old), falling back to live scraping")
-                else:
-                    print(f"[NEWS] No cached data for {ticker_symbol}, falling back to live scraping")
+                page = NewsService._get_cached_page(ticker_symbol, days, max_articles)
+                if page is not None:
+                    articles = page['articles']
+                    return True, f"Found {len(articles)} cached articles", articles
             
             # Fall back to live scraping (original implementation)
             print(f"[NEWS] Live scraping for {ticker_symbol}...")
@@ -160,13 +136,91 @@ class NewsService:
         except Exception as e:
             return False, f"Error fetching news: {str(e)}", None
     
+    @staticmethod
+    def _get_cached_page(ticker_symbol, days=None, max_articles=20, cursor=None, collapse=True):
+        """
+        One page of fresh pre-fetched articles from MongoDB (one per story with collapse)
+        
+        Returns:
+            dict: {'articles', 'next_cursor'}, or None if the ticker has no
+                  pre-fetched news or it is more than an hour old
+        """
+        from services.news_db_service import NewsDBService
+        
+        success, message, data = NewsDBService.get_news_for_ticker(
+            ticker_symbol,
+            days=days,
+            max_articles=max_articles,
+            cursor=cursor,
+            collapse=collapse
+        )
+        
+        if not success or not data:
+            print(f"[NEWS] No cached data for {ticker_symbol} ({message}), falling back to live scraping")
+            return None
+        
+        # Check if data is fresh (less than 1 hour old); a cursor continues
+        # a page that was already served from MongoDB
+        data_age = data.get('metadata', {}).get('data_age_minutes')
+        if cursor is None and (data_age is None or data_age >= 60):
+            print(f"[NEWS] Cached data for {ticker_symbol} is stale ({data_age} min old), falling back to live scraping")
+            return None
+        
+        print(f"[NEWS] Using cached data for {ticker_symbol} (age: {data_age} min, {len(data['articles'])} articles)")
+        return {'articles': data['articles'], 'next_cursor': data.get('next_cursor')}
+    
+    @staticmethod
+    def fetch_news_page(stock_name, ticker=None, days=None, max_articles=20, cursor=None, collapse=True):
+        """
+        Fetch one page of news for the last N days
+        
+        Pre-fetched news is read with an indexed range query; pass the
+        returned next_cursor to get the following page. Live scraping
+        (stale or missing data) returns a single page without a cursor.
+        
+        Args:
+            stock_name: Company name or ticker
+            ticker: Stock ticker (optional)
+            days: Number of days to fetch news for (default: 2 days)
+            max_articles: Page size
+            cursor: next_cursor from a previous page
+            collapse: One article per story; False also returns near-duplicates
+        
+        Returns:
+            tuple: (success: bool, message: str, data: {'articles', 'next_cursor'} or None)
+        """
+        if days is None:
+            days = get_default_days()
+        
+        ticker_symbol = ticker if ticker else stock_name
+        page = NewsService._get_cached_page(ticker_symbol, days, max_articles, cursor, collapse)
+        if page is not None:
+            return True, f"Found {len(page['articles'])} articles", page
+        if cursor:
+            return False, "Cursor is invalid or has expired", None
+        
+        success, message, articles = NewsService.fetch_news(
+            stock_name, ticker, max_articles=max_articles, use_cached=False, days=days
+        )
+        if not success:
+            return success, message, None
+        return True, message, {'articles': articles, 'next_cursor': None}
+    
     @staticmethod
     def _deduplicate_articles(articles):
-        """Remove duplicate articles based on title similarity"""
+        """
+        Remove duplicate articles based on title similarity
+        
+        Exact normalized titles are dropped first; near-duplicates (the same
+        story syndicated with a reworded headline) are found with MinHash
+        over the title and lead text, keeping the first copy.
+        """
         import re
+        from utils.story_utils import NearDuplicateIndex, minhash_signature, shingles
         
         unique_articles = []
         seen_titles = set()
+        index = NearDuplicateIndex()
         
         for article in articles:
             title = article.get('title', '').lower().strip()
@@ -177,6 +231,11 @@ class NewsService:
             
             if normalized_title and normalized_title not in seen_titles:
                 seen_titles.add(normalized_title)
+                signature = minhash_signature(shingles(article.get('title', ''), article.get('content')))
+                if signature is not None:
+                    if index.match(signature) is not None:
+                        continue
+                    index.add(normalized_title, signature)
                 unique_articles.append(article)
         
         return unique_articles
@@ -211,7 +270,7 @@ class NewsService:
         return news_data
     
     @staticmethod
-    def fetch_news_by_days(stock_name, ticker=None, days=None):
+    def fetch_news_by_days(stock_name, ticker=None, days=None, max_articles=20):
         """
         Fetch news for the last N days using article published timestamps
         
@@ -219,26 +278,17 @@ class NewsService:
             stock_name: Company name or ticker
             ticker: Stock ticker (optional)
             days: Number of days to fetch news for (default: 2 days)
+            max_articles: Maximum number of articles to return
         
         Returns:
             tuple: (success: bool, message: str, data: list or None)
         """
         try:
-            # Use default days if not provided
-            if days is None:
-                days = get_default_days()
-            
-            # Fetch all available news (MongoDB cache or live scraping)
-            success, message, articles = NewsService.fetch_news(stock_name, ticker)
-            
+            success, message, page = NewsService.fetch_news_page(stock_name, ticker, days, max_articles)
             if not success:
-                return success, message, articles
-            
-            # Skip date filtering - articles from MongoDB are already fresh
-            # Live scraping fallback also returns recent articles
-            # The 'days' parameter is informational only
+                return success, message, None
             
-            return True, f"Found {len(articles)} articles", articles
+            return True, f"Found {len(page['articles'])} articles", page['articles']
         
         except Exception as e:
             return False, f"Error fetching news: {str(e)}", None
@@ -3,6 +3,8 @@ from datetime import datetime, date, timedelta
 from models.position import Position
 from dateutil.relativedelta import relativedelta
 import logging
+import numpy as np
+from utils.chart_utils import lttb_indices, compact_series
 
 logger = logging.getLogger(__name__)
 
@@ -70,10 +72,13 @@ class PerformanceService:
         return current_nifty
     
     @staticmethod
-    def get_performance_chart_data(user_email, portfolio_id=None):
+    def get_performance_chart_data(user_email, portfolio_id=None, compact=False, points=None):
         """
         Generate historical performance data showing actual portfolio value growth vs Nifty
         
+        With compact=True data is {"dates": [...], "series": {"portfolio", "nifty"}}
+        instead of a list of rows; points downsamples the series with LTTB.
+        
         Key concept:
         - For each transaction, we calculate how many Nifty units were bought at that time
         - At any evaluation date, we calculate what those units are worth at that date's Nifty price
@@ -208,6 +213,16 @@ class PerformanceService:
                     })
                 break
         
+        if points and len(data_points) > points:
+            values = np.array([[d["portfolio"], d["nifty"]] for d in data_points])
+            data_points = [data_points[i] for i in lttb_indices(values, points)]
+        
+        if compact:
+            data_points = compact_series(
+                [d["date"] for d in data_points],
+                {"portfolio": [d["portfolio"] for d in data_points], "nifty": [d["nifty"] for d in data_points]}
+            )
+        
         return {
             "success": True,
             "data": data_points
@@ -1,24 +1,41 @@
-import yfinance as yf
 import pandas as pd
 import numpy as np
+import warnings
 from datetime import datetime, timedelta
 import traceback
+from services.stock_metadata_service import StockMetadataService
+from services.indicator_service import IndicatorService
+from services.history_loader_service import HistoryLoaderService
+from utils.chart_utils import lttb_indices, compact_series, compact_matrix
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.07
 
 class PortfolioAnalysisService:
     """Service for advanced portfolio analytics and metrics"""
     
     @staticmethod
-    def calculate_portfolio_metrics(tickers):
+    def calculate_portfolio_metrics(tickers, positions=None, time_varying=False, compact=False, points=None):
         """
         Calculate comprehensive portfolio metrics
         
         Args:
             tickers: List of ticker symbols (e.g., ['RELIANCE.NS', 'TCS.NS'])
+            positions: Optional position lots (symbol, quantity, buy_date). When
+                given, metrics are weighted by the actual holdings instead of
+                equally across tickers
+            time_varying: With positions, weight each day by the lots held at
+                that date (from buy dates) instead of by current holdings
+            compact: Return the chart and correlation matrix column-oriented
+            points: Downsample the performance chart to this many points (LTTB)
             
         Returns:
             dict: Calculated metrics
         """
         try:
+            if positions:
+                tickers = [p.get('symbol') for p in positions]
+
             if not tickers:
                 return False, "No tickers provided", None
             
@@ -47,57 +64,9 @@ class PortfolioAnalysisService:
             end_date = datetime.now()
             start_date = end_date - timedelta(days=400) # Need extra days for SMA200
             
-            print(f"[ANALYTICS] Fetching data for {len(all_tickers)} tickers: {all_tickers}")
-            
-            # Download data - use auto_adjust for cleaner price data
-            try:
-                raw_data = yf.download(all_tickers, start=start_date, end=end_date, progress=False, group_by='column')
-                
-                if raw_data.empty:
-                    print(f"[ANALYTICS] ⚠️ yfinance batch download failed for {all_tickers}. Trying individual downloads...")
-                    # Fallback: Try downloading each ticker individually
-                    individual_data = {}
-                    for t in all_tickers:
-                        try:
-                            t_data = yf.download(t, start=start_date, end=end_date, progress=False)
-                            if not t_data.empty:
-                                if 'Close' in t_data.columns:
-                                    individual_data[t] = t_data['Close']
-                                else:
-                                    individual_data[t] = t_data.iloc[:, 0] # Take first column if 'Close' not found
-                        except Exception as t_err:
-                            print(f"[ANALYTICS] ❌ Failed to fetch {t}: {t_err}")
-                    
-                    if not individual_data:
-                         return False, "Failed to fetch market data for all tickers", None
-                    
-                    # More robust way to merge multiple Series with different indices
-                    data = pd.concat(individual_data, axis=1)
-                else:
-                    # Extract Close prices robustly
-                    if 'Close' in raw_data.columns:
-                        data = raw_data['Close']
-                    elif isinstance(raw_data.columns, pd.MultiIndex):
-                        # In some yf versions, Price type is level 0, Ticker is level 1
-                        if 'Close' in raw_data.columns.levels[0]:
-                            data = raw_data.xs('Close', axis=1, level=0)
-                        else:
-                            # Fallback: find any level that looks like 'Close'
-                            close_cols = [c for c in raw_data.columns if 'Close' in str(c)]
-                            if close_cols:
-                                data = raw_data[close_cols]
-                            else:
-                                return False, "Failed to locate 'Close' prices in market data", None
-                    else:
-                        # Maybe it returned a single ticker result
-                        if len(all_tickers) == 1:
-                            data = raw_data
-                        else:
-                            return False, "Unexpected market data format", None
-
-            except Exception as download_err:
-                print(f"[ANALYTICS] ❌ yfinance download error: {str(download_err)}")
-                return False, f"Market data Error: {str(download_err)}", None
+            success, message, data = PortfolioAnalysisService._download_closes(all_tickers, start_date, end_date)
+            if not success:
+                return False, message, None
             
             # Check if we have data
             if data is None or data.empty:
@@ -120,283 +89,451 @@ class PortfolioAnalysisService:
             if len(data) < 5:
                 return False, "Insufficient historical data for analysis", None
 
-            # Check if we have enough data (at least 1 year approx 252 days)
-            if len(data) < 10:
-                pass # Very little data, calculations might fail, but proceed with caution
-
-            # ---------------------------------------------------------
-            # 1. Performance Chart (Portfolio vs Benchmark) - Last 1 Year
-            # ---------------------------------------------------------
-            # Filter last 365 days for the chart
-            chart_start_date = end_date - timedelta(days=365)
-            chart_data_df = data[data.index >= chart_start_date].copy()
-            
-            # Calculate Daily Returns
-            # FutureWarning fix: fill_method=None
-            daily_returns = chart_data_df.pct_change(fill_method=None).dropna()
-            
             # Identify Benchmark Column
             bench_col = benchmark_ticker
-            if benchmark_ticker not in daily_returns.columns:
+            if benchmark_ticker not in data.columns:
                  # Fallback logic
-                 cols = [c for c in daily_returns.columns if 'NSEI' in str(c)]
+                 cols = [c for c in data.columns if 'NSEI' in str(c)]
                  bench_col = cols[0] if cols else None
 
-            # Portfolio Return (Equal Weighted)
-            # Filter out benchmark from portfolio assets
-            asset_cols = [c for c in daily_returns.columns if c != bench_col]
+            holdings = None
+            if positions:
+                norm_by_ticker = {ot: nt for nt, ot in ticker_map.items()}
+                if time_varying:
+                    holdings = PortfolioAnalysisService.build_lot_quantities(positions, data.index, norm_by_ticker)
+                else:
+                    holdings = {}
+                    for p in positions:
+                        norm = norm_by_ticker.get(str(p.get('symbol', '')).strip().upper())
+                        if norm:
+                            holdings[norm] = holdings.get(norm, 0.0) + float(p.get('quantity', 0) or 0)
+
+            try:
+                indicators = IndicatorService.get_indicators(data.columns)
+            except Exception as e:
+                print(f"[ANALYTICS] ⚠️ Stored indicators unavailable, computing from history: {e}")
+                indicators = None
+
+            analysis_data = PortfolioAnalysisService.compute_analytics(
+                data, ticker_map, bench_col, end_date, holdings, indicators,
+                compact=compact, points=points
+            )
+
+            # Sectors come from cached stock_mappings metadata (one indexed query)
+            sectors = StockMetadataService.get_sectors(tickers)
+            for asset in analysis_data["assets"]:
+                asset["sector"] = sectors.get(asset["ticker"], "Unknown")
             
-            if asset_cols:
-                portfolio_daily_ret = daily_returns[asset_cols].mean(axis=1)
-                portfolio_cum_ret = (1 + portfolio_daily_ret).cumprod() * 100
-            else:
-                portfolio_daily_ret = pd.Series(dtype=float)
-                portfolio_cum_ret = pd.Series(100, index=daily_returns.index)
+            return True, "Analysis successful", analysis_data
 
-            if bench_col and bench_col in daily_returns.columns:
-                benchmark_cum_ret = (1 + daily_returns[bench_col]).cumprod() * 100
-            else:
-                benchmark_cum_ret = pd.Series(100, index=daily_returns.index)
+        except Exception as e:
+            print(f"Error in portfolio analysis: {e}")
+            traceback.print_exc()
+            return False, f"Analysis failed: {str(e)}", None
+
+    @staticmethod
+    def _download_closes(all_tickers, start_date, end_date):
+        """
+        Download daily closes for tickers (dates x tickers)
+        
+        Returns:
+            tuple: (success, message, DataFrame or None)
+        """
+        print(f"[ANALYTICS] Fetching data for {len(all_tickers)} tickers: {all_tickers}")
+        
+        data, failed = HistoryLoaderService.load_closes(all_tickers, start_date, end_date)
+        if data.empty:
+            return False, "Failed to fetch market data for all tickers", None
+        if failed:
+            print(f"[ANALYTICS] ⚠️ No market data for: {failed}")
+
+        return True, "Market data fetched", data
+
+    @staticmethod
+    def build_lot_quantities(positions, index, norm_by_ticker):
+        """
+        Build the quantity held of each ticker on each date from position lots
+        
+        Each lot adds its quantity from its buy date onward (lots bought before
+        the first date count from the start, lots without a buy date too).
+        
+        Args:
+            positions: Position lots (symbol, quantity, buy_date)
+            index: DatetimeIndex of the price data
+            norm_by_ticker: original ticker -> normalized column name
             
-            # Format for Recharts (Array of objects)
-            # Format for Recharts (Array of objects)
-            performance_chart = []
+        Returns:
+            DataFrame: dates x normalized tickers of quantities held
+        """
+        columns = list(dict.fromkeys(norm_by_ticker.values()))
+        col_idx = {c: i for i, c in enumerate(columns)}
+        dates = index.values.astype('datetime64[D]')
+
+        rows, cols, qty = [], [], []
+        for p in positions:
+            norm = norm_by_ticker.get(str(p.get('symbol', '')).strip().upper())
+            if norm is None:
+                continue
+            buy_date = str(p.get('buy_date') or '')[:10]
+            try:
+                rows.append(np.datetime64(buy_date, 'D') if buy_date else dates[0])
+            except ValueError:
+                rows.append(dates[0])
+            cols.append(col_idx[norm])
+            qty.append(float(p.get('quantity', 0) or 0))
+
+        increments = np.zeros((len(dates) + 1, len(columns)))
+        if rows:
+            # Lots bought after the last date land in the spare row and are ignored
+            np.add.at(increments, (np.searchsorted(dates, np.array(rows, dtype='datetime64[D]')), cols), qty)
+        quantities = np.cumsum(increments[:-1], axis=0)
+
+        return pd.DataFrame(quantities, index=index, columns=columns)
+
+    @staticmethod
+    def compute_analytics(data, ticker_map, bench_col, end_date, holdings=None, indicators=None,
+                          compact=False, points=None):
+        """
+        Compute portfolio analytics from local close prices
+        
+        Everything is derived from one aligned returns matrix: betas, Sharpe
+        ratios, volatilities, RSI, SMA50/200 state and correlations are each a
+        single matrix operation across all assets, not a per-ticker loop.
+        
+        The portfolio series is R @ w for a weight vector w (current holdings,
+        or equal weights without holdings), or the row-wise product with a
+        dates x assets weight matrix when holdings vary over time.
+        
+        Args:
+            data: DataFrame of closes (dates x normalized tickers, incl. benchmark)
+            ticker_map: normalized ticker -> original ticker
+            bench_col: Benchmark column in data (or None)
+            end_date: Analysis date (the chart covers the year before it)
+            holdings: Optional quantities held, either a dict of normalized
+                ticker -> quantity or a DataFrame of dates x normalized tickers
+            indicators: Optional stored indicators (normalized ticker -> state)
+                from IndicatorService; missing tickers are computed here
+            compact: Emit performance_chart as {dates, series} and
+                correlation_matrix as {labels, values} instead of row lists
+            points: Downsample the performance chart to this many points with
+                LTTB (default: ~50 evenly spaced points)
             
-            if not portfolio_cum_ret.empty:
-                # Downsample to ~50 points for performance
-                step = max(1, len(portfolio_cum_ret) // 50)
-                for i in range(0, len(portfolio_cum_ret), step):
-                    idx = portfolio_cum_ret.index[i]
-                    performance_chart.append({
-                        "date": idx.strftime('%b %d'),
-                        "Portfolio": float(round(portfolio_cum_ret.iloc[i], 1)),
-                        "Nifty50": float(round(benchmark_cum_ret.loc[idx], 1)) if idx in benchmark_cum_ret.index else 100.0
-                    })
-                # Add last point
-                last_idx = portfolio_cum_ret.index[-1]
-                performance_chart.append({
-                    "date": last_idx.strftime('%b %d'),
-                    "Portfolio": float(round(portfolio_cum_ret.iloc[-1], 1)),
-                    "Nifty50": float(round(benchmark_cum_ret.loc[last_idx], 1)) if last_idx in benchmark_cum_ret.index else 100.0
-                })
+        Returns:
+            dict: Analysis payload (assets without sectors)
+        """
+        rf_daily = RISK_FREE_RATE / TRADING_DAYS
+        closes = data.ffill()
+        asset_cols = [c for c in closes.columns if c != bench_col]
+        labels = [ticker_map.get(c, c) for c in asset_cols]
+
+        # ---------------------------------------------------------
+        # 1. Aligned returns matrix (last 1 year)
+        # ---------------------------------------------------------
+        chart_start_date = end_date - timedelta(days=365)
+        window = closes[closes.index >= chart_start_date]
+        returns = window.pct_change(fill_method=None).iloc[1:].dropna(how='all')
+        dates = returns.index
+        R = returns[asset_cols].to_numpy(dtype=np.float64)  # T x K
+        valid = ~np.isnan(R)
+        bench = returns[bench_col].to_numpy(dtype=np.float64) if bench_col else None
+
+        # Assets that haven't listed yet produce all-NaN slices
+        with np.errstate(divide='ignore', invalid='ignore'), warnings.catch_warnings():
+            warnings.simplefilter('ignore', RuntimeWarning)
+
+            # Current weights: holding values at the last close (equal without holdings)
+            last_close = closes[asset_cols].iloc[-1].to_numpy(dtype=np.float64)
+            if isinstance(holdings, pd.DataFrame):
+                current_qty = holdings.reindex(columns=asset_cols).iloc[-1].to_numpy(dtype=np.float64)
+            elif holdings is not None:
+                current_qty = np.array([float(holdings.get(c, 0.0)) for c in asset_cols])
+            else:
+                current_qty = None
+            if current_qty is not None:
+                value = np.nan_to_num(current_qty * last_close)
+                weights = value / value.sum() if value.sum() > 0 else np.full(len(asset_cols), 1 / max(1, len(asset_cols)))
+            else:
+                weights = np.full(len(asset_cols), 1 / max(1, len(asset_cols)))
+
+            # Portfolio daily return, renormalized over assets with a return that day
+            R0 = np.nan_to_num(R)
+            if isinstance(holdings, pd.DataFrame):
+                # Weights from the previous close's holding values (dates x assets)
+                Q = holdings.reindex(index=closes.index, columns=asset_cols).ffill().fillna(0.0)
+                V = (Q * closes[asset_cols]).shift(1).reindex(dates).to_numpy(dtype=np.float64)
+                W = np.where(valid, np.nan_to_num(V), 0.0)
+                held = W.sum(axis=1)
+                portfolio_daily_ret = np.where(held > 0, np.einsum('tk,tk->t', R0, W) / held, np.nan)
+            else:
+                held = valid @ weights
+                portfolio_daily_ret = np.where(held > 0, (R0 @ weights) / held, np.nan)
 
             # ---------------------------------------------------------
-            # 2. Portfolio Metrics (Beta, Sharpe, VaR)
+            # 2. Per-asset Beta, Sharpe, Volatility
             # ---------------------------------------------------------
-            # Recalculate returns based on 1 year window usage
-            recent_returns = daily_returns
-            
-            betas = {}
-            if bench_col and bench_col in recent_returns.columns:
-                bench_rets = recent_returns[bench_col]
-                bench_var = np.var(bench_rets)
-                for norm_ticker in normalized_tickers:
-                    if norm_ticker in recent_returns.columns:
-                        try:
-                            # Concat and dropna to align dates
-                            aligned = pd.concat([recent_returns[norm_ticker], bench_rets], axis=1).dropna()
-                            if len(aligned) > 10 and bench_var > 0:
-                                cov = np.cov(aligned.iloc[:, 0], aligned.iloc[:, 1])[0][1]
-                                original_ticker = ticker_map.get(norm_ticker, norm_ticker)
-                                betas[original_ticker] = float(round(cov / bench_var, 2))
-                            else:
-                                betas[ticker_map.get(norm_ticker, norm_ticker)] = 1.0
-                        except:
-                            betas[ticker_map.get(norm_ticker, norm_ticker)] = 1.0
-            
-            avg_beta = float(np.mean(list(betas.values()))) if betas else 1.0
-            
-            # Sharpe
-            risk_free_rate_daily = 0.07 / 252
-            sharpe_ratios = {}
-            for norm_ticker in normalized_tickers:
-                if norm_ticker in recent_returns.columns:
-                    r = recent_returns[norm_ticker]
-                    std = r.std()
-                    original_ticker = ticker_map.get(norm_ticker, norm_ticker)
-                    if std > 0:
-                        sharpe = (r.mean() - risk_free_rate_daily) / std * np.sqrt(252)
-                        sharpe_ratios[original_ticker] = float(round(sharpe, 2))
-                    else:
-                        sharpe_ratios[original_ticker] = 0.0
-                        
-            # Portfolio Aggr Stats
-            if not portfolio_daily_ret.empty:
-                pf_mean = portfolio_daily_ret.mean()
-                pf_std = portfolio_daily_ret.std()
-                portfolio_sharpe = float((pf_mean - risk_free_rate_daily) / pf_std * np.sqrt(252)) if pf_std != 0 else 0.0
-                
-                var_95 = float(np.percentile(portfolio_daily_ret, 5))
-                var_text = f"{abs(var_95 * 100):.2f}%"
-                
-                # Drawdown
-                cum = (1 + portfolio_daily_ret).cumprod()
-                peak = cum.cummax()
-                dd = (cum - peak) / peak
-                max_drawdown = float(dd.min())
-                max_drawdown_text = f"{abs(max_drawdown * 100):.2f}%"
-                
-                volatility = float(pf_std * np.sqrt(252))
-                volatility_text = f"{volatility * 100:.2f}%"
+            mean = np.nanmean(R, axis=0)
+            std = np.nanstd(R, axis=0, ddof=1)
+            sharpe = np.where(std > 0, (mean - rf_daily) / std * np.sqrt(TRADING_DAYS), 0.0)
+            volatility = np.where(std > 0, std * np.sqrt(TRADING_DAYS), 0.0)
+
+            has_returns = valid.any(axis=0)
+            if bench is not None:
+                # Covariance with the benchmark over the dates both have returns
+                both = valid & ~np.isnan(bench)[:, None]
+                m = both.sum(axis=0)
+                r = np.where(both, R, 0.0)
+                b = np.where(both, bench[:, None], 0.0)
+                r_dev = (r - r.sum(axis=0) / m) * both
+                b_dev = (b - b.sum(axis=0) / m) * both
+                cov = (r_dev * b_dev).sum(axis=0) / (m - 1)
+                var_b = (b_dev ** 2).sum(axis=0) / (m - 1)
+                beta = np.where((m > 10) & (var_b > 0), np.round(cov / var_b, 2), 1.0)
+                betas = {labels[k]: float(beta[k]) for k in np.flatnonzero(has_returns)}
+            else:
+                betas = {}
+
+            if betas:
+                beta_vector = np.array([betas.get(l, 1.0) for l in labels])
+                avg_beta = float(beta_vector @ weights)
             else:
-                portfolio_sharpe = 0.0
-                var_text = "0.00%"
-                max_drawdown_text = "0.00%"
-                volatility_text = "0.00%"
+                avg_beta = 1.0
+            sharpe_ratios = {labels[k]: float(round(sharpe[k], 2)) for k in np.flatnonzero(has_returns)}
 
             # ---------------------------------------------------------
-            # 3. Technical Signals & Analysis
+            # 3. Technical indicators (RSI-14, SMA50/200)
+            # Stored nightly state is used where available and recent; the
+            # rest are computed here for all remaining columns at once
             # ---------------------------------------------------------
-            technical_signals = []
-            
-            for norm_ticker in normalized_tickers:
-                if norm_ticker in data.columns:
-                    price_series = data[norm_ticker].dropna()
-                    original_ticker = ticker_map.get(norm_ticker, norm_ticker)
-                    if len(price_series) > 14:
-                        # RSI
-                        delta = price_series.diff()
-                        gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                        loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                        rs = gain / loss
-                        rsi_series = 100 - (100 / (1 + rs))
-                        curr_rsi = rsi_series.iloc[-1]
-                        
-                        # SMA
-                        sma50 = price_series.rolling(window=50).mean().iloc[-1]
-                        sma200 = price_series.rolling(window=200).mean().iloc[-1] if len(price_series) > 200 else 0
-                        
-                        trend = "Neutral"
-                        signal = None
-                        
-                        # RSI Signals
-                        if curr_rsi > 70:
-                            signal = {"type": "warning", "msg": "Overbought (RSI > 70)"}
-                        elif curr_rsi < 30:
-                            signal = {"type": "success", "msg": "Oversold (RSI < 30)"}
-                            
-                        # SMA Signals (Cross over check would require prev day, but let's just do state)
-                        if sma200 > 0:
-                            if sma50 > sma200:
-                                trend = "Bullish"
-                            else:
-                                trend = "Bearish"
-                        
-                        if signal:
-                            technical_signals.append({
-                                "ticker": original_ticker,
-                                "signal": signal['msg'],
-                                "type": signal['type'],
-                                "value": float(round(curr_rsi, 1))
-                            })
-                            
+            last_bars = {c: data[c].last_valid_index() for c in closes.columns}
+            stored = {c: indicators[c] for c in closes.columns
+                      if indicators and c in indicators and indicators[c].get("rsi") is not None
+                      and last_bars[c] is not None
+                      and IndicatorService.is_fresh(indicators[c], last_bars[c].strftime('%Y-%m-%d'))}
+            fallback = closes[[c for c in closes.columns if c not in stored]]
+            counts = data[fallback.columns].count()
+            delta = fallback.diff()
+            # Wilder smoothing, same as the stored indicator state
+            gain = delta.clip(lower=0).ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+            loss = (-delta.clip(upper=0)).ewm(alpha=1 / 14, adjust=False).mean().iloc[-1]
+            rsi = (100 - (100 / (1 + gain / loss))).where(counts > 14)
+            sma50 = fallback.iloc[-50:].mean().where(counts >= 50)
+            sma200 = fallback.iloc[-200:].mean().where(counts >= 200, 0)
+            trend = pd.Series(np.where(sma200 > 0, np.where(sma50 > sma200, "Bullish", "Bearish"), "Neutral"),
+                              index=fallback.columns)
+            if stored:
+                rsi = pd.concat([rsi, pd.Series({c: float(v["rsi"]) for c, v in stored.items()})])
+                trend = pd.concat([trend, pd.Series({c: v.get("trend") or "Neutral" for c, v in stored.items()})])
+
             # ---------------------------------------------------------
             # 4. Correlation Matrix
             # ---------------------------------------------------------
-            correlation_matrix = []
+            correlation_matrix = {"labels": [], "values": []} if compact else []
             avg_correlation = 0.0
-            
             if len(asset_cols) > 1:
-                # Use normalized names for correlation then map back
-                corr_df = recent_returns[asset_cols].corr()
-                
-                # Format for heatmap (x, y, value)
-                for x_norm in corr_df.columns:
-                    for y_norm in corr_df.columns:
-                        if x_norm == bench_col or y_norm == bench_col: continue
-                        
-                        x_orig = ticker_map.get(x_norm, x_norm).replace('.NS', '')
-                        y_orig = ticker_map.get(y_norm, y_norm).replace('.NS', '')
-                        
-                        correlation_matrix.append({
-                            "x": x_orig,
-                            "y": y_orig,
-                            "value": float(round(corr_df.loc[x_norm, y_norm], 2))
-                        })
-                
-                # Calculate avg correlation
-                mask = np.triu(np.ones_like(corr_df, dtype=bool), k=1)
-                avg_correlation = float(corr_df.where(mask).stack().mean())
+                corr = returns[asset_cols].corr().to_numpy()
+                heat_labels = [l.replace('.NS', '') for l in labels]
+                if compact:
+                    correlation_matrix = compact_matrix(heat_labels, corr)
+                else:
+                    rounded = np.nan_to_num(np.round(corr, 2))
+                    # Format for heatmap (x, y, value)
+                    correlation_matrix = [
+                        {"x": heat_labels[i], "y": heat_labels[j], "value": float(v)}
+                        for (i, j), v in np.ndenumerate(rounded)
+                    ]
+                upper = corr[np.triu_indices(len(asset_cols), k=1)]
+                if np.isfinite(upper).any():
+                    avg_correlation = float(np.nanmean(upper))
+
+        diversification_score = int(max(0, min(100, (1 - avg_correlation) * 100)))
+
+        # ---------------------------------------------------------
+        # 5. Portfolio aggregate stats
+        # ---------------------------------------------------------
+        pf = portfolio_daily_ret[~np.isnan(portfolio_daily_ret)]
+        if len(pf) > 1:
+            pf_mean = pf.mean()
+            pf_std = pf.std(ddof=1)
+            portfolio_sharpe = float((pf_mean - rf_daily) / pf_std * np.sqrt(TRADING_DAYS)) if pf_std != 0 else 0.0
+            
+            var_95 = float(np.percentile(pf, 5))
+            var_text = f"{abs(var_95 * 100):.2f}%"
+            
+            # Drawdown
+            cum = np.cumprod(1 + pf)
+            max_drawdown = float((cum / np.maximum.accumulate(cum) - 1).min())
+            max_drawdown_text = f"{abs(max_drawdown * 100):.2f}%"
             
-            diversification_score = int(max(0, min(100, (1 - avg_correlation) * 100)))
+            volatility_text = f"{pf_std * np.sqrt(TRADING_DAYS) * 100:.2f}%"
+        else:
+            portfolio_sharpe = 0.0
+            var_text = "0.00%"
+            max_drawdown_text = "0.00%"
+            volatility_text = "0.00%"
 
-            # ---------------------------------------------------------
-            # 5. Market Indicators
-            # ---------------------------------------------------------
-            nifty_rsi = 50.0
-            if bench_col and bench_col in data.columns:
-                 price_series = data[bench_col].dropna()
-                 if len(price_series) > 14:
-                    delta = price_series.diff()
-                    gain = (delta.where(delta > 0, 0)).rolling(window=14).mean()
-                    loss = (-delta.where(delta < 0, 0)).rolling(window=14).mean()
-                    rs = gain / loss
-                    rsi_series = 100 - (100 / (1 + rs))
-                    nifty_rsi = float(rsi_series.iloc[-1])
-
-            # Fetch sectors for assets (optional enrichment)
-            asset_data = []
-            for ticker in tickers:
-                # Try to get sector from yf info (slow but needed if not in DB)
-                sector = "Unknown"
-                try:
-                    norm_t = next((nt for nt, ot in ticker_map.items() if ot == ticker), f"{ticker}.NS")
-                    stock = yf.Ticker(norm_t)
-                    # We only fetch info if we really need it, but for analysis it's okay
-                    sector = stock.info.get('sector', 'Unknown')
-                except:
-                    pass
-                
-                asset_data.append({
-                    "ticker": ticker,
-                    "beta": float(betas.get(ticker, 1.0)),
-                    "sharpe": float(sharpe_ratios.get(ticker, 0.0)),
-                    "sector": sector
-                })
-                
-            analysis_data = {
-                "portfolio_health": {
-                    "beta": float(round(avg_beta, 2)),
-                    "sharpe_ratio": float(round(portfolio_sharpe, 2)),
-                    "diversification_score": int(diversification_score),
-                    "var_95": var_text,
-                    "max_drawdown": max_drawdown_text,
-                    "volatility": volatility_text
-                },
-                "market_indicators": {
-                    "nifty_rsi": float(round(nifty_rsi, 1)),
-                    "fear_greed_index": int(50 + (nifty_rsi - 50) + (avg_beta * 5)), 
-                    "market_sentiment": "Neutral" if 40 < nifty_rsi < 60 else ("Bullish" if nifty_rsi >= 60 else "Bearish")
-                },
-                "assets": asset_data,
-                "performance_chart": performance_chart,
-                "technical_signals": technical_signals,
-                "correlation_matrix": correlation_matrix
-            }
+        # ---------------------------------------------------------
+        # 6. Performance Chart (Portfolio vs Benchmark), ~50 points
+        # ---------------------------------------------------------
+        performance_chart = {"dates": [], "series": {}} if compact else []
+        if len(dates):
+            portfolio_cum_ret = np.cumprod(1 + np.nan_to_num(portfolio_daily_ret)) * 100
+            benchmark_cum_ret = (np.cumprod(1 + np.nan_to_num(bench)) * 100) if bench is not None else np.full(len(dates), 100.0)
+            if points:
+                idx = lttb_indices(np.column_stack([portfolio_cum_ret, benchmark_cum_ret]), points)
+            else:
+                step = max(1, len(dates) // 50)
+                idx = np.unique(np.append(np.arange(0, len(dates), step), len(dates) - 1))
+            if compact:
+                performance_chart = compact_series(
+                    dates[idx].strftime('%Y-%m-%d'),
+                    {"Portfolio": portfolio_cum_ret[idx], "Nifty50": benchmark_cum_ret[idx]},
+                    decimals=1
+                )
+            else:
+                performance_chart = [{
+                    "date": dates[i].strftime('%b %d'),
+                    "Portfolio": float(round(portfolio_cum_ret[i], 1)),
+                    "Nifty50": float(round(benchmark_cum_ret[i], 1))
+                } for i in idx]
+
+        # ---------------------------------------------------------
+        # 7. Signals, market indicators and asset rows
+        # ---------------------------------------------------------
+        technical_signals = []
+        for col, label in zip(asset_cols, labels):
+            if col not in rsi.index or not np.isfinite(rsi[col]):
+                continue
+            curr_rsi = float(rsi[col])
+            if curr_rsi > 70:
+                signal = {"type": "warning", "msg": "Overbought (RSI > 70)"}
+            elif curr_rsi < 30:
+                signal = {"type": "success", "msg": "Oversold (RSI < 30)"}
+            else:
+                continue
+            technical_signals.append({
+                "ticker": label,
+                "signal": signal['msg'],
+                "type": signal['type'],
+                "value": float(round(curr_rsi, 1))
+            })
+
+        nifty_rsi = 50.0
+        if bench_col and bench_col in rsi.index and np.isfinite(rsi[bench_col]):
+            nifty_rsi = float(rsi[bench_col])
+
+        vol_by_label = dict(zip(labels, volatility))
+        weight_by_label = dict(zip(labels, weights))
+        norm_by_ticker = {ot: nt for nt, ot in ticker_map.items()}
+        asset_data = []
+        for ticker, norm in norm_by_ticker.items():
+            asset_data.append({
+                "ticker": ticker,
+                "beta": float(betas.get(ticker, 1.0)),
+                "sharpe": float(sharpe_ratios.get(ticker, 0.0)),
+                "volatility": float(round(vol_by_label.get(ticker, 0.0), 4)),
+                "weight": float(round(weight_by_label.get(ticker, 0.0), 4)),
+                "trend": str(trend[norm]) if norm in trend.index else "Neutral"
+            })
+
+        return {
+            "portfolio_health": {
+                "beta": float(round(avg_beta, 2)),
+                "sharpe_ratio": float(round(portfolio_sharpe, 2)),
+                "diversification_score": int(diversification_score),
+                "var_95": var_text,
+                "max_drawdown": max_drawdown_text,
+                "volatility": volatility_text
+            },
+            "market_indicators": {
+                "nifty_rsi": float(round(nifty_rsi, 1)),
+                "fear_greed_index": int(50 + (nifty_rsi - 50) + (avg_beta * 5)), 
+                "market_sentiment": "Neutral" if 40 < nifty_rsi < 60 else ("Bullish" if nifty_rsi >= 60 else "Bearish")
+            },
+            "assets": asset_data,
+            "performance_chart": performance_chart,
+            "technical_signals": technical_signals,
+            "correlation_matrix": correlation_matrix
+        }
+
+    @staticmethod
+    def analyze_portfolio(positions, weighting='current', compact=False, points=None):
+        """
+        Full portfolio analysis payload for a portfolio's positions
+        
+        Args:
+            positions: Position lots (symbol, quantity, buy_date)
+            weighting: 'current' (today's holding values) or 'lots' (lots held on each date)
+            compact: Column-oriented performance chart and correlation matrix
+            points: Performance chart points (LTTB downsampling)
             
-            return True, "Analysis successful", analysis_data
+        Returns:
+            tuple: (success, message, data) with metrics plus sector_allocation
+        """
+        tickers = list(set([p['symbol'] for p in positions]))
+        source_data = [{"ticker": p['symbol'], "sector": p.get('sector', 'Unknown')} for p in positions]
 
-        except Exception as e:
-            print(f"Error in portfolio analysis: {e}")
-            traceback.print_exc()
-            return False, f"Analysis failed: {str(e)}", None
+        success_metrics, msg_metrics, metrics_data = PortfolioAnalysisService.calculate_portfolio_metrics(
+            tickers, positions=positions, time_varying=(weighting == 'lots'),
+            compact=compact, points=points
+        )
+        if not success_metrics:
+            return False, msg_metrics, None
+            
+        # Sector Distribution, weighted by holding value (asset weights sum to 1)
+        sector_counts = {}
+        sector_weights = {}
+        # Prefer sectors from metrics_data assets (dynamically fetched)
+        for asset in metrics_data.get('assets', []):
+            sec = asset.get('sector', 'Unknown')
+            if sec and sec != 'Unknown' and sec != 'N/A':
+                sector_counts[sec] = sector_counts.get(sec, 0) + 1
+                sector_weights[sec] = sector_weights.get(sec, 0.0) + asset.get('weight', 0.0)
+        
+        # Fallback to source_data if still empty (weighted by invested amount)
+        if not sector_counts:
+            total_invested = sum(p.get('invested_amount', 0) for p in positions)
+            for item, position in zip(source_data, positions):
+                sec = item.get('sector', 'Unknown')
+                if sec and sec != 'Unknown' and sec != 'N/A':
+                    sector_counts[sec] = sector_counts.get(sec, 0) + 1
+                    sector_weights[sec] = sector_weights.get(sec, 0.0) + (
+                        position.get('invested_amount', 0) / total_invested if total_invested > 0
+                        else 1 / len(positions))
+        
+        sector_allocation = []
+        for sec, count in sector_counts.items():
+            sector_allocation.append({
+                "name": sec,
+                "value": round(sector_weights[sec] * 100, 1),
+                "count": count
+            })
+        sector_allocation.sort(key=lambda x: x['value'], reverse=True)
+        
+        # Ensure assets have correct sector info (don't overwrite if already set)
+        for asset in metrics_data['assets']:
+            if not asset.get('sector') or asset.get('sector') == 'Unknown':
+                # Find sector in source data (from DB)
+                info_item = next((i for i in source_data if i['ticker'] == asset['ticker']), None)
+                if info_item and info_item.get('sector') and info_item.get('sector') != 'Unknown':
+                    asset['sector'] = info_item.get('sector')
+
+        return True, "Portfolio analysis generated", {
+            **metrics_data,
+            "sector_allocation": sector_allocation
+        }
 
     @staticmethod
     def get_sector_distribution(tickers):
         """
         Get sector distribution for tickers.
-        Uses yfinance info to fetch sector.
+        Uses cached stock_mappings metadata for sectors.
         """
         try:
+            ticker_sectors = StockMetadataService.get_sectors(tickers)
             sectors = {}
             for ticker in tickers:
-                try:
-                    stock = yf.Ticker(ticker)
-                    info = stock.info
-                    sector = info.get('sector', 'Unknown')
-                    sectors[sector] = sectors.get(sector, 0) + 1
-                except:
-                    sectors['Unknown'] = sectors.get('Unknown', 0) + 1
+                sector = ticker_sectors.get(ticker, 'Unknown')
+                sectors[sector] = sectors.get(sector, 0) + 1
             
             total = len(tickers)
             distribution = []
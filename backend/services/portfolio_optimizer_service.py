@@ -0,0 +1,396 @@
+"""
+Portfolio Optimizer Service
+Minimum-variance, maximum-Sharpe and risk-parity target weights for a
+portfolio's holdings from a Ledoit-Wolf shrinkage covariance, with the
+trades needed to move toward each target
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+import pytz
+from config import get_config
+from services.history_loader_service import HistoryLoaderService
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+TRADING_DAYS = 252
+RISK_FREE_RATE = 0.07
+OBJECTIVES = ("min_variance", "max_sharpe", "risk_parity")
+
+# Covariance estimates ((sorted symbols, IST date) -> estimate dict)
+_covariance_cache = {}
+_covariance_lock = threading.Lock()
+
+# Closes of symbols appended by extend_estimates ((symbol, IST date) -> Series, None if unavailable)
+_column_cache = {}
+
+
+def _project_simplex(v: np.ndarray) -> np.ndarray:
+    """Euclidean projection of each column of v onto the probability simplex"""
+    n = v.shape[0]
+    u = -np.sort(-v, axis=0)
+    css = np.cumsum(u, axis=0) - 1
+    ind = np.arange(1, n + 1)[:, None]
+    rho = n - 1 - np.argmax((u - css / ind > 0)[::-1], axis=0)
+    theta = css[rho, np.arange(v.shape[1])] / (rho + 1)
+    return np.maximum(v - theta, 0.0)
+
+
+def _solve_mean_variance(cov: np.ndarray, mu: np.ndarray, risk_tolerances: np.ndarray,
+                         max_iter: int = 1000, tol: float = 1e-9) -> np.ndarray:
+    """
+    Long-only mean-variance weights for a batch of risk tolerances
+
+    Minimizes 0.5 w'Cw - t mu'w over the simplex for every t at once with
+    accelerated projected gradient (FISTA); each iteration is one n x n by
+    n x m matrix product, so it stays fast for hundreds of assets.
+
+    Returns:
+        ndarray: (n, m) weights, one column per risk tolerance
+    """
+    n, m = len(mu), len(risk_tolerances)
+    step = 1.0 / max(np.linalg.eigvalsh(cov)[-1], 1e-12)
+    w = np.full((n, m), 1.0 / n)
+    y, t_k = w.copy(), np.ones(m)
+    for _ in range(max_iter):
+        grad = cov @ y - mu[:, None] * risk_tolerances[None, :]
+        w_next = _project_simplex(y - step * grad)
+        # Adaptive restart: drop momentum for columns where it points uphill
+        restart = np.einsum('ij,ij->j', grad, w_next - w) > 0
+        t_k = np.where(restart, 1.0, t_k)
+        t_next = (1 + np.sqrt(1 + 4 * t_k ** 2)) / 2
+        y = w_next + ((t_k - 1) / t_next) * (w_next - w)
+        converged = np.max(np.abs(w_next - w)) < tol
+        w, t_k = w_next, t_next
+        if converged:
+            break
+    return w
+
+
+def _solve_risk_parity(cov: np.ndarray, max_iter: int = 100, tol: float = 1e-12) -> np.ndarray:
+    """
+    Equal risk contribution weights
+
+    Solves Spinu's convex formulation min 0.5 y'Cy - sum(log y) / n with
+    damped Newton steps (backtracking line search that keeps y positive),
+    which converges for any positive definite C, mixed-sign correlations
+    included, in a few dozen n x n solves. y is then normalized to sum to
+    one.
+    """
+    n = cov.shape[0]
+    b = 1.0 / n
+
+    def objective(v):
+        return 0.5 * v @ cov @ v - b * np.log(v).sum()
+
+    y = 1.0 / np.sqrt(np.diag(cov))
+    y /= np.sqrt(y @ cov @ y)
+    f = objective(y)
+    for _ in range(max_iter):
+        grad = cov @ y - b / y
+        direction = np.linalg.solve(cov + np.diag(b / y ** 2), -grad)
+        decrement = -grad @ direction
+        if decrement / 2 < tol:
+            break
+        t = 1.0
+        while np.any(y + t * direction <= 0):
+            t *= 0.5
+        while t > 1e-12:
+            f_next = objective(y + t * direction)
+            if f_next <= f - 0.25 * t * decrement:
+                break
+            t *= 0.5
+        y, f = y + t * direction, f_next
+    return y / y.sum()
+
+
+def _valid_weights(w: np.ndarray) -> bool:
+    """Whether w is a finite, non-negative, fully invested weight vector"""
+    return bool(np.all(np.isfinite(w)) and np.all(w >= -1e-9) and abs(w.sum() - 1.0) < 1e-6)
+
+
+class PortfolioOptimizerService:
+    """Service for portfolio optimization and rebalancing trades"""
+
+    @staticmethod
+    def ledoit_wolf(returns: np.ndarray) -> Tuple[np.ndarray, float]:
+        """
+        Ledoit-Wolf shrinkage of the sample covariance toward a scaled identity
+
+        Args:
+            returns: Complete daily returns (T, n)
+
+        Returns:
+            tuple: (shrunk covariance (n, n), shrinkage intensity)
+        """
+        T, n = returns.shape
+        X = returns - returns.mean(axis=0)
+        sample = X.T @ X / T
+        mu = np.trace(sample) / n
+
+        X2 = X ** 2
+        beta = ((X2.T @ X2).sum() / T - (sample ** 2).sum()) / (n * T)
+        delta = ((sample - mu * np.eye(n)) ** 2).sum() / n
+        beta = min(beta, delta)
+        shrinkage = 0.0 if delta == 0 else beta / delta
+
+        return (1 - shrinkage) * sample + shrinkage * mu * np.eye(n), float(shrinkage)
+
+    @staticmethod
+    def get_estimates(symbols: List[str]) -> Optional[Dict]:
+        """
+        Annualized expected returns and shrinkage covariance for symbols
+
+        Cached per (symbol set, as-of date); one download per symbol set a day.
+
+        Returns:
+            dict: {"symbols", "mu", "cov", "sample_cov", "last_close", "shrinkage", "as_of",
+                   "dates", "returns"}, or None if no data is available
+        """
+        as_of = datetime.now(pytz.timezone('Asia/Kolkata')).date().isoformat()
+        key = (tuple(sorted(symbols)), as_of)
+        with _covariance_lock:
+            if key in _covariance_cache:
+                return _covariance_cache[key]
+
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=config.OPTIMIZER_LOOKBACK_DAYS)
+        data, failed = HistoryLoaderService.load_closes(list(key[0]), start_date, end_date)
+        if data.empty:
+            logger.warning(f"Optimizer: no market data for {len(key[0])} symbols")
+            return None
+
+        closes = data.replace(0, np.nan).ffill()
+        available = [s for s in key[0] if s in closes.columns and closes[s].count() > 20]
+        if not available:
+            return None
+
+        closes = closes[available]
+        # Missing days (late listings) count as flat so the matrix is complete
+        returns = closes.pct_change(fill_method=None).iloc[1:].fillna(0.0).to_numpy(dtype=np.float64)
+        cov, shrinkage = PortfolioOptimizerService.ledoit_wolf(returns)
+
+        estimates = {
+            "symbols": available,
+            "mu": np.log1p(returns).mean(axis=0) * TRADING_DAYS,
+            "cov": cov * TRADING_DAYS,
+            "sample_cov": np.atleast_2d(np.cov(returns, rowvar=False, bias=True)) * TRADING_DAYS,
+            "last_close": closes.iloc[-1].to_numpy(dtype=np.float64),
+            "shrinkage": shrinkage,
+            "as_of": closes.index[-1].strftime('%Y-%m-%d'),
+            "dates": closes.index,
+            "returns": returns
+        }
+
+        with _covariance_lock:
+            # Only today's estimates are worth keeping
+            for k in [k for k in _covariance_cache if k[1] != as_of]:
+                del _covariance_cache[k]
+            _covariance_cache[key] = estimates
+
+        return estimates
+
+    @staticmethod
+    def _load_columns(symbols: List[str]) -> Dict[str, Optional[pd.Series]]:
+        """Daily closes of symbols over the optimizer lookback, cached per symbol for the day"""
+        as_of = datetime.now(pytz.timezone('Asia/Kolkata')).date().isoformat()
+        with _covariance_lock:
+            columns = {s: _column_cache[(s, as_of)] for s in symbols if (s, as_of) in _column_cache}
+        missing = [s for s in symbols if s not in columns]
+        if not missing:
+            return columns
+
+        end_date = datetime.now()
+        start_date = end_date - timedelta(days=config.OPTIMIZER_LOOKBACK_DAYS)
+        data, _ = HistoryLoaderService.load_closes(missing, start_date, end_date)
+        loaded = {s: data[s].dropna() if s in data.columns and data[s].count() > 0 else None for s in missing}
+
+        with _covariance_lock:
+            for k in [k for k in _column_cache if k[1] != as_of]:
+                del _column_cache[k]
+            _column_cache.update({(s, as_of): series for s, series in loaded.items()})
+        columns.update(loaded)
+        return columns
+
+    @staticmethod
+    def extend_estimates(estimates: Dict, symbols: List[str]) -> Dict:
+        """
+        Estimates with extra symbols appended, reusing the cached matrix
+
+        Only the new symbols' closes are loaded. Their returns are aligned
+        to the estimate's dates and the new rows and columns of the
+        covariance are computed against the stored returns, shrunk with the
+        same Ledoit-Wolf intensity and target, so the existing block is
+        left as it is. Symbols without enough history are left out.
+
+        Returns:
+            dict: Same fields as get_estimates
+        """
+        new = [s for s in dict.fromkeys(symbols) if s not in estimates["symbols"]]
+        if not new:
+            return estimates
+
+        dates = estimates["dates"]
+        columns = PortfolioOptimizerService._load_columns(new)
+        closes = pd.DataFrame({
+            s: series.reindex(dates.union(series.index)).ffill().reindex(dates)
+            for s, series in columns.items() if series is not None
+        })
+        added = [s for s in new if s in closes.columns and closes[s].count() > 20]
+        if not added:
+            return estimates
+
+        closes = closes[added].astype(np.float64)
+        new_returns = closes.pct_change(fill_method=None).iloc[1:].fillna(0.0).to_numpy(dtype=np.float64)
+        returns = estimates["returns"]
+        T, n = returns.shape
+        X = returns - returns.mean(axis=0)
+        Y = new_returns - new_returns.mean(axis=0)
+
+        # Sample blocks (annualized) and the shrinkage toward target * I
+        cross = X.T @ Y / T * TRADING_DAYS
+        block = Y.T @ Y / T * TRADING_DAYS
+        shrinkage = estimates["shrinkage"]
+        target = np.trace(estimates["sample_cov"]) / n
+        shrunk_block = (1 - shrinkage) * block + shrinkage * target * np.eye(len(added))
+
+        return {
+            **estimates,
+            "symbols": estimates["symbols"] + added,
+            "mu": np.concatenate([estimates["mu"], np.log1p(new_returns).mean(axis=0) * TRADING_DAYS]),
+            "cov": np.block([[estimates["cov"], (1 - shrinkage) * cross],
+                             [(1 - shrinkage) * cross.T, shrunk_block]]),
+            "sample_cov": np.block([[estimates["sample_cov"], cross], [cross.T, block]]),
+            "last_close": np.concatenate([estimates["last_close"], closes.iloc[-1].to_numpy(dtype=np.float64)]),
+            "returns": np.hstack([returns, new_returns])
+        }
+
+    @staticmethod
+    def optimize(mu: np.ndarray, cov: np.ndarray, objectives=OBJECTIVES) -> Dict[str, np.ndarray]:
+        """
+        Target weights for each objective (long-only, fully invested)
+
+        Maximum Sharpe is the best point on a batch of frontier portfolios
+        solved together; minimum variance is the zero risk tolerance column.
+        """
+        targets = {}
+        if "min_variance" in objectives or "max_sharpe" in objectives:
+            tolerances = np.concatenate([[0.0], np.logspace(-3, 1, 48)])
+            frontier = _solve_mean_variance(cov, mu, tolerances)
+            if "min_variance" in objectives:
+                targets["min_variance"] = frontier[:, 0]
+            if "max_sharpe" in objectives:
+                vol = np.sqrt(np.einsum('ij,ik,kj->j', frontier, cov, frontier))
+                sharpe = (mu @ frontier - RISK_FREE_RATE) / vol
+                targets["max_sharpe"] = frontier[:, int(np.nanargmax(sharpe))]
+        if "risk_parity" in objectives:
+            targets["risk_parity"] = _solve_risk_parity(cov)
+        return targets
+
+    @staticmethod
+    def rebalance_trades(symbols: List[str], quantities: np.ndarray, prices: np.ndarray,
+                         target: np.ndarray, step: float = 1.0) -> List[Dict]:
+        """
+        Trades that move current holdings `step` of the way to target weights
+
+        Share counts are rounded to whole shares.
+        """
+        values = quantities * prices
+        total = values.sum()
+        current = values / total
+        desired = current + step * (target - current)
+        shares = np.round((desired * total - values) / prices).astype(int)
+
+        trades = []
+        for i, symbol in enumerate(symbols):
+            trades.append({
+                "ticker": symbol.replace('.NS', ''),
+                "current_weight": round(float(current[i]), 4),
+                "target_weight": round(float(target[i]), 4),
+                "action": "BUY" if shares[i] > 0 else ("SELL" if shares[i] < 0 else "HOLD"),
+                "shares": abs(int(shares[i])),
+                "value": round(float(abs(shares[i]) * prices[i]), 2),
+                "price": round(float(prices[i]), 2)
+            })
+        trades.sort(key=lambda t: t["value"], reverse=True)
+        return trades
+
+    @staticmethod
+    def optimize_positions(positions: List[Dict], objective: str = "all", step: float = 1.0) -> tuple:
+        """
+        Optimize a portfolio's holdings
+
+        Args:
+            positions: Position lots (symbol, quantity)
+            objective: One of OBJECTIVES or "all"
+            step: Fraction of the way to move toward the targets (0-1]
+
+        Returns:
+            tuple: (success, message, data)
+        """
+        from services.indicator_service import normalize_symbol
+
+        try:
+            objectives = OBJECTIVES if objective == "all" else (objective,)
+            if any(o not in OBJECTIVES for o in objectives):
+                return False, f"objective must be one of: all, {', '.join(OBJECTIVES)}", None
+            step = min(max(float(step), 0.0), 1.0)
+
+            holdings = {}
+            for p in positions:
+                symbol = normalize_symbol(p.get("symbol", ""))
+                holdings[symbol] = holdings.get(symbol, 0.0) + float(p.get("quantity", 0) or 0)
+            symbols = [s for s, q in holdings.items() if q > 0]
+            if len(symbols) < 2:
+                return False, "At least two holdings are needed to optimize", None
+
+            estimates = PortfolioOptimizerService.get_estimates(symbols)
+            if estimates is None or len(estimates["symbols"]) < 2:
+                return False, "Insufficient price history for holdings", None
+
+            symbols = estimates["symbols"]
+            mu, cov, prices = estimates["mu"], estimates["cov"], estimates["last_close"]
+            quantities = np.array([holdings[s] for s in symbols])
+            current = quantities * prices / (quantities * prices).sum()
+
+            def describe(w):
+                vol = float(np.sqrt(w @ cov @ w))
+                ret = float(mu @ w)
+                contributions = w * (cov @ w) / vol ** 2
+                return {
+                    "expected_return": round(ret, 4),
+                    "volatility": round(vol, 4),
+                    "sharpe_ratio": round((ret - RISK_FREE_RATE) / vol, 2) if vol > 0 else 0.0,
+                    "max_risk_contribution": round(float(contributions.max()), 4)
+                }
+
+            targets = PortfolioOptimizerService.optimize(mu, cov, objectives)
+            invalid = [name for name, target in targets.items() if not _valid_weights(target)]
+            if invalid:
+                logger.error(f"Optimizer produced invalid weights for {', '.join(invalid)} ({len(symbols)} assets)")
+                return False, f"Optimization did not converge for: {', '.join(invalid)}", None
+
+            results = {}
+            for name, target in targets.items():
+                results[name] = {
+                    **describe(target),
+                    "trades": PortfolioOptimizerService.rebalance_trades(symbols, quantities, prices, target, step)
+                }
+
+            return True, "Optimization complete", {
+                "as_of": estimates["as_of"],
+                "shrinkage": round(estimates["shrinkage"], 4),
+                "step": step,
+                "current": describe(current),
+                "excluded": [s.replace(".NS", "") for s, q in holdings.items() if q > 0 and s not in symbols],
+                "targets": results
+            }
+
+        except Exception as e:
+            logger.error(f"Error in portfolio optimization: {e}")
+            return False, f"Optimization failed: {str(e)}", None
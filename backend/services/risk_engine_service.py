@@ -0,0 +1,329 @@
+"""
+Risk Engine Service
+Historical-simulation and Monte Carlo VaR/CVaR at several horizons on the
+portfolio's actual weights, plus historical stress scenario replays
+"""
+
+import logging
+import multiprocessing
+import threading
+import concurrent.futures
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+import numpy as np
+import pandas as pd
+from config import get_config
+from services.history_loader_service import HistoryLoaderService
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+BENCHMARK = "^NSEI"
+CONFIDENCE_LEVELS = (0.95, 0.99)
+DEFAULT_HORIZONS = (1, 10, 21)  # Trading days: 1 day, 2 weeks, 1 month
+MIN_OBSERVATIONS = 20
+
+# Historical windows replayed on current holdings (peak to trough of Nifty)
+STRESS_SCENARIOS = {
+    "covid_2020": {"name": "COVID-19 crash (2020)", "start": "2020-02-19", "end": "2020-03-23"},
+    "gfc_2008": {"name": "Global financial crisis (2008)", "start": "2008-01-08", "end": "2008-10-27"},
+    "taper_2013": {"name": "Taper tantrum (2013)", "start": "2013-05-20", "end": "2013-08-28"},
+}
+
+# (scenario key, symbol) -> return over the scenario window (None = no history then).
+# History doesn't change, so entries never expire.
+_scenario_cache = {}
+# (scenario key, symbol) -> datetime of a failed download, retried after RISK_SCENARIO_RETRY_SECONDS
+_scenario_failures = {}
+_scenario_lock = threading.Lock()
+
+# Shared process pool for large Monte Carlo runs (created on first use)
+_process_pool = None
+_process_pool_lock = threading.Lock()
+
+
+def _simulate_chunk(chol: np.ndarray, mu: np.ndarray, weights: np.ndarray, horizons: tuple,
+                    paths: int, seed: int) -> np.ndarray:
+    """
+    Simulate portfolio returns for one chunk of Monte Carlo paths
+
+    Daily log returns are multivariate normal (mu, L L^T), so an h-day log
+    return is one draw of N(h mu, h L L^T): a single correlated shock per
+    asset and path, scaled by sqrt(h), for every horizon.
+
+    Returns:
+        ndarray: (len(horizons), paths) simulated portfolio returns
+    """
+    rng = np.random.default_rng(seed)
+    shocks = rng.standard_normal((paths, len(mu))) @ chol.T
+    out = np.empty((len(horizons), paths))
+    for i, h in enumerate(horizons):
+        asset_returns = np.expm1(h * mu + np.sqrt(h) * shocks)
+        out[i] = asset_returns @ weights
+    return out
+
+
+def _get_process_pool():
+    """
+    Shared ProcessPoolExecutor for large simulations
+
+    Workers are spawned, not forked: the pool is created from a job thread
+    of a multithreaded process (Flask, pymongo), where fork can copy held
+    locks into the child and deadlock it.
+    """
+    global _process_pool
+    with _process_pool_lock:
+        if _process_pool is None:
+            _process_pool = concurrent.futures.ProcessPoolExecutor(
+                max_workers=config.RISK_MC_PROCESSES, mp_context=multiprocessing.get_context("spawn"))
+        return _process_pool
+
+
+class RiskEngineService:
+    """Service for portfolio VaR/CVaR and stress testing"""
+
+    @staticmethod
+    def tail_stats(returns: np.ndarray) -> Dict[str, float]:
+        """
+        VaR and CVaR (expected shortfall) of a return sample, as positive losses
+
+        Returns:
+            dict: {"var_95", "cvar_95", "var_99", "cvar_99"}
+        """
+        stats = {}
+        for level in CONFIDENCE_LEVELS:
+            cutoff = np.percentile(returns, (1 - level) * 100)
+            tail = returns[returns <= cutoff]
+            pct = int(round(level * 100))
+            stats[f"var_{pct}"] = float(max(0.0, -cutoff))
+            stats[f"cvar_{pct}"] = float(max(0.0, -tail.mean())) if len(tail) else float(max(0.0, -cutoff))
+        return stats
+
+    @staticmethod
+    def historical_var(portfolio_returns: np.ndarray, horizons: tuple) -> Dict[str, Dict]:
+        """
+        Historical-simulation VaR/CVaR from daily portfolio returns
+
+        h-day returns are overlapping compounded windows, taken for all
+        windows at once from the cumulative log-return series.
+        """
+        log_cum = np.concatenate([[0.0], np.cumsum(np.log1p(portfolio_returns))])
+        result = {}
+        for h in horizons:
+            if len(portfolio_returns) < h + MIN_OBSERVATIONS:
+                continue
+            window_returns = np.expm1(log_cum[h:] - log_cum[:-h])
+            result[f"{h}d"] = RiskEngineService.tail_stats(window_returns)
+        return result
+
+    @staticmethod
+    def monte_carlo_var(returns: np.ndarray, weights: np.ndarray, horizons: tuple, paths: int,
+                        seed: Optional[int] = None) -> Dict[str, Dict]:
+        """
+        Monte Carlo VaR/CVaR with correlated shocks from a Cholesky factor
+
+        Args:
+            returns: Daily asset returns (T, K), NaN where missing
+            weights: Portfolio weights (K,)
+            horizons: Horizons in trading days
+            paths: Number of simulated paths (already within the path budget)
+            seed: Optional RNG seed
+
+        Returns:
+            dict: horizon -> VaR/CVaR stats
+        """
+        log_returns = pd.DataFrame(np.log1p(returns))
+        mu = log_returns.mean().to_numpy()
+        cov = log_returns.cov(min_periods=MIN_OBSERVATIONS).to_numpy()
+        cov = np.nan_to_num(cov)
+
+        # Pairwise covariance may not be positive definite; clip eigenvalues
+        eigvals, eigvecs = np.linalg.eigh((cov + cov.T) / 2)
+        cov = (eigvecs * np.clip(eigvals, 1e-12, None)) @ eigvecs.T
+        chol = np.linalg.cholesky(cov)
+
+        seeds = np.random.SeedSequence(seed).generate_state(max(1, -(-paths // config.RISK_MC_CHUNK_PATHS)))
+        chunk_sizes = [min(config.RISK_MC_CHUNK_PATHS, paths - i * config.RISK_MC_CHUNK_PATHS)
+                       for i in range(len(seeds))]
+
+        if len(chunk_sizes) > 1:
+            pool = _get_process_pool()
+            futures = [pool.submit(_simulate_chunk, chol, mu, weights, horizons, n, int(s))
+                       for n, s in zip(chunk_sizes, seeds)]
+            simulated = np.concatenate([f.result() for f in futures], axis=1)
+        else:
+            simulated = _simulate_chunk(chol, mu, weights, horizons, chunk_sizes[0], int(seeds[0]))
+
+        return {f"{h}d": RiskEngineService.tail_stats(simulated[i]) for i, h in enumerate(horizons)}
+
+    @staticmethod
+    def get_scenario_returns(scenario_key: str, symbols: List[str]) -> Dict[str, Optional[float]]:
+        """
+        Returns of symbols over a stress scenario window (cached forever)
+
+        Symbols that failed to download (including ones listed after the
+        window) are only remembered for RISK_SCENARIO_RETRY_SECONDS.
+
+        Returns:
+            dict: symbol -> window return, or None if it has no history then
+        """
+        scenario = STRESS_SCENARIOS[scenario_key]
+        retry_before = datetime.now() - timedelta(seconds=config.RISK_SCENARIO_RETRY_SECONDS)
+        with _scenario_lock:
+            missing = [s for s in symbols if (scenario_key, s) not in _scenario_cache
+                       and _scenario_failures.get((scenario_key, s), datetime.min) < retry_before]
+
+        if missing:
+            start = datetime.fromisoformat(scenario["start"])
+            end = datetime.fromisoformat(scenario["end"]) + timedelta(days=1)
+            data, failed = HistoryLoaderService.load_closes(missing, start, end)
+            fetched = {}
+            if not data.empty:
+                first = data.bfill().iloc[0]
+                last = data.ffill().iloc[-1]
+                for s in missing:
+                    if s not in data.columns:
+                        continue
+                    # Require a price near the start so later listings aren't counted
+                    if data[s].iloc[:5].notna().any() and first[s] > 0:
+                        fetched[s] = float(last[s] / first[s] - 1)
+                    else:
+                        fetched[s] = None
+            else:
+                logger.warning(f"Stress scenario {scenario_key}: no data for {len(missing)} symbols")
+            now = datetime.now()
+            with _scenario_lock:
+                _scenario_cache.update({(scenario_key, s): r for s, r in fetched.items()})
+                for s in missing:
+                    if s in fetched:
+                        _scenario_failures.pop((scenario_key, s), None)
+                    else:
+                        _scenario_failures[(scenario_key, s)] = now
+
+        with _scenario_lock:
+            return {s: _scenario_cache.get((scenario_key, s)) for s in symbols}
+
+    @staticmethod
+    def stress_test(symbols: List[str], weights: np.ndarray, betas: np.ndarray, portfolio_value: float) -> List[Dict]:
+        """
+        Replay stress scenarios on current holdings
+
+        Holdings without history in a window (listed later) are proxied by
+        beta x the Nifty return over that window.
+        """
+        results = []
+        for key, scenario in STRESS_SCENARIOS.items():
+            try:
+                scenario_returns = RiskEngineService.get_scenario_returns(key, symbols + [BENCHMARK])
+                nifty_return = scenario_returns.get(BENCHMARK)
+                asset_returns = np.array([scenario_returns.get(s) if scenario_returns.get(s) is not None else np.nan
+                                          for s in symbols], dtype=np.float64)
+                proxied = np.isnan(asset_returns)
+                if proxied.any():
+                    if nifty_return is None:
+                        continue
+                    asset_returns = np.where(proxied, betas * nifty_return, asset_returns)
+
+                portfolio_return = float(asset_returns @ weights)
+                results.append({
+                    "scenario": key,
+                    "name": scenario["name"],
+                    "start": scenario["start"],
+                    "end": scenario["end"],
+                    "portfolio_return": round(portfolio_return, 4),
+                    "pnl": round(portfolio_return * portfolio_value, 2),
+                    "nifty_return": round(nifty_return, 4) if nifty_return is not None else None,
+                    "proxied": [s.replace(".NS", "") for s, p in zip(symbols, proxied) if p]
+                })
+            except Exception as e:
+                logger.error(f"Stress scenario {key} failed: {e}")
+        return results
+
+    @staticmethod
+    def analyze_positions(positions: List[Dict], paths: Optional[int] = None,
+                          horizons: Optional[List[int]] = None) -> tuple:
+        """
+        Full risk report for a portfolio's positions
+
+        Args:
+            positions: Position lots (symbol, quantity)
+            paths: Monte Carlo paths (clipped to the configured path budget)
+            horizons: Horizons in trading days
+
+        Returns:
+            tuple: (success, message, data)
+        """
+        from services.indicator_service import normalize_symbol
+
+        try:
+            quantities = {}
+            for p in positions:
+                symbol = normalize_symbol(p.get("symbol", ""))
+                quantities[symbol] = quantities.get(symbol, 0.0) + float(p.get("quantity", 0) or 0)
+            symbols = [s for s, q in quantities.items() if q > 0]
+            if not symbols:
+                return False, "No holdings to analyze", None
+
+            horizons = tuple(sorted({int(h) for h in (horizons or DEFAULT_HORIZONS) if 0 < int(h) <= 252}))
+            paths = int(min(max(paths or config.RISK_MC_PATHS, 1000), config.RISK_MC_MAX_PATHS))
+
+            end_date = datetime.now()
+            start_date = end_date - timedelta(days=config.RISK_LOOKBACK_DAYS)
+            data, failed = HistoryLoaderService.load_closes(symbols + [BENCHMARK], start_date, end_date)
+            if data.empty:
+                return False, "Failed to fetch market data for holdings", None
+
+            closes = data.replace(0, np.nan).ffill()
+            returns = closes.pct_change(fill_method=None).iloc[1:]
+
+            # Holdings with too little history can't be simulated
+            counts = returns.count()
+            included = [s for s in symbols if s in returns.columns and counts[s] >= MIN_OBSERVATIONS]
+            excluded = [s for s in symbols if s not in included]
+            if not included:
+                return False, "Insufficient price history for holdings", None
+
+            last_close = closes[included].iloc[-1].to_numpy()
+            values = np.array([quantities[s] for s in included]) * last_close
+            portfolio_value = float(values.sum())
+            weights = values / portfolio_value
+
+            R = returns[included].to_numpy(dtype=np.float64)
+            valid = ~np.isnan(R)
+            held = valid @ weights
+            portfolio_returns = np.nan_to_num(R) @ weights / np.where(held > 0, held, np.nan)
+            portfolio_returns = portfolio_returns[~np.isnan(portfolio_returns)]
+
+            # Betas (for proxying holdings without scenario history)
+            if BENCHMARK in returns.columns:
+                cov = returns[included + [BENCHMARK]].cov(min_periods=MIN_OBSERVATIONS)
+                betas = (cov[BENCHMARK] / cov.loc[BENCHMARK, BENCHMARK])[included].fillna(1.0).to_numpy()
+            else:
+                betas = np.ones(len(included))
+
+            historical = RiskEngineService.historical_var(portfolio_returns, horizons)
+            monte_carlo = RiskEngineService.monte_carlo_var(R, weights, horizons, paths)
+            for stats in list(historical.values()) + list(monte_carlo.values()):
+                for key in [k for k in stats if k.startswith(("var_", "cvar_"))]:
+                    stats[f"{key}_amount"] = round(stats[key] * portfolio_value, 2)
+                    stats[key] = round(stats[key], 4)
+
+            stress = RiskEngineService.stress_test(included, weights, betas, portfolio_value)
+
+            return True, "Risk analysis complete", {
+                "as_of": closes.index[-1].strftime('%Y-%m-%d'),
+                "portfolio_value": round(portfolio_value, 2),
+                "horizons": list(horizons),
+                "confidence_levels": list(CONFIDENCE_LEVELS),
+                "paths": paths,
+                "observations": int(len(portfolio_returns)),
+                "weights": {s.replace('.NS', ''): round(float(w), 4) for s, w in zip(included, weights)},
+                "historical": historical,
+                "monte_carlo": monte_carlo,
+                "stress_scenarios": stress,
+                "excluded": [s.replace('.NS', '') for s in excluded]
+            }
+
+        except Exception as e:
+            logger.error(f"Error in risk analysis: {e}")
+            return False, f"Risk analysis failed: {str(e)}", None
@@ -0,0 +1,278 @@
+"""
+Stock Metadata Service
+Sector / industry / market-cap metadata stored on stock_mappings, so analysis
+requests read it with one indexed query instead of calling yf.Ticker(...).info
+"""
+
+import logging
+import threading
+import time
+import concurrent.futures
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List, Optional
+from pymongo import UpdateOne
+from config import get_config
+from utils.db import get_stock_mappings_collection, get_positions_collection, get_watchlist_collection
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+# Tickers with a background refresh already queued or running
+_pending_refresh = set()
+_pending_lock = threading.Lock()
+
+# Tickers without a stock_mappings document that Yahoo has no metadata for
+# (indices, ETFs, delisted symbols): ticker -> fetched_at
+_negative_cache = {}
+
+
+class RateLimiter:
+    """Spaces calls at least 1/rate seconds apart across threads"""
+
+    def __init__(self, rate_per_second: float):
+        self.interval = 1.0 / rate_per_second
+        self.next_slot = 0.0
+        self.lock = threading.Lock()
+
+    def wait(self):
+        with self.lock:
+            now = time.monotonic()
+            slot = max(now, self.next_slot)
+            self.next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+def _yahoo_symbol(ticker: str) -> str:
+    """Yahoo symbol for a stored ticker (bare NSE tickers need .NS)"""
+    if ticker.startswith("^") or "." in ticker:
+        return ticker
+    return f"{ticker}.NS"
+
+
+def _ticker_variants(ticker: str) -> List[str]:
+    """stock_mappings stores NSE tickers both with and without .NS"""
+    ticker = ticker.upper().strip()
+    if ticker.endswith(".NS"):
+        return [ticker, ticker[:-3]]
+    if "." in ticker or ticker.startswith("^"):
+        return [ticker]
+    return [ticker, f"{ticker}.NS"]
+
+
+class StockMetadataService:
+    """Service for cached company metadata"""
+
+    @staticmethod
+    def get_metadata(tickers: Iterable[str]) -> Dict[str, Dict]:
+        """
+        Get sector, industry and market cap for tickers with one $in query
+
+        Args:
+            tickers: Tickers as the caller knows them (with or without .NS)
+
+        Returns:
+            dict: ticker -> {"sector", "industry", "market_cap", "metadata_updated_at"}
+                  (tickers without stored metadata are omitted)
+        """
+        tickers = [t for t in dict.fromkeys(tickers) if t]
+        variant_to_ticker = {}
+        for t in tickers:
+            for v in _ticker_variants(t):
+                variant_to_ticker.setdefault(v, t)
+
+        if not variant_to_ticker:
+            return {}
+
+        cursor = get_stock_mappings_collection().find(
+            {"ticker": {"$in": list(variant_to_ticker)}},
+            {"_id": 0, "ticker": 1, "sector": 1, "industry": 1, "market_cap": 1, "metadata_updated_at": 1}
+        )
+
+        metadata = {}
+        for doc in cursor:
+            ticker = variant_to_ticker.get(doc["ticker"])
+            if ticker and doc.get("sector") and ticker not in metadata:
+                metadata[ticker] = {
+                    "sector": doc.get("sector"),
+                    "industry": doc.get("industry"),
+                    "market_cap": doc.get("market_cap"),
+                    "metadata_updated_at": doc.get("metadata_updated_at")
+                }
+        return metadata
+
+    @staticmethod
+    def get_sectors(tickers: Iterable[str]) -> Dict[str, str]:
+        """
+        Get sectors for tickers from stock_mappings ("Unknown" when missing)
+
+        Tickers without a stored sector, or with metadata older than
+        STOCK_METADATA_MAX_AGE_DAYS, are queued for a background refresh, so
+        they are filled in for the next request without slowing this one.
+        Tickers Yahoo has no metadata for are remembered for the same period.
+        """
+        tickers = [t for t in dict.fromkeys(tickers) if t]
+        try:
+            metadata = StockMetadataService.get_metadata(tickers)
+        except Exception as e:
+            logger.error(f"Error reading stock metadata: {e}")
+            return {t: "Unknown" for t in tickers}
+
+        stale_before = datetime.utcnow() - timedelta(days=config.STOCK_METADATA_MAX_AGE_DAYS)
+        with _pending_lock:
+            negative = {t for t in tickers if _negative_cache.get(t.upper().strip(), datetime.min) >= stale_before}
+        missing = [
+            t for t in tickers
+            if t not in negative and (t not in metadata or not metadata[t].get("metadata_updated_at")
+                                      or metadata[t]["metadata_updated_at"] < stale_before)
+        ]
+        if missing:
+            StockMetadataService.refresh_in_background(missing)
+
+        return {t: metadata[t]["sector"] if t in metadata else "Unknown" for t in tickers}
+
+    @staticmethod
+    def _fetch_info(ticker: str, limiter: RateLimiter) -> Optional[Dict]:
+        """
+        Fetch metadata for one ticker from Yahoo (rate limited)
+
+        Returns:
+            dict: Metadata; "negative" is True when Yahoo has neither a sector
+                  nor a market cap for the ticker. None if the fetch failed.
+        """
+        import yfinance as yf
+
+        limiter.wait()
+        try:
+            info = yf.Ticker(_yahoo_symbol(ticker)).info or {}
+        except Exception as e:
+            logger.warning(f"Metadata fetch failed for {ticker}: {e}")
+            return None
+
+        return {
+            "sector": info.get("sector") or "Unknown",
+            "industry": info.get("industry"),
+            "market_cap": info.get("marketCap"),
+            "company_name": info.get("longName") or info.get("shortName"),
+            "negative": not info.get("sector") and not info.get("marketCap")
+        }
+
+    @staticmethod
+    def refresh_metadata(tickers: Optional[List[str]] = None, max_age_days: Optional[int] = None) -> int:
+        """
+        Fill missing or stale metadata in bulk
+
+        Yahoo is queried concurrently under a shared rate limit and the
+        results are written back with a single unordered bulk_write.
+
+        Args:
+            tickers: Tickers to refresh; None refreshes everything held or
+                     watched plus stale stock_mappings entries
+            max_age_days: Refetch metadata older than this (default from config)
+
+        Returns:
+            int: Number of tickers updated
+        """
+        max_age_days = max_age_days or config.STOCK_METADATA_MAX_AGE_DAYS
+        mappings_col = get_stock_mappings_collection()
+
+        if tickers is None:
+            tickers = set(get_positions_collection().distinct("symbol"))
+            tickers.update(get_watchlist_collection().distinct("ticker"))
+            tickers = list(tickers)
+            stale_before = datetime.utcnow() - timedelta(days=max_age_days)
+            stale = mappings_col.find(
+                {"$or": [
+                    {"sector": {"$exists": False}},
+                    {"metadata_updated_at": {"$exists": False}},
+                    {"metadata_updated_at": {"$lt": stale_before}}
+                ]},
+                {"_id": 0, "ticker": 1}
+            ).limit(config.STOCK_METADATA_REFRESH_BATCH)
+            tickers.extend(doc["ticker"] for doc in stale)
+
+            # Skip tickers whose metadata is still fresh
+            fresh = StockMetadataService.get_metadata(tickers)
+            tickers = [t for t in dict.fromkeys(tickers)
+                       if t not in fresh or not fresh[t].get("metadata_updated_at")
+                       or fresh[t]["metadata_updated_at"] < stale_before]
+
+        tickers = [t.upper().strip() for t in dict.fromkeys(tickers) if t]
+        if not tickers:
+            return 0
+
+        logger.info(f"Refreshing metadata for {len(tickers)} tickers")
+        limiter = RateLimiter(config.STOCK_METADATA_RATE_LIMIT)
+        results = {}
+        with concurrent.futures.ThreadPoolExecutor(max_workers=config.STOCK_METADATA_WORKERS) as executor:
+            future_to_ticker = {executor.submit(StockMetadataService._fetch_info, t, limiter): t for t in tickers}
+            for future in concurrent.futures.as_completed(future_to_ticker):
+                info = future.result()
+                if info:
+                    results[future_to_ticker[future]] = info
+
+        if not results:
+            return 0
+
+        # Update whichever ticker form is already stored; otherwise create the mapping
+        existing = {doc["ticker"]: doc for doc in mappings_col.find(
+            {"ticker": {"$in": [v for t in results for v in _ticker_variants(t)]}}, {"_id": 0, "ticker": 1, "sector": 1})}
+        now = datetime.utcnow()
+        operations = []
+        for ticker, info in results.items():
+            stored = next((v for v in _ticker_variants(ticker) if v in existing), None)
+            if info["negative"]:
+                # Nothing to store: remember the miss for the metadata TTL so
+                # the ticker isn't looked up again on every request
+                if stored is None:
+                    with _pending_lock:
+                        expired_before = now - timedelta(days=max_age_days)
+                        for t in [t for t, fetched_at in _negative_cache.items() if fetched_at < expired_before]:
+                            del _negative_cache[t]
+                        _negative_cache[ticker] = now
+                else:
+                    update = {"metadata_updated_at": now}
+                    if not existing[stored].get("sector"):
+                        update["sector"] = "Unknown"
+                    operations.append(UpdateOne({"ticker": stored}, {"$set": update}))
+                continue
+            stored = stored or ticker
+            operations.append(UpdateOne(
+                {"ticker": stored},
+                {
+                    "$set": {
+                        "sector": info["sector"],
+                        "industry": info["industry"],
+                        "market_cap": info["market_cap"],
+                        "metadata_updated_at": now
+                    },
+                    "$setOnInsert": {"company_name": info["company_name"] or ticker}
+                },
+                upsert=True
+            ))
+
+        if not operations:
+            return 0
+        mappings_col.bulk_write(operations, ordered=False)
+        logger.info(f"Stored metadata for {len(operations)} tickers")
+        return len(operations)
+
+    @staticmethod
+    def refresh_in_background(tickers: List[str]):
+        """Queue a metadata refresh for tickers on a daemon thread (deduplicated)"""
+        with _pending_lock:
+            new = [t for t in tickers if t not in _pending_refresh]
+            _pending_refresh.update(new)
+        if not new:
+            return
+
+        def run():
+            try:
+                StockMetadataService.refresh_metadata(new)
+            except Exception as e:
+                logger.error(f"Background metadata refresh failed: {e}")
+            finally:
+                with _pending_lock:
+                    _pending_refresh.difference_update(new)
+
+        threading.Thread(target=run, name="stock-metadata-refresh", daemon=True).start()
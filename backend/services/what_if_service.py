@@ -0,0 +1,237 @@
+"""
+What-If Service
+Hypothetical trade scenarios on a portfolio's holdings. Each trade is a
+rank-1 update of the holdings value vector v, so Cv, v'Cv and the beta /
+expected-return dot products are updated in O(n) over the cached
+covariance estimates instead of rerunning the full analysis. The holdings'
+estimates are the optimizer's cached ones; the benchmark and traded
+symbols outside the holdings are appended as extra columns
+"""
+
+import logging
+from datetime import datetime, date
+from typing import Dict, List, Optional
+import numpy as np
+from config import get_config
+from services.indicator_service import normalize_symbol, BENCHMARK
+from services.portfolio_optimizer_service import PortfolioOptimizerService, RISK_FREE_RATE
+from services.stock_metadata_service import StockMetadataService
+from services.mf_portfolio_service import MFPortfolioService
+
+logger = logging.getLogger(__name__)
+config = get_config()
+
+
+class WhatIfService:
+    """Service for hypothetical trade scenarios"""
+
+    @staticmethod
+    def parse_scenarios(scenarios) -> List[Dict]:
+        """
+        Validate scenarios from a request body
+
+        Each scenario is {"name", "trades": [{"symbol", "amount" | "quantity"}]};
+        positive amounts / quantities buy, negative ones sell.
+
+        Raises:
+            ValueError: If the scenarios are malformed
+        """
+        if not isinstance(scenarios, list) or not scenarios:
+            raise ValueError("scenarios must be a non-empty list")
+        if len(scenarios) > config.WHAT_IF_MAX_SCENARIOS:
+            raise ValueError(f"At most {config.WHAT_IF_MAX_SCENARIOS} scenarios per request")
+
+        parsed = []
+        for i, scenario in enumerate(scenarios):
+            trades = scenario.get("trades") if isinstance(scenario, dict) else None
+            if not isinstance(trades, list) or not trades:
+                raise ValueError(f"Scenario {i + 1} needs a non-empty trades list")
+            clean = []
+            for trade in trades:
+                if not isinstance(trade, dict) or not trade.get("symbol"):
+                    raise ValueError(f"Scenario {i + 1}: every trade needs a symbol")
+                try:
+                    amount = float(trade["amount"]) if trade.get("amount") is not None else None
+                    quantity = float(trade["quantity"]) if trade.get("quantity") is not None else None
+                except (TypeError, ValueError):
+                    raise ValueError(f"Scenario {i + 1}: amount and quantity must be numbers")
+                if (amount is None) == (quantity is None) or (amount or quantity) == 0:
+                    raise ValueError(f"Scenario {i + 1}: give a non-zero amount or quantity for {trade['symbol']}")
+                clean.append({"symbol": normalize_symbol(trade["symbol"]), "amount": amount, "quantity": quantity})
+            parsed.append({"name": scenario.get("name") or f"Scenario {i + 1}", "trades": clean})
+        return parsed
+
+    @staticmethod
+    def _projected_xirr(flow_days: np.ndarray, flow_amounts: np.ndarray, values: np.ndarray,
+                        mu: np.ndarray, today_offset: float, trade_flow: float = 0.0) -> Optional[float]:
+        """
+        XIRR of the historical buys, today's trades and the holdings value
+        projected WHAT_IF_HORIZON_DAYS ahead at their expected returns
+        """
+        horizon = config.WHAT_IF_HORIZON_DAYS
+        terminal = float(values @ np.exp(mu * horizon / 365.0))
+        days = np.concatenate([flow_days, [today_offset, today_offset + horizon]])
+        amounts = np.concatenate([flow_amounts, [trade_flow, terminal]])
+        keep = amounts != 0
+        return MFPortfolioService.calculate_xirr_arrays(days[keep], amounts[keep])
+
+    @staticmethod
+    def simulate(positions: List[Dict], scenarios: List[Dict]) -> tuple:
+        """
+        Compare hypothetical trade scenarios against current holdings
+
+        Args:
+            positions: Position lots (symbol, quantity, buy_date, invested_amount)
+            scenarios: Scenarios from parse_scenarios
+
+        Returns:
+            tuple: (success, message, data) with base metrics and, per scenario,
+                   the executed trades, resulting metrics and changes
+        """
+        try:
+            holdings = {}
+            for p in positions:
+                symbol = normalize_symbol(p.get("symbol", ""))
+                holdings[symbol] = holdings.get(symbol, 0.0) + float(p.get("quantity", 0) or 0)
+
+            held = [s for s, q in holdings.items() if q > 0]
+            extra = [BENCHMARK] + [t["symbol"] for scenario in scenarios for t in scenario["trades"]]
+
+            estimates = PortfolioOptimizerService.get_estimates(held) if held else None
+            if estimates is not None:
+                estimates = PortfolioOptimizerService.extend_estimates(estimates, extra)
+            if estimates is None or BENCHMARK not in estimates["symbols"]:
+                return False, "Insufficient price history for what-if analysis", None
+
+            symbols = estimates["symbols"]
+            index = {s: i for i, s in enumerate(symbols)}
+            cov, mu, prices = estimates["cov"], estimates["mu"], estimates["last_close"]
+            sample_cov = estimates["sample_cov"]
+            b = index[BENCHMARK]
+            betas = sample_cov[:, b] / sample_cov[b, b]
+
+            values = np.array([max(holdings.get(s, 0.0), 0.0) * prices[i] for i, s in enumerate(symbols)])
+            values[b] = 0.0  # The index itself is a benchmark, not a holding
+            if values.sum() <= 0:
+                return False, "No priced holdings to simulate", None
+
+            tickers = [s.replace(".NS", "") for s in symbols]
+            sectors = StockMetadataService.get_sectors(tickers)
+            sector_of = [sectors.get(t, "Unknown") for t in tickers]
+
+            # Historical buys of priced holdings, as day offsets from the first buy
+            today = date.today()
+            flows = []
+            for p in positions:
+                try:
+                    buy_dt = datetime.strptime(p["buy_date"], "%Y-%m-%d").date()
+                except (KeyError, TypeError, ValueError):
+                    continue
+                if normalize_symbol(p.get("symbol", "")) in index and float(p.get("invested_amount", 0) or 0) > 0:
+                    flows.append((buy_dt, -float(p["invested_amount"])))
+            origin = min([d for d, _ in flows] + [today])
+            flow_days = np.array([(d - origin).days for d, _ in flows], dtype=np.float64)
+            flow_amounts = np.array([a for _, a in flows], dtype=np.float64)
+            today_offset = float((today - origin).days)
+
+            Cv = cov @ values
+            base_state = {
+                "values": values, "Cv": Cv, "vCv": float(values @ Cv),
+                "beta_v": float(betas @ values), "mu_v": float(mu @ values), "cash": 0.0
+            }
+
+            def describe(state):
+                v = state["values"]
+                total = float(v.sum())
+                vol = np.sqrt(max(state["vCv"], 0.0)) / total
+                ret = state["mu_v"] / total
+                sector_values = {}
+                for i in np.flatnonzero(v > 0):
+                    sector_values[sector_of[i]] = sector_values.get(sector_of[i], 0.0) + v[i]
+                xirr = WhatIfService._projected_xirr(flow_days, flow_amounts, v, mu, today_offset, state["cash"])
+                return {
+                    "total_value": round(total, 2),
+                    "beta": round(float(state["beta_v"] / total), 2),
+                    "volatility": round(float(vol), 4),
+                    "expected_return": round(float(ret), 4),
+                    "sharpe_ratio": round(float((ret - RISK_FREE_RATE) / vol), 2) if vol > 0 else 0.0,
+                    "projected_xirr_percent": round(xirr, 2) if xirr is not None else None,
+                    "sector_allocation": sorted(
+                        [{"name": name, "value": round(float(val / total * 100), 1)} for name, val in sector_values.items()],
+                        key=lambda x: x["value"], reverse=True
+                    )
+                }
+
+            base = describe(base_state)
+            results = []
+            for scenario in scenarios:
+                state = {
+                    "values": base_state["values"].copy(), "Cv": base_state["Cv"].copy(),
+                    "vCv": base_state["vCv"], "beta_v": base_state["beta_v"],
+                    "mu_v": base_state["mu_v"], "cash": 0.0
+                }
+                executed, error = [], None
+                for trade in scenario["trades"]:
+                    j = index.get(trade["symbol"])
+                    ticker = trade["symbol"].replace(".NS", "")
+                    if j is None:
+                        error = f"No price history for {ticker}"
+                        break
+                    if j == b:
+                        error = f"{ticker} is the benchmark index and cannot be traded"
+                        break
+                    shares = trade["quantity"] if trade["quantity"] is not None else trade["amount"] / prices[j]
+                    shares = float(np.round(shares))
+                    if shares == 0:
+                        error = f"{ticker}: trade is smaller than one share ({round(float(prices[j]), 2)})"
+                        break
+                    a = shares * prices[j]
+                    if state["values"][j] + a < -1e-6:
+                        error = f"{ticker}: cannot sell more than is held"
+                        break
+
+                    # Rank-1 update v -> v + a e_j
+                    state["vCv"] += 2 * a * state["Cv"][j] + a * a * cov[j, j]
+                    state["Cv"] += a * cov[:, j]
+                    state["beta_v"] += a * betas[j]
+                    state["mu_v"] += a * mu[j]
+                    state["values"][j] = max(state["values"][j] + a, 0.0)
+                    state["cash"] -= a
+                    executed.append({
+                        "ticker": ticker,
+                        "action": "BUY" if shares > 0 else "SELL",
+                        "shares": abs(int(shares)),
+                        "value": round(float(abs(a)), 2),
+                        "price": round(float(prices[j]), 2)
+                    })
+
+                if error is None and state["values"].sum() <= 0:
+                    error = "Scenario sells every holding"
+                if error:
+                    results.append({"name": scenario["name"], "error": error})
+                    continue
+
+                metrics = describe(state)
+                results.append({
+                    "name": scenario["name"],
+                    "trades": executed,
+                    "metrics": metrics,
+                    "change": {
+                        key: (round(metrics[key] - base[key], 4)
+                              if metrics[key] is not None and base[key] is not None else None)
+                        for key in ("total_value", "beta", "volatility", "expected_return",
+                                    "sharpe_ratio", "projected_xirr_percent")
+                    }
+                })
+
+            return True, "What-if analysis complete", {
+                "as_of": estimates["as_of"],
+                "horizon_days": config.WHAT_IF_HORIZON_DAYS,
+                "excluded": [s.replace(".NS", "") for s, q in holdings.items() if q > 0 and s not in index],
+                "base": base,
+                "scenarios": results
+            }
+
+        except Exception as e:
+            logger.error(f"Error in what-if analysis: {e}")
+            return False, f"What-if analysis failed: {str(e)}", None
@@ -154,6 +154,12 @@ def create_collections_and_indexes():
         )
         print("    ✓ Created index: name")
         
+        mappings_col.create_index(
+            [("metadata_updated_at", ASCENDING)],
+            name="metadata_updated_at_idx"
+        )
+        print("    ✓ Created index: metadata_updated_at (stale metadata refresh)")
+        
         print("✓ 'stock_mappings' collection setup complete!\n")
         
         # ==================== NEWS COLLECTION ====================
@@ -174,6 +180,91 @@ def create_collections_and_indexes():
         
         print("✓ 'company_news' collection setup complete!\n")
         
+        # ==================== NEWS ARTICLES COLLECTION ====================
+        print("Setting up 'news_articles' collection...")
+        articles_col = db['news_articles']
+        
+        articles_col.create_index(
+            [("url_hash", ASCENDING)],
+            unique=True,
+            name="url_hash_unique_idx"
+        )
+        print("    ✓ Created unique index: url_hash")
+        
+        articles_col.create_index(
+            [("tickers", ASCENDING), ("published_at", DESCENDING), ("url_hash", DESCENDING)],
+            name="tickers_published_idx"
+        )
+        print("    ✓ Created index: tickers + published_at (day filters, cursor pagination)")
+        
+        articles_col.create_index(
+            [("expires_at", ASCENDING)],
+            expireAfterSeconds=0,
+            name="expires_at_ttl_idx"
+        )
+        print("    ✓ Created TTL index: expires_at (per article)")
+        
+        print("✓ 'news_articles' collection setup complete!\n")
+        
+        # ==================== STOCK INDICATORS COLLECTION ====================
+        print("Setting up 'stock_indicators' collection...")
+        indicators_col = db['stock_indicators']
+        
+        indicators_col.create_index(
+            [("symbol", ASCENDING)],
+            unique=True,
+            name="symbol_unique_idx"
+        )
+        print("    ✓ Created unique index: symbol")
+        
+        indicators_col.create_index(
+            [("rsi", ASCENDING)],
+            name="rsi_idx"
+        )
+        print("    ✓ Created index: rsi (indicator screens)")
+        
+        indicators_col.create_index(
+            [("trend", ASCENDING), ("rsi", ASCENDING)],
+            name="trend_rsi_idx"
+        )
+        print("    ✓ Created index: trend + rsi")
+        
+        print("✓ 'stock_indicators' collection setup complete!\n")
+        
+        # ==================== ANALYSIS JOBS COLLECTION ====================
+        print("Setting up 'analysis_jobs' collection...")
+        jobs_col = db['analysis_jobs']
+        
+        jobs_col.create_index(
+            [("job_id", ASCENDING)],
+            unique=True,
+            name="job_id_unique_idx"
+        )
+        print("    ✓ Created unique index: job_id")
+        
+        jobs_col.create_index(
+            [("fingerprint", ASCENDING), ("user_email", ASCENDING), ("created_at", DESCENDING)],
+            name="fingerprint_user_idx"
+        )
+        print("    ✓ Created index: fingerprint + user_email + created_at")
+        
+        jobs_col.create_index(
+            [("fingerprint", ASCENDING), ("user_email", ASCENDING)],
+            unique=True,
+            partialFilterExpression={"active": True},
+            name="active_fingerprint_unique_idx"
+        )
+        print("    ✓ Created unique partial index: fingerprint + user_email (active jobs)")
+        
+        jobs_col.create_index(
+            [("expires_at", ASCENDING)],
+            expireAfterSeconds=0,
+            name="expires_at_ttl_idx"
+        )
+        print("    ✓ Created TTL index: expires_at")
+        
+        print("✓ 'analysis_jobs' collection setup complete!\n")
+        
         # ==================== SUMMARY ====================
         print("=" * 60)
         print("SETUP COMPLETE!")
@@ -184,9 +275,12 @@ def create_collections_and_indexes():
         print("  ✓ watchlists")
         print("  ✓ stock_mappings")
         print("  ✓ company_news")
+        print("  ✓ news_articles")
+        print("  ✓ stock_indicators")
+        print("  ✓ analysis_jobs")
         
         print("\nCollection Statistics:")
-        for collection_name in ['portfolio_positions', 'users', 'watchlists', 'stock_mappings', 'company_news']:
+        for collection_name in ['portfolio_positions', 'users', 'watchlists', 'stock_mappings', 'company_news', 'news_articles', 'stock_indicators', 'analysis_jobs']:
             col = db[collection_name]
             count = col.count_documents({})
             indexes = len(col.list_indexes())
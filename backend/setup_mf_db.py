@@ -56,6 +56,19 @@ def setup_mf_collections():
     
     print("   ✓ Indexes created for user_mf_watchlists")
     
+    # Collection 3: mf_sips (SIP schedules, expanded into installments at read time)
+    print("\n3. Setting up 'mf_sips' collection...")
+    mf_sips_col = db['mf_sips']
+    
+    print("   Creating indexes...")
+    mf_sips_col.create_index([("sip_id", ASCENDING)], unique=True)
+    mf_sips_col.create_index([
+        ("user_email", ASCENDING),
+        ("portfolio_id", ASCENDING)
+    ])
+    
+    print("   ✓ Indexes created for mf_sips")
+    
     # Show collection stats
     print("\n" + "="*60)
     print("SETUP COMPLETE!")
@@ -64,6 +77,7 @@ def setup_mf_collections():
     print("\nCollections created:")
     print(f"  1. mf_watchlist - Stores individual mutual fund entries")
     print(f"  2. user_mf_watchlists - Stores MF watchlist metadata")
+    print(f"  3. mf_sips - Stores MF SIP schedules")
     
     print("\nCollection Structure:")
     print("\n  mf_watchlist document:")
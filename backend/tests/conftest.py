@@ -0,0 +1,11 @@
+"""
+Shared pytest setup: makes the backend packages importable the same way
+app.py sees them (services.*, utils.*, config)
+"""
+
+import os
+import sys
+
+backend_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if backend_dir not in sys.path:
+    sys.path.insert(0, backend_dir)
@@ -0,0 +1,49 @@
+"""
+Tests for normalize_timestamp: every format lands on naive UTC with the
+right confidence
+"""
+
+from datetime import datetime, timezone, timedelta
+
+import pytest
+
+from utils.date_utils import (
+    CONFIDENCE_HIGH, CONFIDENCE_LOW, CONFIDENCE_MEDIUM, CONFIDENCE_NONE, normalize_timestamp
+)
+
+UTC_10AM = datetime(2024, 12, 4, 10, 0, 0)
+IST_10AM = datetime(2024, 12, 4, 4, 30, 0)
+
+
+@pytest.mark.parametrize("value,expected", [
+    ("Wed, 04 Dec 2024 10:00:00 GMT", UTC_10AM),
+    ("Wed, 04 Dec 2024 10:00:00 +0000", UTC_10AM),
+    ("Wed, 04 Dec 2024 10:00:00 +0530", IST_10AM),
+    ("Wed, 04 Dec 2024 10:00:00 IST", IST_10AM),
+    ("2024-12-04T10:00:00Z", UTC_10AM),
+    ("2024-12-04T10:00:00+05:30", IST_10AM),
+    (datetime(2024, 12, 4, 10, 0, tzinfo=timezone(timedelta(hours=5, minutes=30))), IST_10AM),
+])
+def test_zoned_timestamps_are_high_confidence_utc(value, expected):
+    assert normalize_timestamp(value) == (expected, CONFIDENCE_HIGH)
+
+
+@pytest.mark.parametrize("value", ["2024-12-04 10:00:00", "Wed, 04 Dec 2024 10:00:00"])
+def test_timestamps_without_zone_are_taken_as_utc(value):
+    assert normalize_timestamp(value) == (UTC_10AM, CONFIDENCE_MEDIUM)
+
+
+def test_free_form_ist_falls_back_to_dateutil():
+    assert normalize_timestamp("December 4, 2024 10:00 AM IST") == (IST_10AM, CONFIDENCE_MEDIUM)
+
+
+def test_relative_phrases_use_reference_time():
+    now = datetime(2024, 12, 4, 12, 0, 0)
+
+    assert normalize_timestamp("2 hours ago", now=now) == (UTC_10AM, CONFIDENCE_LOW)
+    assert normalize_timestamp("yesterday", now=now) == (now - timedelta(days=1), CONFIDENCE_LOW)
+
+
+@pytest.mark.parametrize("value", [None, "", "Unknown", "not a date", 42])
+def test_unusable_values(value):
+    assert normalize_timestamp(value) == (None, CONFIDENCE_NONE)
@@ -0,0 +1,193 @@
+"""
+Tests for HistoryLoaderService: close extraction from each yf.download
+column layout, chunking, and the retry / partial-failure path
+
+The yfinance frames are synthetic: built by hand in the three column
+layouts yf.download returns, not captured from live responses.
+"""
+
+from datetime import datetime
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from services import history_loader_service as loader_module
+from services.history_loader_service import HistoryLoaderService
+
+START = datetime(2024, 1, 1)
+END = datetime(2024, 1, 6)
+DATES = pd.to_datetime(["2024-01-01", "2024-01-02", "2024-01-03"])
+FIELDS = ["Close", "High", "Low", "Open", "Volume"]
+
+# Synthetic closes for RELIANCE.NS / TCS.NS (2024-01-01..03)
+CLOSES = {
+    "RELIANCE.NS": [2584.95, 2602.55, 2578.20],
+    "TCS.NS": [3813.25, 3742.95, 3714.60],
+}
+
+
+def _ohlcv(close):
+    return {"Close": close, "High": close * 1.01, "Low": close * 0.99, "Open": close, "Volume": 1_000_000.0}
+
+
+def flat_frame(symbol="RELIANCE.NS"):
+    """Single ticker, group_by='column' in older yfinance: flat OHLCV columns"""
+    data = {field: [_ohlcv(c)[field] for c in CLOSES[symbol]] for field in FIELDS}
+    return pd.DataFrame(data, index=pd.DatetimeIndex(DATES, name="Date"))
+
+
+def field_ticker_frame(symbols=("RELIANCE.NS", "TCS.NS")):
+    """(Price, Ticker) MultiIndex: yf.download(..., group_by='column')"""
+    columns = pd.MultiIndex.from_product([FIELDS, list(symbols)], names=["Price", "Ticker"])
+    rows = [[_ohlcv(CLOSES[s][i])[f] for f in FIELDS for s in symbols] for i in range(len(DATES))]
+    return pd.DataFrame(rows, index=pd.DatetimeIndex(DATES, name="Date"), columns=columns)
+
+
+def ticker_field_frame(symbols=("RELIANCE.NS", "TCS.NS")):
+    """(Ticker, Price) MultiIndex: yf.download(..., group_by='ticker')"""
+    columns = pd.MultiIndex.from_product([list(symbols), FIELDS], names=["Ticker", "Price"])
+    rows = [[_ohlcv(CLOSES[s][i])[f] for s in symbols for f in FIELDS] for i in range(len(DATES))]
+    return pd.DataFrame(rows, index=pd.DatetimeIndex(DATES, name="Date"), columns=columns)
+
+
+@pytest.fixture
+def loader_config(monkeypatch):
+    """Small chunks, two retries and no real sleeping"""
+    monkeypatch.setattr(loader_module.config, "HISTORY_CHUNK_SIZE", 2)
+    monkeypatch.setattr(loader_module.config, "HISTORY_MAX_WORKERS", 2)
+    monkeypatch.setattr(loader_module.config, "HISTORY_RETRIES", 2)
+    sleeps = []
+    monkeypatch.setattr(loader_module.time, "sleep", sleeps.append)
+    return sleeps
+
+
+def fake_closes(symbols):
+    """Close matrix as _download_chunk returns it for symbols"""
+    return pd.DataFrame({s: np.float32(100 + i) for i, s in enumerate(symbols)}, index=DATES).astype(np.float32)
+
+
+# ---------------------------------------------------------------- extract_closes
+
+def test_extract_flat_single_ticker():
+    closes = HistoryLoaderService.extract_closes(flat_frame(), ["RELIANCE.NS"])
+
+    assert list(closes.columns) == ["RELIANCE.NS"]
+    assert closes.dtypes.iloc[0] == np.float32
+    np.testing.assert_allclose(closes["RELIANCE.NS"], CLOSES["RELIANCE.NS"], rtol=1e-6)
+
+
+@pytest.mark.parametrize("frame", [field_ticker_frame, ticker_field_frame])
+def test_extract_multiindex_layouts(frame):
+    closes = HistoryLoaderService.extract_closes(frame(), ["TCS.NS", "RELIANCE.NS"])
+
+    # Request order, not download order
+    assert list(closes.columns) == ["TCS.NS", "RELIANCE.NS"]
+    assert (closes.dtypes == np.float32).all()
+    for symbol, values in CLOSES.items():
+        np.testing.assert_allclose(closes[symbol], values, rtol=1e-6)
+
+
+def test_extract_drops_symbols_without_closes():
+    raw = field_ticker_frame()
+    raw[("Close", "TCS.NS")] = np.nan
+
+    closes = HistoryLoaderService.extract_closes(raw, ["RELIANCE.NS", "TCS.NS", "INFY.NS"])
+
+    assert list(closes.columns) == ["RELIANCE.NS"]
+
+
+def test_extract_normalizes_tz_aware_index():
+    raw = field_ticker_frame()
+    raw.index = (raw.index + pd.Timedelta(hours=9, minutes=15)).tz_localize("Asia/Kolkata")
+
+    closes = HistoryLoaderService.extract_closes(raw, ["RELIANCE.NS", "TCS.NS"])
+
+    assert closes.index.tz is None
+    assert list(closes.index) == list(DATES)
+
+
+@pytest.mark.parametrize("raw", [None, pd.DataFrame(), flat_frame().drop(columns=["Close"])])
+def test_extract_without_closes_is_empty(raw):
+    assert HistoryLoaderService.extract_closes(raw, ["RELIANCE.NS"]).empty
+
+
+def test_extract_flat_frame_needs_single_symbol():
+    assert HistoryLoaderService.extract_closes(flat_frame(), ["RELIANCE.NS", "TCS.NS"]).empty
+
+
+# ---------------------------------------------------------------- load_closes
+
+def test_load_closes_downloads_in_chunks(monkeypatch, loader_config):
+    calls = []
+
+    def download(symbols, start_date, end_date):
+        calls.append(list(symbols))
+        return fake_closes(symbols)
+
+    monkeypatch.setattr(HistoryLoaderService, "_download_chunk", staticmethod(download))
+    symbols = ["A.NS", "B.NS", "C.NS", "D.NS", "E.NS", "A.NS"]
+
+    closes, failed = HistoryLoaderService.load_closes(symbols, START, END)
+
+    assert sorted(calls) == [["A.NS", "B.NS"], ["C.NS", "D.NS"], ["E.NS"]]
+    assert list(closes.columns) == ["A.NS", "B.NS", "C.NS", "D.NS", "E.NS"]
+    assert (closes.dtypes == np.float32).all()
+    assert failed == []
+    assert loader_config == []
+
+
+def test_load_closes_retries_only_failed_symbols(monkeypatch, loader_config):
+    calls = []
+
+    def download(symbols, start_date, end_date):
+        calls.append(list(symbols))
+        # B.NS comes back on the first retry; D.NS never does
+        available = [s for s in symbols if s in ("A.NS", "C.NS") or (s == "B.NS" and len(calls) > 2)]
+        return fake_closes(available) if available else pd.DataFrame(dtype=np.float32)
+
+    monkeypatch.setattr(HistoryLoaderService, "_download_chunk", staticmethod(download))
+
+    closes, failed = HistoryLoaderService.load_closes(["A.NS", "B.NS", "C.NS", "D.NS"], START, END)
+
+    assert sorted(calls[:2]) == [["A.NS", "B.NS"], ["C.NS", "D.NS"]]
+    assert calls[2:] == [["B.NS", "D.NS"], ["D.NS"]]
+    assert list(closes.columns) == ["A.NS", "B.NS", "C.NS"]
+    assert failed == ["D.NS"]
+    assert loader_config == [1.0, 2.0]
+
+
+def test_load_closes_all_failed(monkeypatch, loader_config):
+    monkeypatch.setattr(HistoryLoaderService, "_download_chunk",
+                        staticmethod(lambda symbols, start_date, end_date: pd.DataFrame(dtype=np.float32)))
+
+    closes, failed = HistoryLoaderService.load_closes(["A.NS", "B.NS"], START, END)
+
+    assert closes.empty
+    assert failed == ["A.NS", "B.NS"]
+    assert len(loader_config) == 2
+
+
+def test_download_chunk_swallows_errors(monkeypatch):
+    def boom(*args, **kwargs):
+        raise ConnectionError("rate limited")
+
+    monkeypatch.setattr(loader_module.yf, "download", boom)
+
+    assert HistoryLoaderService._download_chunk(["A.NS"], START, END).empty
+
+
+def test_download_chunk_extracts_downloaded_frame(monkeypatch):
+    requested = {}
+
+    def download(symbols, **kwargs):
+        requested.update(kwargs, symbols=symbols)
+        return field_ticker_frame()
+
+    monkeypatch.setattr(loader_module.yf, "download", download)
+
+    closes = HistoryLoaderService._download_chunk(["RELIANCE.NS", "TCS.NS"], START, END)
+
+    assert requested["symbols"] == ["RELIANCE.NS", "TCS.NS"]
+    assert requested["group_by"] == "column"
+    assert list(closes.columns) == ["RELIANCE.NS", "TCS.NS"]
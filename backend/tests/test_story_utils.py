@@ -0,0 +1,116 @@
+"""
+Tests for story clustering: syndicated copies of one story cluster, while
+formulaic headlines about different events do not
+"""
+
+import pytest
+
+from utils.story_utils import (
+    SIMILARITY_THRESHOLD, NearDuplicateIndex, estimate_similarity, minhash_signature, shingles
+)
+
+
+def signature(article):
+    return minhash_signature(shingles(article['title'], article.get('content')))
+
+
+def clustered(a, b):
+    """Whether b joins a's story in a fresh index"""
+    index = NearDuplicateIndex()
+    sig_a, sig_b = signature(a), signature(b)
+    if sig_a is None or sig_b is None:
+        return False
+    index.add('a', sig_a)
+    return index.match(sig_b) is not None
+
+
+INFOSYS_LEAD = (
+    "IT services major Infosys on Monday said it has signed a $1.5 billion deal with a global "
+    "company to provide AI-led digital experiences and business process services over 15 years. "
+    "The deal is expected to start in the current fiscal, the Bengaluru-headquartered company said "
+    "in a regulatory filing, adding that it would build on its existing relationship with the client."
+)
+
+DIFFERENT_EVENTS = [
+    pytest.param(
+        {'title': "TCS shares rise 2% after Q2 results",
+         'content': "Shares of Tata Consultancy Services rose 2 per cent in early trade on Friday after the "
+                    "IT major reported a better-than-expected 8.7 per cent rise in September quarter net "
+                    "profit and announced an interim dividend of Rs 10 per share for shareholders."},
+        {'title': "TCS shares fall 2% after Q2 results",
+         'content': "Shares of Tata Consultancy Services fell 2 per cent on Thursday as the company's "
+                    "second-quarter revenue missed street estimates, with weak deal wins in North America "
+                    "and cautious commentary on discretionary spending weighing on investor sentiment."},
+        id="rise-vs-fall",
+    ),
+    pytest.param(
+        {'title': "Sensex, Nifty open higher; TCS, Infosys gain",
+         'content': "Equity benchmark indices Sensex and Nifty opened higher on Tuesday, tracking firm "
+                    "global cues and fresh foreign fund inflows. The 30-share BSE Sensex climbed 310 points "
+                    "in early trade, while IT heavyweights TCS and Infosys were among the top gainers."},
+        {'title': "Sensex, Nifty open lower; TCS, Infosys fall",
+         'content': "Equity benchmark indices Sensex and Nifty opened lower on Wednesday amid weak Asian "
+                    "markets and continued foreign fund outflows. The 30-share BSE Sensex declined 255 points "
+                    "in early trade, dragged down by losses in IT stocks TCS and Infosys."},
+        id="higher-vs-lower",
+    ),
+    pytest.param(
+        {'title': "HDFC Bank board approves dividend",
+         'content': "The board of HDFC Bank on Saturday recommended a final dividend of Rs 19.50 per equity "
+                    "share for the financial year, subject to shareholder approval at the annual general "
+                    "meeting, the private sector lender said in an exchange filing."},
+        {'title': "HDFC Bank board approves bonus issue",
+         'content': "The board of HDFC Bank on Saturday approved its first-ever bonus issue of shares in the "
+                    "ratio of 1:1, meaning shareholders will get one additional share for every share held "
+                    "on the record date, the private sector lender said in an exchange filing."},
+        id="dividend-vs-bonus",
+    ),
+]
+
+
+@pytest.mark.parametrize("a,b", DIFFERENT_EVENTS)
+def test_different_events_are_not_clustered(a, b):
+    assert not clustered(a, b)
+    assert not clustered(b, a)
+
+
+def test_syndicated_copies_are_clustered():
+    a = {'title': "Infosys wins $1.5 billion deal from global firm", 'content': INFOSYS_LEAD}
+    b = {'title': "Infosys bags $1.5-bn deal", 'content': INFOSYS_LEAD}
+
+    assert clustered(a, b)
+    assert estimate_similarity(signature(a), signature(b)) >= SIMILARITY_THRESHOLD
+
+
+def test_headline_repeated_in_feed_description_is_not_a_lead():
+    title = "Infosys bags $1.5-bn deal"
+
+    assert shingles(title, title) == set()
+    assert shingles(title, f"{title} - Economic Times") == set()
+    assert shingles(title, None) == set()
+
+
+def test_same_headline_without_lead_is_not_clustered():
+    a = {'title': "TCS shares rise 2% after Q2 results", 'content': "TCS shares rise 2% after Q2 results"}
+
+    assert signature(a) is None
+    assert not clustered(a, dict(a))
+
+
+def test_lead_repeating_title_is_stripped():
+    with_title = shingles("Infosys bags $1.5-bn deal", "Infosys bags $1.5-bn deal " + INFOSYS_LEAD)
+
+    assert with_title == shingles("Infosys bags $1.5-bn deal", INFOSYS_LEAD)
+
+
+def test_index_returns_best_match():
+    index = NearDuplicateIndex()
+    a = {'title': "Infosys wins $1.5 billion deal from global firm", 'content': INFOSYS_LEAD}
+    other = DIFFERENT_EVENTS[2].values[0]
+    index.add('infosys', signature(a))
+    index.add('hdfc', signature(other))
+
+    key, score = index.match(signature({'title': "Infosys bags $1.5-bn deal", 'content': INFOSYS_LEAD}))
+
+    assert key == 'infosys'
+    assert score >= SIMILARITY_THRESHOLD
@@ -0,0 +1,123 @@
+"""
+Chart payload utilities
+
+Compact (column-oriented) encodings for chart series and matrices, and
+largest-triangle-three-buckets (LTTB) downsampling for time series
+"""
+
+import numpy as np
+
+COMPACT_FORMAT = 'compact'
+MAX_CHART_POINTS = 2000
+
+
+def parse_chart_args(args):
+    """
+    Read the opt-in chart options from request args
+
+    Args:
+        args: request.args
+
+    Returns:
+        tuple: (compact: bool, points: int or None)
+
+    Raises:
+        ValueError: If format or points is invalid
+    """
+    fmt = (args.get('format') or 'rows').lower()
+    if fmt not in ('rows', COMPACT_FORMAT):
+        raise ValueError("format must be 'rows' or 'compact'")
+
+    points = args.get('points')
+    if points in (None, ''):
+        return fmt == COMPACT_FORMAT, None
+    try:
+        points = int(points)
+    except ValueError:
+        raise ValueError("points must be an integer")
+    if not 3 <= points <= MAX_CHART_POINTS:
+        raise ValueError(f"points must be between 3 and {MAX_CHART_POINTS}")
+    return fmt == COMPACT_FORMAT, points
+
+
+def lttb_indices(y, threshold):
+    """
+    Indices kept by largest-triangle-three-buckets downsampling
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the next bucket's average. With several series (y of shape (n, k)) the
+    triangle areas are summed over series so all lines share one x axis.
+
+    Args:
+        y: Values, shape (n,) or (n, k); x is the position 0..n-1
+        threshold: Number of points to keep
+
+    Returns:
+        ndarray: Sorted indices into y
+    """
+    y = np.asarray(y, dtype=np.float64)
+    if y.ndim == 1:
+        y = y[:, None]
+    n = y.shape[0]
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+
+    y = np.nan_to_num(y)
+    x = np.arange(n, dtype=np.float64)
+    # Bucket boundaries for the n - 2 interior points
+    edges = np.floor(np.linspace(1, n - 1, threshold - 1)).astype(int)
+    csum = np.vstack([np.zeros((1, y.shape[1])), np.cumsum(y, axis=0)])
+
+    kept = np.empty(threshold, dtype=int)
+    kept[0], kept[-1] = 0, n - 1
+    a = 0
+    for b in range(threshold - 2):
+        lo, hi = edges[b], edges[b + 1]
+        # Average of the next bucket (the last point for the final bucket)
+        if b + 2 < len(edges):
+            nlo, nhi = edges[b + 1], edges[b + 2]
+            avg_x = (nlo + nhi - 1) / 2.0
+            avg_y = (csum[nhi] - csum[nlo]) / (nhi - nlo)
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+
+        bx, by = x[lo:hi], y[lo:hi]
+        area = np.abs((x[a] - avg_x) * (by - y[a]) - (x[a] - bx)[:, None] * (avg_y - y[a])).sum(axis=1)
+        a = lo + int(np.argmax(area))
+        kept[b + 1] = a
+
+    return kept
+
+
+def compact_series(dates, series, decimals=2):
+    """
+    Column-oriented chart payload
+
+    Args:
+        dates: Sequence of date labels
+        series: dict name -> sequence of values aligned with dates
+        decimals: Rounding applied to values
+
+    Returns:
+        dict: {"dates": [...], "series": {name: [...]}}
+    """
+    return {
+        "dates": list(dates),
+        "series": {
+            name: np.round(np.asarray(values, dtype=np.float64), decimals).tolist()
+            for name, values in series.items()
+        }
+    }
+
+
+def compact_matrix(labels, matrix, decimals=2):
+    """
+    Square matrix payload with one labels array
+
+    Returns:
+        dict: {"labels": [...], "values": n x n nested list}
+    """
+    values = np.nan_to_num(np.round(np.asarray(matrix, dtype=np.float64), decimals))
+    return {"labels": list(labels), "values": values.tolist()}
+
@@ -6,15 +6,35 @@ across all services. All date filtering uses article published timestamps,
 not the current time.
 """
 
-from datetime import datetime, timedelta
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
 from dateutil import parser as date_parser
 import re
+import time
 
 
 # Allowed days values for news filtering (used in frontend UI)
 ALLOWED_DAYS = [1, 3, 7, 15, 30, 90]
 DEFAULT_DAYS = 2  # Default to last 2 days (24-48 hours)
 
+# Confidence of a normalized published timestamp
+CONFIDENCE_HIGH = 'high'      # Structured date with a timezone (RFC 2822, ISO 8601, feed struct_time)
+CONFIDENCE_MEDIUM = 'medium'  # Absolute date without a timezone (assumed UTC) or free-form via dateutil
+CONFIDENCE_LOW = 'low'        # Relative phrase ("2 hours ago"), only as precise as its unit
+CONFIDENCE_NONE = 'none'      # No usable date; callers fall back to the first-seen time
+
+_RELATIVE_RE = re.compile(
+    r'(\d+|an?|one)\s*(second|sec|minute|min|hour|hr|day|week|month|year)s?\s+ago', re.IGNORECASE
+)
+_TZINFOS = {'IST': 19800}  # dateutil does not know Indian Standard Time
+_RELATIVE_UNITS = {
+    'second': timedelta(seconds=1), 'sec': timedelta(seconds=1),
+    'minute': timedelta(minutes=1), 'min': timedelta(minutes=1),
+    'hour': timedelta(hours=1), 'hr': timedelta(hours=1),
+    'day': timedelta(days=1), 'week': timedelta(weeks=1),
+    'month': timedelta(days=30), 'year': timedelta(days=365)
+}
+
 
 def get_default_days():
     """
@@ -56,85 +76,114 @@ def get_date_range_for_days(days):
     Returns:
         tuple: (start_date: datetime, end_date: datetime)
     """
-    end_date = datetime.now()
+    end_date = datetime.utcnow()
     start_date = end_date - timedelta(days=days)
     return start_date, end_date
 
 
-def parse_published_date(date_str):
+def _to_utc_naive(dt):
+    """Convert a datetime to naive UTC (naive input is taken as UTC)"""
+    if dt.tzinfo is not None:
+        dt = dt.astimezone(timezone.utc).replace(tzinfo=None)
+    return dt
+
+
+def normalize_timestamp(value, now=None):
     """
-    Parse published date from various formats to datetime object
+    Normalize a published timestamp to a naive UTC datetime
     
-    Handles:
-    - ISO format strings
-    - Relative dates (e.g., "2 hours ago")
-    - Absolute date strings
-    - datetime objects (passthrough)
+    Known formats take fast paths (datetime, feed struct_time, ISO 8601,
+    RFC 2822, "N units ago"); dateutil is only tried as a last resort.
+    Meant to run once at ingest so reads never parse dates.
     
     Args:
-        date_str: Date string or datetime object
+        value: datetime, time.struct_time (UTC, as from feedparser) or string
+        now: Reference UTC time for relative phrases (default: utcnow)
     
     Returns:
-        datetime: Parsed datetime object (timezone-naive), or current time if parsing fails
+        tuple: (datetime or None, confidence) with confidence one of
+               CONFIDENCE_HIGH / MEDIUM / LOW / NONE
     """
-    if isinstance(date_str, datetime):
-        # Remove timezone info to make it naive
-        return date_str.replace(tzinfo=None) if date_str.tzinfo else date_str
+    if isinstance(value, datetime):
+        return _to_utc_naive(value), CONFIDENCE_HIGH if value.tzinfo else CONFIDENCE_MEDIUM
+    
+    if isinstance(value, time.struct_time):
+        try:
+            return datetime(*value[:6]), CONFIDENCE_HIGH
+        except (TypeError, ValueError):
+            return None, CONFIDENCE_NONE
+    
+    if not value or not isinstance(value, str):
+        return None, CONFIDENCE_NONE
     
-    if not date_str or not isinstance(date_str, str):
-        return datetime.now()
+    text = value.strip()
+    if not text or text.lower() == 'unknown':
+        return None, CONFIDENCE_NONE
+    
+    # ISO 8601 (2024-12-04T10:00:00Z, 2024-12-04 10:00:00+05:30, 2024-12-04)
+    if text[:4].isdigit() and text[4:5] == '-':
+        try:
+            dt = datetime.fromisoformat(text)
+            return _to_utc_naive(dt), CONFIDENCE_HIGH if dt.tzinfo else CONFIDENCE_MEDIUM
+        except ValueError:
+            pass
+    
+    # RFC 2822 (Wed, 04 Dec 2024 10:00:00 GMT / +0530 / IST), used by RSS feeds
+    if ',' in text[:5] or text[-5:].lstrip('+-').isdigit() or text.endswith(('GMT', 'UTC', 'UT', 'Z')):
+        try:
+            dt = parsedate_to_datetime(text)
+            # email.utils only knows the US zone names; IST comes back naive
+            zone = text.rsplit(None, 1)[-1].upper()
+            if dt.tzinfo is None and zone in _TZINFOS:
+                dt = dt.replace(tzinfo=timezone(timedelta(seconds=_TZINFOS[zone])))
+            return _to_utc_naive(dt), CONFIDENCE_HIGH if dt.tzinfo else CONFIDENCE_MEDIUM
+        except (TypeError, ValueError, IndexError):
+            pass
     
+    # Relative phrases
+    lowered = text.lower()
+    now = now or datetime.utcnow()
+    match = _RELATIVE_RE.search(lowered)
+    if match:
+        count = match.group(1)
+        count = int(count) if count.isdigit() else 1
+        return now - count * _RELATIVE_UNITS[match.group(2)], CONFIDENCE_LOW
+    if lowered in ('just now', 'now', 'today'):
+        return now, CONFIDENCE_LOW
+    if lowered == 'yesterday':
+        return now - timedelta(days=1), CONFIDENCE_LOW
+    
+    # Last resort
     try:
-        # Try parsing as ISO format or standard date format
-        parsed_dt = date_parser.parse(date_str)
-        # Remove timezone info to make it naive for consistent comparison
-        return parsed_dt.replace(tzinfo=None) if parsed_dt.tzinfo else parsed_dt
-    except:
-        # Try parsing relative dates (e.g., "2 hours ago")
-        return _parse_relative_date(date_str)
+        dt = date_parser.parse(text, tzinfos=_TZINFOS)
+        return _to_utc_naive(dt), CONFIDENCE_MEDIUM
+    except (ValueError, OverflowError):
+        return None, CONFIDENCE_NONE
+
+
+def format_utc_iso(dt):
+    """Format a naive UTC datetime as ISO 8601 with a Z suffix"""
+    return dt.replace(microsecond=0).isoformat() + 'Z'
 
 
-def _parse_relative_date(date_str):
+def parse_published_date(date_str):
     """
-    Convert relative date (e.g., '2 hours ago') to datetime object
+    Parse published date from various formats to datetime object
+    
+    Handles:
+    - ISO format strings
+    - Relative dates (e.g., "2 hours ago")
+    - Absolute date strings
+    - datetime objects (passthrough)
     
     Args:
-        date_str: Relative date string
+        date_str: Date string or datetime object
     
     Returns:
-        datetime: Parsed datetime object
+        datetime: Parsed datetime object (naive UTC), or current time if parsing fails
     """
-    try:
-        now = datetime.now()
-        date_str_lower = date_str.lower().strip()
-        
-        if not date_str_lower or date_str_lower == 'unknown':
-            return now
-        
-        # Extract number from string
-        numbers = re.findall(r'\d+', date_str)
-        num = int(numbers[0]) if numbers else 1
-        
-        # Parse relative time
-        if 'second' in date_str_lower or 'sec' in date_str_lower:
-            return now - timedelta(seconds=num)
-        elif 'minute' in date_str_lower or 'min' in date_str_lower:
-            return now - timedelta(minutes=num)
-        elif 'hour' in date_str_lower or 'hr' in date_str_lower:
-            return now - timedelta(hours=num)
-        elif 'day' in date_str_lower:
-            return now - timedelta(days=num)
-        elif 'week' in date_str_lower:
-            return now - timedelta(weeks=num)
-        elif 'month' in date_str_lower:
-            return now - timedelta(days=num * 30)
-        elif 'year' in date_str_lower:
-            return now - timedelta(days=num * 365)
-        else:
-            return now
-    except Exception as e:
-        print(f"Error parsing relative date '{date_str}': {e}")
-        return datetime.now()
+    parsed_dt, _ = normalize_timestamp(date_str)
+    return parsed_dt if parsed_dt is not None else datetime.utcnow()
 
 
 def filter_articles_by_date(articles, days):
@@ -193,11 +242,13 @@ def sort_articles_by_date(articles, reverse=True):
     def get_sort_key(article):
         """Get sortable datetime for article"""
         published_at = article.get('published_at', '')
-        try:
-            return parse_published_date(published_at)
-        except:
+        if isinstance(published_at, datetime):
+            return _to_utc_naive(published_at)
+        parsed_dt, _ = normalize_timestamp(published_at)
+        if parsed_dt is None:
             # Articles with unparseable dates go to the end
             return datetime.min if reverse else datetime.max
+        return parsed_dt
     
     return sorted(articles, key=get_sort_key, reverse=reverse)
 
@@ -70,10 +70,15 @@ def get_stock_mappings_collection():
 
 
 def get_news_collection():
-    """Get company news collection (pre-fetched by cron scraper)"""
+    """Get company news collection (per-ticker scrape status from cron scraper)"""
     return Database.get_collection(config.NEWS_COLLECTION)
 
 
+def get_news_articles_collection():
+    """Get news articles collection (one document per article, by URL hash)"""
+    return Database.get_collection(config.NEWS_ARTICLES_COLLECTION)
+
+
 def get_positions_collection():
     """Get portfolio positions collection"""
     return Database.get_collection(config.POSITIONS_COLLECTION)
@@ -84,6 +89,16 @@ def get_notifications_collection():
     return Database.get_collection(config.NOTIFICATIONS_COLLECTION)
 
 
+def get_indicators_collection():
+    """Get stock indicators collection (rolling state, updated nightly)"""
+    return Database.get_collection(config.INDICATORS_COLLECTION)
+
+
+def get_analysis_jobs_collection():
+    """Get analysis jobs collection (async jobs and stored results)"""
+    return Database.get_collection(config.ANALYSIS_JOBS_COLLECTION)
+
+
 def get_mf_watchlist_collection():
     """Get mutual fund watchlist collection"""
     return Database.get_collection('mf_watchlist')
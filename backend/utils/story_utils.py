@@ -0,0 +1,121 @@
+"""
+Story clustering utilities
+
+MinHash signatures over the 2- and 3-word shingles of an article's title and
+lead, with an LSH index to find near-duplicates (the same syndicated story
+published with slightly different headlines by several outlets). Headlines
+alone are too short and formulaic to tell stories apart ("shares rise 2%"
+vs "shares fall 2%"), so articles without lead text are never clustered
+"""
+
+import re
+import zlib
+from typing import Dict, List, Optional, Tuple
+
+NUM_PERM = 128
+BANDS = 32  # 32 bands x 4 rows: pairs above ~0.6 Jaccard almost always share a band
+ROWS = NUM_PERM // BANDS
+SIMILARITY_THRESHOLD = 0.75  # Estimated Jaccard above which two articles are one story
+LEAD_WORDS = 60  # Words of content used along with the title
+MIN_LEAD_WORDS = 15  # Articles with a shorter lead (or none) get no signature
+SHINGLE_SIZES = (2, 3)  # Word n-grams hashed into the shingle set
+
+_PRIME = (1 << 61) - 1
+_MAX_HASH = (1 << 32) - 1
+_WORD_RE = re.compile(r'[a-z0-9]+')
+_STOPWORDS = {
+    'a', 'an', 'the', 'and', 'or', 'of', 'to', 'in', 'on', 'for', 'at', 'by', 'with', 'from',
+    'as', 'is', 'are', 'was', 'be', 'its', 'it', 'this', 'that', 'after', 'over', 'amid',
+    'says', 'said', 'pc', 'per', 'cent', 'percent'
+}
+
+# Fixed permutations (a*x + b) mod p so signatures are comparable across runs
+_PERMUTATIONS = [
+    (1 + zlib.crc32(f"a{i}".encode()) * 2654435761 % (_PRIME - 1), zlib.crc32(f"b{i}".encode()) * 40503 % _PRIME)
+    for i in range(NUM_PERM)
+]
+
+
+def _words(text: Optional[str]) -> List[str]:
+    return [w for w in _WORD_RE.findall((text or '').lower()) if w not in _STOPWORDS]
+
+
+def shingles(title: str, content: Optional[str] = None) -> set:
+    """
+    Hashed 2- and 3-word shingles of the title and the first LEAD_WORDS
+    words of content
+
+    Feeds often repeat the headline as the description, so a lead starting
+    with the title has it stripped. Returns an empty set when fewer than
+    MIN_LEAD_WORDS words of lead remain.
+    """
+    title_words = _words(title)
+    lead = _words(content)
+    if lead[:len(title_words)] == title_words:
+        lead = lead[len(title_words):]
+    lead = lead[:LEAD_WORDS]
+    if len(lead) < MIN_LEAD_WORDS:
+        return set()
+
+    tokens = set()
+    for words in (title_words, lead):
+        for n in SHINGLE_SIZES:
+            tokens.update(zlib.crc32(' '.join(words[i:i + n]).encode()) for i in range(len(words) - n + 1))
+    return tokens
+
+
+def minhash_signature(tokens: set) -> Optional[List[int]]:
+    """MinHash signature (NUM_PERM values), or None for an empty token set"""
+    if not tokens:
+        return None
+    return [min((a * t + b) % _PRIME for t in tokens) & _MAX_HASH for a, b in _PERMUTATIONS]
+
+
+def lsh_bands(signature: List[int]) -> List[Tuple[int, tuple]]:
+    """(band number, rows) keys of a signature"""
+    return [(i, tuple(signature[i * ROWS:(i + 1) * ROWS])) for i in range(BANDS)]
+
+
+def estimate_similarity(a: List[int], b: List[int]) -> float:
+    """Estimated Jaccard similarity of two signatures"""
+    return sum(1 for x, y in zip(a, b) if x == y) / NUM_PERM
+
+
+class NearDuplicateIndex:
+    """
+    In-memory LSH index of signatures
+
+    add() registers an item; match() returns the most similar registered
+    item above SIMILARITY_THRESHOLD, comparing only items that share a band.
+    """
+
+    def __init__(self, threshold: float = SIMILARITY_THRESHOLD):
+        self.threshold = threshold
+        self.buckets: Dict[tuple, List[str]] = {}
+        self.signatures: Dict[str, List[int]] = {}
+
+    def add(self, key: str, signature: List[int]):
+        if key in self.signatures:
+            return
+        self.signatures[key] = signature
+        for band in lsh_bands(signature):
+            self.buckets.setdefault(band, []).append(key)
+
+    def match(self, signature: List[int]) -> Optional[Tuple[str, float]]:
+        """
+        Best near-duplicate of a signature
+
+        Returns:
+            tuple: (key, estimated similarity), or None
+        """
+        best, best_score = None, self.threshold
+        seen = set()
+        for band in lsh_bands(signature):
+            for key in self.buckets.get(band, ()):
+                if key in seen:
+                    continue
+                seen.add(key)
+                score = estimate_similarity(signature, self.signatures[key])
+                if score >= best_score:
+                    best, best_score = key, score
+        return (best, best_score) if best is not None else None
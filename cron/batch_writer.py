@@ -0,0 +1,174 @@
+"""
+Batching writer
+Collects article upserts and per-ticker status updates from the scrape
+callbacks and writes them with unordered bulk_write when enough operations
+are pending (WRITE_BATCH_SIZE) or WRITE_FLUSH_SECONDS have passed. add()
+blocks while WRITE_MAX_PENDING operations are waiting, which slows dispatch
+down instead of buffering without bound
+"""
+
+import logging
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def _merge_article_updates(a: Dict, b: Dict) -> Dict:
+    """Combine two upserts of the same article (ticker sets are unioned, later fields win)"""
+    tickers = set(a['$addToSet']['tickers']['$each']) | set(b['$addToSet']['tickers']['$each'])
+    merged = {
+        '$addToSet': {'tickers': {'$each': sorted(tickers)}},
+        '$set': {**a.get('$set', {}), **b.get('$set', {})}
+    }
+    on_insert = {**b.get('$setOnInsert', {}), **a.get('$setOnInsert', {})}
+    # A field may not be in both $set and $setOnInsert
+    on_insert = {k: v for k, v in on_insert.items() if k not in merged['$set']}
+    if on_insert:
+        merged['$setOnInsert'] = on_insert
+    return merged
+
+
+class BatchWriter:
+    """
+    Buffered bulk writes to news_articles and company_news
+
+    Each add() carries the operations of one key (a ticker, or a feed in
+    source-first mode) and an optional callback(ok) that runs on the
+    flusher thread once they have been written.
+    """
+
+    def __init__(self, articles_collection, news_collection, batch_size: Optional[int] = None,
+                 flush_seconds: Optional[float] = None, max_pending: Optional[int] = None):
+        self.articles_collection = articles_collection
+        self.news_collection = news_collection
+        self.batch_size = batch_size or config.WRITE_BATCH_SIZE
+        self.flush_seconds = flush_seconds or config.WRITE_FLUSH_SECONDS
+        self.max_pending = max_pending or config.WRITE_MAX_PENDING
+
+        self.articles: Dict[str, Dict] = {}  # url_hash -> update
+        self.statuses: Dict[str, Dict] = {}  # ticker -> update
+        self.links: Dict[str, set] = {}  # url_hash -> tickers for existing articles
+        self.callbacks: List[Callable[[bool], None]] = []
+        self.cond = threading.Condition()
+        self.closed = False
+        self.stats = {'flushes': 0, 'round_trips': 0, 'operations': 0}
+        self.thread = threading.Thread(target=self._run, name='batch-writer', daemon=True)
+
+    @property
+    def pending(self) -> int:
+        return len(self.articles) + len(self.statuses) + len(self.links)
+
+    def add(self, articles: List[Tuple[str, Dict]], status: Optional[Tuple[str, Dict]] = None,
+            callback: Optional[Callable[[bool], None]] = None, links: Optional[Dict[str, List[str]]] = None):
+        """
+        Queue one key's writes (blocks while the buffer is full)
+
+        Args:
+            articles: (url_hash, update) article upserts
+            status: Optional (ticker, update) for company_news
+            callback: Optional callback(ok) after the flush that wrote them
+            links: Optional url_hash -> tickers to add to articles that are
+                   already stored (or buffered); never inserts
+        """
+        with self.cond:
+            while self.pending >= self.max_pending and not self.closed:
+                self.cond.wait()
+            for url_hash, update in articles:
+                current = self.articles.get(url_hash)
+                self.articles[url_hash] = update if current is None else _merge_article_updates(current, update)
+            for url_hash, tickers in (links or {}).items():
+                self.links.setdefault(url_hash, set()).update(tickers)
+            if status is not None:
+                self.statuses[status[0]] = status[1]
+            if callback is not None:
+                self.callbacks.append(callback)
+            if self.pending >= self.batch_size:
+                self.cond.notify_all()
+
+    def _run(self):
+        while True:
+            with self.cond:
+                deadline = time.monotonic() + self.flush_seconds
+                while not self.closed and self.pending < self.batch_size:
+                    remaining = deadline - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self.cond.wait(remaining)
+                closing = self.closed
+            self.flush()
+            if closing:
+                return
+
+    def flush(self) -> bool:
+        """
+        Write everything buffered now
+
+        Articles are written before statuses; if the article write fails the
+        statuses are skipped, so no ticker looks fresh without its articles.
+
+        Returns:
+            bool: True if the writes succeeded
+        """
+        with self.cond:
+            articles, self.articles = self.articles, {}
+            statuses, self.statuses = self.statuses, {}
+            links, self.links = self.links, {}
+            callbacks, self.callbacks = self.callbacks, []
+            self.cond.notify_all()  # Release writers blocked on a full buffer
+        if not articles and not statuses and not links and not callbacks:
+            return True
+
+        # A link to an article in this flush goes into its upsert, which may insert it
+        for url_hash in [h for h in links if h in articles]:
+            tickers = links.pop(url_hash)
+            articles[url_hash] = _merge_article_updates(
+                articles[url_hash], {'$addToSet': {'tickers': {'$each': sorted(tickers)}}})
+
+        ok = True
+        try:
+            if articles or links:
+                self.articles_collection.bulk_write([
+                    UpdateOne({'url_hash': url_hash}, update, upsert=True)
+                    for url_hash, update in articles.items()
+                ] + [
+                    UpdateOne({'url_hash': url_hash}, {'$addToSet': {'tickers': {'$each': sorted(tickers)}}})
+                    for url_hash, tickers in links.items()
+                ], ordered=False)
+                self.stats['round_trips'] += 1
+            if statuses:
+                self.news_collection.bulk_write([
+                    UpdateOne({'ticker': ticker}, update, upsert=True)
+                    for ticker, update in statuses.items()
+                ], ordered=False)
+                self.stats['round_trips'] += 1
+        except Exception as e:
+            ok = False
+            logger.error(f"[ERROR] Bulk write of {len(articles)} articles / {len(statuses)} statuses failed: {e}")
+
+        self.stats['flushes'] += 1
+        self.stats['operations'] += len(articles) + len(statuses) + len(links)
+        for callback in callbacks:
+            try:
+                callback(ok)
+            except Exception as e:
+                logger.error(f"[ERROR] Write callback failed: {e}")
+        return ok
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        """Flush what is left and stop the flusher thread"""
+        with self.cond:
+            self.closed = True
+            self.cond.notify_all()
+        self.thread.join()
+        logger.info(f"WRITER: {self.stats['operations']} operations in {self.stats['round_trips']} "
+                    f"round trips ({self.stats['flushes']} flushes)")
@@ -19,19 +19,25 @@ class ScraperConfig:
     DB_NAME = 'portfolio_buzz'
     
     # Collections
-    NEWS_COLLECTION = 'company_news'
+    NEWS_COLLECTION = 'company_news'  # Per-ticker scrape status
+    ARTICLES_COLLECTION = 'news_articles'  # One document per article (keyed by URL hash)
+    WATERMARKS_COLLECTION = 'scrape_watermarks'  # Per-(ticker or feed, source) incremental state
     WATCHLIST_COLLECTION = 'watchlists'
+    POSITIONS_COLLECTION = 'portfolio_positions'
+    QUEUE_COLLECTION = 'scrape_queue'  # Shared work queue for --worker processes
     STOCK_MAPPINGS_COLLECTION = 'stock_mappings'
     
     # Scraping Parameters
-    MAX_WORKERS = 4  # Parallel scraping threads
-    REQUEST_DELAY = (1.5, 4.0)  # Random delay between requests (seconds)
+    MAX_WORKERS = 16  # Shared pool for (ticker, source) scrape tasks
+    REQUEST_DELAY = (1.5, 4.0)  # Random delay between requests (seconds), without the scheduler
     MAX_RETRIES = 2  # Retry attempts for failed requests
     TIMEOUT = 15  # Request timeout (seconds)
     MAX_ARTICLES_PER_TICKER = 20  # Maximum articles to store per ticker
     
     # Data Freshness
-    INCREMENTAL_UPDATE = True  # Only fetch news newer than last scrape
+    INCREMENTAL_UPDATE = True  # Conditional requests and only unseen articles (scrape_watermarks)
+    WATERMARK_SEEN_ITEMS = 100  # Newest article hashes remembered per (ticker, source)
+    WATERMARK_SEEN_RUN = 3  # Stop reading a source after this many consecutive seen items
     DATA_TTL_DAYS = 30  # Auto-delete articles older than 30 days (MongoDB TTL)
     
     # Error Handling
@@ -45,7 +51,80 @@ class ScraperConfig:
     
     # Performance
     BATCH_SIZE = 50  # Process tickers in batches
-    SCRAPE_TIMEOUT = 300  # Total scraping timeout (5 minutes)
+    WRITE_BATCH_SIZE = 1000  # Buffered article / status writes per bulk_write flush
+    WRITE_FLUSH_SECONDS = 5  # Flush at least this often
+    WRITE_MAX_PENDING = 5000  # Scrape callbacks block while this many writes are buffered
+    SCRAPE_TIMEOUT = 300  # Time budget per run (5 minutes), spent on the highest-priority tickers first
+    
+    # Full-text extraction (see full_text.py, needs trafilatura)
+    EXTRACT_FULL_TEXT = os.getenv('EXTRACT_FULL_TEXT', 'false').lower() == 'true'
+    EXTRACT_MAX_ARTICLES = 500  # Pages fetched per run, newest articles first
+    EXTRACT_TIMEOUT = 180  # Time budget for fetching pages (seconds)
+    EXTRACT_PROCESSES = max((os.cpu_count() or 2) - 1, 1)  # trafilatura parsing processes
+    EXTRACT_WINDOW_DAYS = 2  # Only articles published this recently
+    EXTRACT_RECHECK_HOURS = 12  # Pages are fetched again (to catch updates) after this long
+    EXTRACT_MAX_BYTES = 2 * 1024 * 1024  # Larger pages are skipped
+    EXTRACT_MIN_CHARS = 200  # Shorter extractions are treated as no text
+    EXTRACT_LEAD_CHARS = 1000  # Uncompressed lead stored next to the compressed text
+    EXTRACT_SKIP_DOMAINS = {'news.google.com'}  # Redirect pages without article text
+    
+    # Story clustering (see story_clusters.py)
+    CLUSTER_STORIES = True  # Mark near-duplicate copies of a story at ingest
+    CLUSTER_WINDOW_DAYS = 3  # Recent articles a new one is compared with
+    
+    # Scrape priority (see priority.py)
+    SCRAPE_UNIVERSE = True  # After tracked tickers, cover stock_mappings with the remaining budget
+    PRIORITY_HOLDER_WEIGHT = 2.0  # A holder counts this many times a watcher (log scale)
+    PRIORITY_RATE_DAYS = 14  # Window for the historical articles-per-day rate
+    PRIORITY_RATE_PRIOR = 0.5  # Articles per day assumed on top of the history (new tickers)
+    PRIORITY_MAX_AGE_DAYS = 3  # Staleness stops adding priority after this long
+    
+    # Distributed workers (--enqueue / --worker, see work_queue.py)
+    QUEUE_BATCH_SIZE = 20  # Tickers leased per claim
+    QUEUE_LEASE_SECONDS = 120  # Lease length; expired leases are claimed by other workers
+    QUEUE_HEARTBEAT_SECONDS = 30  # How often a worker extends its leases
+    QUEUE_MAX_ATTEMPTS = 3  # Claims per ticker before it is marked failed
+    
+    # Per-domain politeness (token buckets, requests per second)
+    DOMAIN_DEFAULT_RATE = 0.5
+    DOMAIN_BURST = 2
+    DOMAIN_MAX_IN_FLIGHT = 2  # Concurrent requests per domain
+    DOMAIN_RATES = {
+        'news.google.com': 1.0,
+        'finance.yahoo.com': 1.0,
+        'economictimes.indiatimes.com': 0.5,
+        'reuters.com': 0.3,
+        'cnbc.com': 0.5,
+        'feeds.bbci.co.uk': 0.5,
+    }
+
+    # Source-first ingestion (--source-first): each feed is fetched once per
+    # cycle and its articles are linked to tickers by entity_linker
+    SOURCE_FEEDS = [
+        ('Economic Times', 'https://economictimes.indiatimes.com/markets/rssfeeds/1977021501.cms'),
+        ('Economic Times', 'https://economictimes.indiatimes.com/markets/stocks/news/rssfeeds/2146842.cms'),
+        ('Economic Times', 'https://economictimes.indiatimes.com/industry/rssfeeds/13352306.cms'),
+        ('Moneycontrol', 'https://www.moneycontrol.com/rss/business.xml'),
+        ('Moneycontrol', 'https://www.moneycontrol.com/rss/marketreports.xml'),
+        ('Moneycontrol', 'https://www.moneycontrol.com/rss/latestnews.xml'),
+        ('Livemint', 'https://www.livemint.com/rss/markets'),
+        ('Livemint', 'https://www.livemint.com/rss/companies'),
+        ('Business Standard', 'https://www.business-standard.com/rss/markets-106.rss'),
+        ('Business Standard', 'https://www.business-standard.com/rss/companies-101.rss'),
+        ('Financial Express', 'https://www.financialexpress.com/market/feed/'),
+        ('NDTV Profit', 'https://feeds.feedburner.com/ndtvprofit-latest'),
+        ('Hindu BusinessLine', 'https://www.thehindubusinessline.com/markets/feeder/default.rss'),
+    ]
+
+    # Entity linking
+    LINKER_MIN_TERM_LENGTH = 3  # Shorter names / synonyms are ignored
+    LINKER_SHORT_TERM_LENGTH = 4  # Terms this short must not be lowercase in the text (acronyms)
+    LINKER_STOPWORDS = {
+        'bank', 'banking', 'finance', 'financial', 'software', 'technology', 'oil', 'gas',
+        'energy', 'power', 'steel', 'cement', 'pharma', 'auto', 'insurance', 'market',
+        'markets', 'india', 'indian', 'limited', 'ltd', 'industries', 'services', 'consultancy',
+        'motors', 'telecom', 'infra', 'metals', 'fmcg'
+    }
 
 
 # Export config instance
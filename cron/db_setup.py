@@ -56,14 +56,7 @@ def setup_database():
         )
         print("      ✓ Created index on 'last_updated'")
         
-        # 3. Index on articles.published_date for time-based filtering
-        news_collection.create_index(
-            [("articles.published_date", DESCENDING)],
-            name="articles_published_date_desc"
-        )
-        print("      ✓ Created index on 'articles.published_date'")
-        
-        # 4. TTL index to auto-delete old articles (30 days)
+        # 3. TTL index to drop status of tickers no longer scraped (30 days)
         news_collection.create_index(
             [("last_updated", ASCENDING)],
             expireAfterSeconds=config.DATA_TTL_DAYS * 24 * 60 * 60,
@@ -71,21 +64,95 @@ def setup_database():
         )
         print(f"      ✓ Created TTL index (expires after {config.DATA_TTL_DAYS} days)")
         
+        # Articles: one document per article, keyed by URL hash
+        articles_collection = db[config.ARTICLES_COLLECTION]
+        print(f"\n      Setting up collection: {config.ARTICLES_COLLECTION}")
+        
+        # 4. Unique index on url_hash (upsert key)
+        articles_collection.create_index(
+            [("url_hash", ASCENDING)],
+            unique=True,
+            name="url_hash_unique_idx"
+        )
+        print("      ✓ Created unique index on 'url_hash'")
+        
+        # 5. Ticker + date index for day filters and cursor pagination
+        articles_collection.create_index(
+            [("tickers", ASCENDING), ("published_at", DESCENDING), ("url_hash", DESCENDING)],
+            name="tickers_published_idx"
+        )
+        print("      ✓ Created index on 'tickers' + 'published_at'")
+        
+        # 6. Per-article TTL (expires_at = published_at + DATA_TTL_DAYS)
+        articles_collection.create_index(
+            [("expires_at", ASCENDING)],
+            expireAfterSeconds=0,
+            name="expires_at_ttl_idx"
+        )
+        print(f"      ✓ Created per-article TTL index ({config.DATA_TTL_DAYS} days after publication)")
+        
+        # Incremental scrape state per (ticker or feed URL, source)
+        watermarks_collection = db[config.WATERMARKS_COLLECTION]
+        print(f"\n      Setting up collection: {config.WATERMARKS_COLLECTION}")
+        
+        # 7. Unique index on (key, source)
+        watermarks_collection.create_index(
+            [("key", ASCENDING), ("source", ASCENDING)],
+            unique=True,
+            name="key_source_unique"
+        )
+        print("      ✓ Created unique index on 'key' + 'source'")
+        
+        # Shared work queue for --worker processes
+        queue_collection = db[config.QUEUE_COLLECTION]
+        print(f"\n      Setting up collection: {config.QUEUE_COLLECTION}")
+        
+        # 8. Claim order (status + priority)
+        queue_collection.create_index(
+            [("status", ASCENDING), ("priority", DESCENDING)],
+            name="status_priority_idx"
+        )
+        print("      ✓ Created index on 'status' + 'priority'")
+        
+        # 9. Lookup of a claimed batch
+        queue_collection.create_index(
+            [("lease_id", ASCENDING)],
+            name="lease_id_idx"
+        )
+        print("      ✓ Created index on 'lease_id'")
+        
+        # 10. Full-text extraction: recent articles due for a check
+        articles_collection.create_index(
+            [("published_at", DESCENDING), ("text_checked_at", ASCENDING)],
+            name="published_text_checked_idx"
+        )
+        print(f"      ✓ Created index on {config.ARTICLES_COLLECTION} 'published_at' + 'text_checked_at'")
+        
+        # 11. Lookup of a claimed extraction batch
+        articles_collection.create_index(
+            [("text_lease", ASCENDING)],
+            sparse=True,
+            name="text_lease_idx"
+        )
+        print(f"      ✓ Created index on {config.ARTICLES_COLLECTION} 'text_lease'")
+        
         # List all indexes
         print("\n" + "=" * 60)
         print("INDEXES CREATED:")
         print("=" * 60)
-        for idx in news_collection.list_indexes():
-            print(f"  • {idx['name']}: {idx.get('key', {})}")
+        for collection in (news_collection, articles_collection, watermarks_collection, queue_collection):
+            for idx in collection.list_indexes():
+                print(f"  • {collection.name}.{idx['name']}: {idx.get('key', {})}")
         
         # Collection stats
         print("\n" + "=" * 60)
         print("COLLECTION STATS:")
         print("=" * 60)
-        stats = db.command("collstats", config.NEWS_COLLECTION)
-        print(f"  • Documents: {stats.get('count', 0)}")
-        print(f"  • Size: {stats.get('size', 0) / 1024:.2f} KB")
-        print(f"  • Indexes: {stats.get('nindexes', 0)}")
+        for name in (config.NEWS_COLLECTION, config.ARTICLES_COLLECTION, config.WATERMARKS_COLLECTION,
+                     config.QUEUE_COLLECTION):
+            stats = db.command("collstats", name)
+            print(f"  • {name}: {stats.get('count', 0)} documents, "
+                  f"{stats.get('size', 0) / 1024:.2f} KB, {stats.get('nindexes', 0)} indexes")
         
         print("\n" + "=" * 60)
         print("✓ DATABASE SETUP COMPLETE")
@@ -0,0 +1,175 @@
+"""
+Ticker entity linking
+Finds the companies mentioned in an article with one Aho-Corasick pass
+over its text, using names, synonyms and search terms from stock_mappings.
+Matching cost depends on the text length, not on the number of tickers
+"""
+
+import re
+from collections import deque
+from typing import Dict, Iterable, List, Optional, Set
+
+from config import config
+
+_COMPANY_SUFFIX_RE = re.compile(r'\s+(limited|ltd\.?|ltd|inc\.?|corp\.?|plc)$', re.IGNORECASE)
+_SPACE_RE = re.compile(r'\s+')
+
+
+def _fold(text: str) -> str:
+    """Lowercase text keeping every character at its original index"""
+    lowered = text.lower()
+    if len(lowered) == len(text):
+        return lowered
+    return ''.join(c.lower() if len(c.lower()) == 1 else c for c in text)
+
+
+class AhoCorasick:
+    """
+    Aho-Corasick automaton over lowercase patterns
+
+    Every pattern carries a payload; search() reports (start, end, payload)
+    for each occurrence in a single left-to-right scan.
+    """
+
+    def __init__(self):
+        self.goto: List[Dict[str, int]] = [{}]
+        self.fail: List[int] = [0]
+        self.out: List[List[tuple]] = [[]]  # (pattern length, payload) per node
+        self.built = False
+
+    def add(self, pattern: str, payload) -> None:
+        """Add a pattern (call before build)"""
+        node = 0
+        for ch in pattern:
+            nxt = self.goto[node].get(ch)
+            if nxt is None:
+                nxt = len(self.goto)
+                self.goto[node][ch] = nxt
+                self.goto.append({})
+                self.fail.append(0)
+                self.out.append([])
+            node = nxt
+        self.out[node].append((len(pattern), payload))
+        self.built = False
+
+    def build(self) -> 'AhoCorasick':
+        """Compute failure links breadth first and merge outputs along them"""
+        queue = deque(self.goto[0].values())
+        for node in queue:
+            self.fail[node] = 0
+        while queue:
+            node = queue.popleft()
+            for ch, nxt in self.goto[node].items():
+                queue.append(nxt)
+                f = self.fail[node]
+                while f and ch not in self.goto[f]:
+                    f = self.fail[f]
+                self.fail[nxt] = self.goto[f].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+        self.built = True
+        return self
+
+    def search(self, text: str):
+        """
+        Yield (start, end, payload) for every pattern occurrence in text
+
+        text must already be folded the same way as the patterns.
+        """
+        if not self.built:
+            self.build()
+        goto, fail, out = self.goto, self.fail, self.out
+        node = 0
+        for i, ch in enumerate(text):
+            while node and ch not in goto[node]:
+                node = fail[node]
+            node = goto[node].get(ch, 0)
+            for length, payload in out[node]:
+                yield i + 1 - length, i + 1, payload
+
+
+class TickerLinker:
+    """
+    Links article text to tickers
+
+    Terms shorter than config.LINKER_MIN_TERM_LENGTH, generic words in
+    config.LINKER_STOPWORDS and terms shared by several tickers are dropped.
+    Matches must sit on word boundaries, and short terms (acronyms such as
+    RIL or TCS) only count when they are not written in lowercase.
+    """
+
+    def __init__(self, terms: Dict[str, Set[str]]):
+        self.automaton = AhoCorasick()
+        self.tickers: Set[str] = set()
+        for term, tickers in terms.items():
+            self.automaton.add(term, next(iter(tickers)))
+            self.tickers.update(tickers)
+        self.automaton.build()
+        self.term_count = len(terms)
+
+    @staticmethod
+    def _clean_term(term) -> Optional[str]:
+        if not isinstance(term, str):
+            return None
+        term = _SPACE_RE.sub(' ', _fold(term)).strip()
+        if len(term) < config.LINKER_MIN_TERM_LENGTH or term in config.LINKER_STOPWORDS:
+            return None
+        return term
+
+    @staticmethod
+    def terms_for(mapping: Dict) -> Set[str]:
+        """Candidate terms for one stock_mappings document"""
+        raw = [mapping.get('ticker', '').split('.')[0]]
+        for key in ('official_name', 'company_name'):
+            name = mapping.get(key)
+            if name:
+                raw.append(name)
+                raw.append(_COMPANY_SUFFIX_RE.sub('', name.strip()))
+        raw.extend(mapping.get('synonyms') or [])
+        raw.extend(mapping.get('search_terms') or [])
+        return {t for t in (TickerLinker._clean_term(r) for r in raw) if t}
+
+    @classmethod
+    def from_mappings(cls, mappings: Iterable[Dict], extra_tickers: Iterable[str] = ()) -> 'TickerLinker':
+        """
+        Build a linker from stock_mappings documents
+
+        Args:
+            mappings: Documents with ticker, official_name, company_name,
+                      synonyms and search_terms
+            extra_tickers: Tracked tickers without a mapping (matched by symbol)
+        """
+        owners: Dict[str, Set[str]] = {}
+        for mapping in mappings:
+            ticker = mapping.get('ticker')
+            if not ticker:
+                continue
+            for term in cls.terms_for(mapping):
+                owners.setdefault(term, set()).add(ticker)
+        known = {t for tickers in owners.values() for t in tickers}
+        for ticker in extra_tickers:
+            term = cls._clean_term(ticker.split('.')[0]) if ticker and ticker not in known else None
+            if term:
+                owners.setdefault(term, set()).add(ticker)
+
+        # A term naming more than one company would link the wrong ones
+        return cls({term: tickers for term, tickers in owners.items() if len(tickers) == 1})
+
+    def link(self, *texts: str) -> Set[str]:
+        """Tickers mentioned in any of the texts"""
+        found = set()
+        short = config.LINKER_SHORT_TERM_LENGTH
+        for text in texts:
+            if not text:
+                continue
+            folded = _fold(text)
+            for start, end, ticker in self.automaton.search(folded):
+                if ticker in found:
+                    continue
+                if start > 0 and folded[start - 1].isalnum():
+                    continue
+                if end < len(folded) and folded[end].isalnum():
+                    continue
+                if end - start <= short and text[start:end].islower():
+                    continue
+                found.add(ticker)
+        return found
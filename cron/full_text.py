@@ -0,0 +1,202 @@
+"""
+Full-text extraction
+Optional stage after a scrape run (config.EXTRACT_FULL_TEXT). Pages of
+recent canonical articles are fetched on the shared scheduler (per-domain
+token buckets) and their main text is extracted with trafilatura in a
+process pool, so parsing never holds up the fetch threads. Clean text is
+stored zlib-compressed with its hash; pages whose HTML is unchanged are not
+parsed again, and unchanged text is not rewritten
+"""
+
+import hashlib
+import logging
+import multiprocessing
+import uuid
+import zlib
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional
+
+import requests
+from pymongo import DESCENDING, UpdateOne
+
+from config import config
+from scheduler import DomainRateLimiter, ScrapeScheduler, ScrapeTask
+from scraper import random_headers
+
+try:
+    import trafilatura
+except ImportError:  # Optional dependency, only needed with EXTRACT_FULL_TEXT
+    trafilatura = None
+
+logger = logging.getLogger(__name__)
+
+
+def available() -> bool:
+    """Whether trafilatura is installed"""
+    return trafilatura is not None
+
+
+def _extract(html: bytes, url: str) -> Optional[str]:
+    """Main text of a page (runs in a pool process)"""
+    return trafilatura.extract(html, url=url, include_comments=False, include_tables=False,
+                               favor_precision=True)
+
+
+def _md5(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+class FullTextExtractor:
+    """One extraction pass over recent articles"""
+
+    def __init__(self, collection, gate: Optional[Callable[[str], None]] = None):
+        self.collection = collection
+        self.gate = gate
+
+    def claim(self, limit: int) -> List[Dict]:
+        """
+        Recent canonical articles due for a (re)check, newest first
+
+        Candidates are claimed by setting text_checked_at with one
+        update_many that re-checks the condition, so concurrent workers
+        don't fetch the same pages; the claim lapses after
+        EXTRACT_RECHECK_HOURS like any other check.
+        """
+        now = datetime.utcnow()
+        due = {
+            'published_at': {'$gte': now - timedelta(days=config.EXTRACT_WINDOW_DAYS)},
+            'url': {'$regex': '^https?://'},
+            'is_duplicate': {'$ne': True},
+            '$or': [{'text_checked_at': {'$exists': False}},
+                    {'text_checked_at': {'$lt': now - timedelta(hours=config.EXTRACT_RECHECK_HOURS)}}]
+        }
+        ids = [
+            doc['url_hash'] for doc in self.collection.find(due, {'_id': 0, 'url_hash': 1, 'url': 1})
+            .sort('published_at', DESCENDING).limit(limit)
+            if DomainRateLimiter.domain_of(doc['url']) not in config.EXTRACT_SKIP_DOMAINS
+        ]
+        if not ids:
+            return []
+
+        lease = uuid.uuid4().hex
+        self.collection.update_many({'url_hash': {'$in': ids}, **due},
+                                    {'$set': {'text_checked_at': now, 'text_lease': lease}})
+        return list(self.collection.find(
+            {'text_lease': lease},
+            {'_id': 0, 'url_hash': 1, 'url': 1, 'source': 1, 'html_hash': 1, 'text_hash': 1}
+        ))
+
+    def _fetch(self, url: str) -> bytes:
+        """
+        HTML of an article page
+
+        Raises:
+            RuntimeError: If the page could not be fetched
+        """
+        if self.gate is not None:
+            self.gate(url)
+        response = None
+        try:
+            response = requests.get(url, headers=random_headers(), timeout=config.TIMEOUT, stream=True)
+            if response.status_code != 200:
+                raise RuntimeError(f"HTTP {response.status_code}")
+            content_type = response.headers.get('Content-Type', '')
+            if content_type and 'html' not in content_type:
+                raise RuntimeError(f"Not HTML ({content_type})")
+            html = response.raw.read(config.EXTRACT_MAX_BYTES + 1, decode_content=True)
+        except requests.RequestException as e:
+            raise RuntimeError(str(e))
+        finally:
+            if response is not None:
+                response.close()
+        if len(html) > config.EXTRACT_MAX_BYTES:
+            raise RuntimeError(f"Page larger than {config.EXTRACT_MAX_BYTES} bytes")
+        return html
+
+    def _text_update(self, doc: Dict, html_hash: str, text: Optional[str], stats: Dict) -> Dict:
+        """$set for an extracted page"""
+        fields = {'html_hash': html_hash, 'text_error': None}
+        if not text or len(text) < config.EXTRACT_MIN_CHARS:
+            stats['empty'] += 1
+            fields['text_error'] = 'No main text found'
+            return fields
+        text_hash = _md5(text.encode('utf-8'))
+        if text_hash == doc.get('text_hash'):
+            stats['unchanged'] += 1
+            return fields
+        stats['extracted'] += 1
+        fields.update({
+            'full_text': zlib.compress(text.encode('utf-8'), 6),
+            'text_hash': text_hash,
+            'text_length': len(text),
+            'lead': text[:config.EXTRACT_LEAD_CHARS],
+            'text_extracted_at': datetime.utcnow()
+        })
+        return fields
+
+    def run(self, max_workers: int, deadline: Optional[float] = None) -> Dict[str, int]:
+        """
+        Fetch, extract and store the text of up to EXTRACT_MAX_ARTICLES articles
+
+        Args:
+            max_workers: Fetch thread pool size
+            deadline: Optional time.monotonic() after which no fetch is started
+
+        Returns:
+            dict: Counts of candidates, extracted, unchanged, empty and failed pages
+        """
+        docs = {doc['url_hash']: doc for doc in self.claim(config.EXTRACT_MAX_ARTICLES)}
+        stats = {'candidates': len(docs), 'extracted': 0, 'unchanged': 0, 'empty': 0, 'failed': 0}
+        if not docs:
+            return stats
+
+        tasks = [
+            ScrapeTask(url_hash, doc.get('source', ''), DomainRateLimiter.domain_of(doc['url']),
+                       lambda url=doc['url']: self._fetch(url))
+            for url_hash, doc in docs.items()
+        ]
+        fields = {}  # url_hash -> $set of every page fetched
+        parsing = {}
+
+        # Spawned workers: forking while fetch threads hold requests/logging
+        # locks and the MongoClient is open can deadlock the children
+        with ProcessPoolExecutor(max_workers=config.EXTRACT_PROCESSES,
+                                 mp_context=multiprocessing.get_context("spawn")) as pool:
+            def on_complete(url_hash: str, done: List[ScrapeTask]):
+                task = done[0]
+                if task.error or not task.result:
+                    stats['failed'] += 1
+                    fields[url_hash] = {'text_error': task.error or 'Empty page'}
+                    return
+                html_hash = _md5(task.result)
+                if html_hash == docs[url_hash].get('html_hash'):
+                    stats['unchanged'] += 1
+                    fields[url_hash] = {}
+                    return
+                parsing[pool.submit(_extract, task.result, docs[url_hash]['url'])] = (url_hash, html_hash)
+
+            ScrapeScheduler(max_workers).run(tasks, on_complete, deadline=deadline)
+
+            for future in as_completed(parsing):
+                url_hash, html_hash = parsing[future]
+                try:
+                    text = future.result()
+                except Exception as e:
+                    stats['failed'] += 1
+                    fields[url_hash] = {'html_hash': html_hash, 'text_error': f"Extraction failed: {e}"}
+                    continue
+                fields[url_hash] = self._text_update(docs[url_hash], html_hash, text, stats)
+
+        operations = []
+        for url_hash in docs:
+            update = {'$unset': {'text_lease': ''}}
+            if url_hash not in fields:
+                # Left unfetched by the deadline: due again on the next run
+                update['$unset']['text_checked_at'] = ''
+            elif fields[url_hash]:
+                update['$set'] = fields[url_hash]
+            operations.append(UpdateOne({'url_hash': url_hash}, update))
+        for i in range(0, len(operations), config.WRITE_BATCH_SIZE):
+            self.collection.bulk_write(operations[i:i + config.WRITE_BATCH_SIZE], ordered=False)
+        return stats
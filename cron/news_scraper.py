@@ -11,8 +11,7 @@ from pymongo import MongoClient
 from pymongo.errors import ConnectionFailure, DuplicateKeyError
 import logging
 import time
-import hashlib
-from typing import List, Dict, Optional
+from typing import Callable, List, Dict, Optional
 import argparse
 
 # Add parent directory to path to import scraper functions
@@ -20,14 +19,25 @@ parent_dir = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 sys.path.append(os.path.join(parent_dir, 'backend'))
 
 from config import config
+from entity_linker import TickerLinker
+from priority import rank_tickers
+from batch_writer import BatchWriter
+from full_text import FullTextExtractor, available as full_text_available
+from story_clusters import StoryClusterer
+from scheduler import DomainRateLimiter, ScrapeScheduler, ScrapeTask
+from work_queue import LeaseHeartbeat, ScrapeQueue, worker_id
+from source_feeds import fetch_feed
 from scraper import (
-    scrape_google_news,
+    set_request_gate,
+    google_news_rss_url,
     scrape_yahoo_finance,
     scrape_economic_times,
     scrape_reuters,
     scrape_cnbc,
     scrape_bbc_business
 )
+from utils.date_utils import normalize_timestamp
+from watermarks import WatermarkStore, article_key
 
 # Setup logging
 logging.basicConfig(
@@ -48,6 +58,11 @@ class NewsScraperService:
         self.client = None
         self.db = None
         self.news_collection = None
+        self.articles_collection = None
+        self.watermarks = None  # WatermarkStore while an incremental run is active
+        self.rate_limiter = None
+        self.writer = None  # BatchWriter while a run is active
+        self.stories = None  # StoryClusterer while a run is active
         self.stats = {
             'total_tickers': 0,
             'successful': 0,
@@ -71,6 +86,7 @@ class NewsScraperService:
             self.client.admin.command('ping')
             self.db = self.client[config.DB_NAME]
             self.news_collection = self.db[config.NEWS_COLLECTION]
+            self.articles_collection = self.db[config.ARTICLES_COLLECTION]
             
             logger.info("[OK] Connected to MongoDB successfully")
             return True
@@ -81,93 +97,115 @@ class NewsScraperService:
     
     def get_all_tickers(self) -> List[Dict[str, str]]:
         """
-        Get all unique tickers from watchlists and stock mappings
+        Get all tickers to scrape, highest priority first
+        
+        Watched and held tickers come first, scored by demand and expected
+        unseen news (see priority.py); with SCRAPE_UNIVERSE the rest of
+        stock_mappings follows and is covered as the time budget allows.
         Returns list of dicts with ticker and company_name
         """
-        tickers_map = {}
-        
         try:
-            # 1. Get tickers from watchlists (actively tracked)
-            # Schema: Each document has user_email, watchlist_id, ticker, created_at, updated_at
-            watchlist_collection = self.db[config.WATCHLIST_COLLECTION]
-            
-            # Get unique tickers from all watchlist entries
-            unique_tickers = watchlist_collection.distinct('ticker')
-            
-            for ticker in unique_tickers:
-                if ticker and ticker not in tickers_map:
-                    tickers_map[ticker] = {'ticker': ticker, 'company_name': ticker}
-            
-            logger.info(f"Found {len(tickers_map)} tickers from watchlists")
-            
-            # OPTIMIZATION: Only scrape watchlist tickers (actively tracked by users)
-            # Skip stock_mappings to avoid scraping 500+ tickers
-            # Uncomment below if you want to scrape ALL known tickers:
-            
-            # # 2. Get tickers from stock mappings (all known stocks)
-            # mappings_collection = self.db[config.STOCK_MAPPINGS_COLLECTION]
-            # mappings = mappings_collection.find({}, {'ticker': 1, 'official_name': 1, 'company_name': 1})
-            # 
-            # mapping_count = 0
-            # for mapping in mappings:
-            #     ticker = mapping.get('ticker')
-            #     if ticker and ticker not in tickers_map:
-            #         tickers_map[ticker] = {
-            #             'ticker': ticker,
-            #             'company_name': mapping.get('official_name') or mapping.get('company_name') or ticker
-            #         }
-            #         mapping_count += 1
-            # 
-            # logger.info(f"Found {mapping_count} additional tickers from stock mappings")
-            
-            tickers_list = list(tickers_map.values())
+            tickers_list = rank_tickers(self.db, include_universe=config.SCRAPE_UNIVERSE)
             logger.info(f"Total unique tickers to scrape: {len(tickers_list)}")
-            
             return tickers_list
             
         except Exception as e:
             logger.error(f"Error fetching tickers: {e}")
             return []
     
-    def scrape_news_for_ticker(self, ticker: str, company_name: str) -> Dict:
+    def get_sources(self, ticker: str, company_name: str) -> List[tuple]:
         """
-        Scrape news for a single ticker from multiple sources
-        Returns dict with articles and metadata
+        Sources to scrape for a ticker (fast and reliable ones)
+        
+        Returns:
+            list: (source name, domain, scrape function) tuples
+        """
+        return [
+            ('Google News', 'news.google.com', self._feed_task(ticker, 'Google News', google_news_rss_url(company_name))),
+            ('Yahoo Finance', 'finance.yahoo.com', self._page_task(ticker, 'Yahoo Finance', lambda: scrape_yahoo_finance(ticker))),
+            ('Economic Times', 'economictimes.indiatimes.com', self._page_task(ticker, 'Economic Times', lambda: scrape_economic_times(company_name))),
+            ('Reuters', 'reuters.com', self._page_task(ticker, 'Reuters', lambda: scrape_reuters(company_name))),
+            ('CNBC', 'cnbc.com', self._page_task(ticker, 'CNBC', lambda: scrape_cnbc(company_name))),
+            ('BBC Business', 'feeds.bbci.co.uk', self._page_task(ticker, 'BBC Business', lambda: scrape_bbc_business(company_name))),
+        ]
+    
+    def _feed_task(self, key: str, source: str, url: str):
         """
-        logger.info(f"Scraping news for {ticker} ({company_name})...")
+        Scrape function for an RSS source
         
+        In incremental runs the request is conditional on the watermark's
+        ETag / Last-Modified and only unseen entries are returned.
+        """
+        def run():
+            mark = self.watermarks.get(key, source) if self.watermarks else {}
+            articles, validators = fetch_feed(source, url, self.rate_limiter,
+                                              mark.get('etag'), mark.get('last_modified'))
+            if self.watermarks is None:
+                return articles or []
+            return self.watermarks.advance(key, source, articles, **validators)
+        return run
+    
+    def _page_task(self, key: str, source: str, scrape_func):
+        """Scrape function for an HTML source (no validators, only unseen articles in incremental runs)"""
+        def run():
+            articles = scrape_func()
+            if self.watermarks is None:
+                return articles
+            return self.watermarks.advance(key, source, articles)
+        return run
+    
+    def _start_watermarks(self, keys: List[str]):
+        """Load watermarks for keys if incremental updates are enabled"""
+        if config.INCREMENTAL_UPDATE:
+            self.watermarks = WatermarkStore(self.db[config.WATERMARKS_COLLECTION]).load(keys)
+            logger.info(f"INCREMENTAL: {len(self.watermarks.marks)} watermarks loaded")
+    
+    def _finish_watermarks(self):
+        """Write the run's watermarks (after the articles they cover were saved)"""
+        if self.watermarks is None:
+            return
+        try:
+            logger.info(f"INCREMENTAL: {self.watermarks.flush()} watermarks updated")
+        except Exception as e:
+            logger.error(f"[ERROR] Failed to save watermarks: {e}")
+        finally:
+            self.watermarks = None
+    
+    def build_news_data(self, ticker: str, company_name: str, results: List[tuple]) -> Dict:
+        """
+        Combine per-source results for a ticker
+        
+        Args:
+            results: (source name, articles, error) per source tried
+        
+        Returns:
+            dict: News document with deduplicated articles and scrape status
+        """
         all_articles = []
-        sources_tried = 0
+        sources_tried = len(results)
         sources_succeeded = 0
         
-        # Define scraping functions to try (fast and reliable sources)
-        scraping_functions = [
-            ('Google News', lambda: scrape_google_news(company_name)),
-            ('Yahoo Finance', lambda: scrape_yahoo_finance(ticker)),
-            ('Economic Times', lambda: scrape_economic_times(company_name)),
-            ('Reuters', lambda: scrape_reuters(company_name)),
-            ('CNBC', lambda: scrape_cnbc(company_name)),
-            ('BBC Business', lambda: scrape_bbc_business(company_name)),
-        ]
-        
-        for source_name, scrape_func in scraping_functions:
-            sources_tried += 1
-            try:
-                articles = scrape_func()
-                if articles:
-                    all_articles.extend(articles)
-                    sources_succeeded += 1
-                    logger.debug(f"  ✓ {source_name}: {len(articles)} articles")
-                else:
-                    logger.debug(f"  - {source_name}: 0 articles")
-            except Exception as e:
-                logger.debug(f"  ✗ {source_name}: {str(e)}")
+        for source_name, articles, error in results:
+            if error:
+                logger.debug(f"  ✗ {source_name}: {error}")
+            elif articles:
+                all_articles.extend(articles)
+                sources_succeeded += 1
+                logger.debug(f"  ✓ {source_name}: {len(articles)} articles")
+            elif self.watermarks is not None and (ticker, source_name) in self.watermarks.checked:
+                sources_succeeded += 1
+                logger.debug(f"  = {source_name}: nothing new")
+            else:
+                logger.debug(f"  - {source_name}: 0 articles")
         
         # Deduplicate articles by URL and title
         unique_articles = self._deduplicate_articles(all_articles)
         
-        # Limit to max articles
+        # Limit to max articles; only those are marked as seen, so the rest
+        # are picked up by a later run
         unique_articles = unique_articles[:config.MAX_ARTICLES_PER_TICKER]
+        if self.watermarks is not None:
+            self.watermarks.keep(ticker, (a['url_hash'] for a in unique_articles))
         
         # Determine scrape status
         if sources_succeeded == 0:
@@ -177,7 +215,7 @@ class NewsScraperService:
         else:
             status = 'success'
         
-        logger.info(f"  > {len(unique_articles)} unique articles from {sources_succeeded}/{sources_tried} sources ({status})")
+        logger.info(f"  > {ticker}: {len(unique_articles)} unique articles from {sources_succeeded}/{sources_tried} sources ({status})")
         
         return {
             'ticker': ticker,
@@ -192,148 +230,388 @@ class NewsScraperService:
         }
     
     def _deduplicate_articles(self, articles: List[Dict]) -> List[Dict]:
-        """Remove duplicate articles based on URL and title hash"""
+        """
+        Remove duplicate articles based on URL and title hash
+        
+        This is also the timestamp normalization stage: published dates are
+        parsed once here into naive UTC datetimes with a confidence flag, and
+        articles come back newest first (undated ones last).
+        """
         seen = set()
         unique = []
+        now = datetime.utcnow()
         
         for article in articles:
-            # Create hash from URL (preferred) or title
-            url = article.get('url', article.get('link', ''))
+            # Hash of the URL (preferred) or title
+            url = article.get('url') or article.get('link') or ''
             title = article.get('title', '')
-            
-            # Use URL if available, otherwise use title
-            key_string = url if url else title
-            if not key_string:
+            key = article_key(article)
+            if key is None:
                 continue
             
-            key = hashlib.md5(key_string.encode()).hexdigest()
-            
             if key not in seen:
                 seen.add(key)
                 
                 # Normalize article format
+                published_at, confidence = normalize_timestamp(
+                    article.get('published_at') or article.get('published'), now=now
+                )
                 normalized_article = {
+                    'url_hash': key,
                     'title': title,
                     'url': url,
                     'content': article.get('content') or article.get('description') or article.get('summary') or title,
                     'source': article.get('source', 'Unknown'),
-                    'published_date': article.get('published_at') or article.get('published') or datetime.utcnow().isoformat(),
-                    'scraped_at': datetime.utcnow().isoformat()
+                    'published_at': published_at,  # None when the source gave no usable date
+                    'published_at_confidence': confidence,
+                    'scraped_at': now
                 }
                 
                 unique.append(normalized_article)
         
+        unique.sort(key=lambda a: a['published_at'] or datetime.min, reverse=True)
         return unique
     
-    def save_to_mongodb(self, news_data: Dict) -> bool:
-        """Save scraped news to MongoDB (upsert)"""
-        try:
-            # Use upsert to update existing or insert new
-            result = self.news_collection.update_one(
-                {'ticker': news_data['ticker']},
-                {'$set': news_data},
-                upsert=True
-            )
-            
-            if result.upserted_id:
-                logger.debug(f"  > Inserted new document for {news_data['ticker']}")
-            else:
-                logger.debug(f"  > Updated existing document for {news_data['ticker']}")
-            
-            return True
-            
-        except Exception as e:
-            logger.error(f"  [ERROR] Failed to save {news_data['ticker']}: {e}")
-            return False
+    def _article_update(self, article: Dict, tickers: List[str]) -> Dict:
+        """
+        Upsert update of one normalized article that adds tickers to its tickers array
+        
+        Undated articles keep the time they were first seen, so rescrapes
+        don't move them to the top. With story clustering the update also
+        sets story_id / is_duplicate (see story_clusters.py).
+        """
+        ttl = timedelta(days=config.DATA_TTL_DAYS)
+        update = {'$addToSet': {'tickers': {'$each': list(tickers)}}}
+        if article['published_at'] is not None:
+            update['$set'] = {**article, 'expires_at': article['published_at'] + ttl}
+        else:
+            update['$set'] = {k: v for k, v in article.items() if k not in ('published_at', 'published_at_confidence')}
+            update['$setOnInsert'] = {
+                'published_at': article['scraped_at'],
+                'published_at_confidence': article['published_at_confidence'],
+                'expires_at': article['scraped_at'] + ttl
+            }
+        if self.stories is not None:
+            update['$set'].update(self.stories.assign(article, tickers))
+        return update
     
-    def scrape_all_tickers(self, tickers: List[Dict], test_mode: bool = False, max_workers: int = 3):
+    def _story_links(self, updates: List[tuple]) -> Dict[str, List[str]]:
         """
-        Scrape news for all tickers with parallel processing
+        Tickers of duplicate articles to add to their canonical copies
+        
+        Collapsed reads hide duplicates, so the canonical article must carry
+        every ticker its duplicates were linked to.
+        """
+        links = {}
+        for _, update in updates:
+            if update['$set'].get('is_duplicate'):
+                links.setdefault(update['$set']['story_id'], set()).update(update['$addToSet']['tickers']['$each'])
+        return {url_hash: sorted(tickers) for url_hash, tickers in links.items()}
+    
+    def save_to_mongodb(self, news_data: Dict, on_saved: Optional[Callable[[bool], None]] = None):
+        """
+        Queue scraped news on the batching writer
+        
+        Articles are upserted one document each (keyed by URL hash) with the
+        ticker added to their tickers array and a per-article expiry; the
+        ticker's company_news document only keeps scrape status. Both are
+        written in the same flush, after which on_saved(ok) is called.
+        """
+        status = {k: v for k, v in news_data.items() if k != 'articles'}
+        updates = [(article['url_hash'], self._article_update(article, [news_data['ticker']]))
+                   for article in news_data['articles']]
+        self.writer.add(
+            updates,
+            (news_data['ticker'], {'$set': status, '$unset': {'articles': ''}}),
+            on_saved,
+            links=self._story_links(updates)
+        )
+    
+    def scrape_all_tickers(self, tickers: List[Dict], test_mode: bool = False, max_workers: int = config.MAX_WORKERS):
+        """
+        Scrape news for all tickers on the shared (ticker, source) task pool
+        
+        Every source of every ticker is a separate task; requests are paced
+        per domain by token buckets (config.DOMAIN_RATES), so domains are
+        fetched in parallel and a ticker is saved as soon as all of its
+        sources have finished. Tasks are dispatched in ticker order (highest
+        priority first) until config.SCRAPE_TIMEOUT runs out.
         
         Args:
             tickers: List of ticker dictionaries
             test_mode: If True, only process first 3 tickers
-            max_workers: Number of parallel workers (default: 3)
+            max_workers: Size of the shared worker pool
         """
-        from concurrent.futures import ThreadPoolExecutor, as_completed
-        
         self.stats['total_tickers'] = len(tickers)
         self.stats['start_time'] = datetime.utcnow()
         
-        logger.info("=" * 70)
-        logger.info(f"STARTING NEWS SCRAPING FOR {len(tickers)} TICKERS")
-        logger.info(f"PARALLEL PROCESSING: {max_workers} workers")
-        logger.info("=" * 70)
-        
         # In test mode, only process first 3 tickers
         if test_mode:
             tickers = tickers[:3]
             logger.info(f"TEST MODE: Processing only {len(tickers)} tickers")
         
-        # Process tickers in parallel
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            # Submit all scraping tasks
-            future_to_ticker = {
-                executor.submit(self._scrape_and_save_ticker, idx, len(tickers), ticker_info): ticker_info
-                for idx, ticker_info in enumerate(tickers, 1)
-            }
-            
-            # Process completed tasks as they finish
-            for future in as_completed(future_to_ticker):
-                ticker_info = future_to_ticker[future]
-                try:
-                    result = future.result()
-                    # Stats are updated in _scrape_and_save_ticker
-                except Exception as e:
-                    ticker = ticker_info['ticker']
-                    logger.error(f"  ✗ Unexpected error for {ticker}: {e}")
-                    self.stats['failed'] += 1
+        logger.info("=" * 70)
+        logger.info(f"STARTING NEWS SCRAPING FOR {len(tickers)} TICKERS")
+        logger.info("=" * 70)
+        
+        companies = {t['ticker']: t['company_name'] for t in tickers}
+        skipped = self.scrape_tickers(companies, max_workers, deadline=time.monotonic() + config.SCRAPE_TIMEOUT)
+        if skipped:
+            logger.info(f"BUDGET: {config.SCRAPE_TIMEOUT}s used up, {skipped} lower-priority tasks left for the next run")
         
         # Ensure end_time is set even if loop completes normally
         self.stats['end_time'] = datetime.utcnow()
         self._print_summary()
     
-    def _scrape_and_save_ticker(self, idx: int, total: int, ticker_info: Dict) -> bool:
+    def scrape_tickers(self, companies: Dict[str, str], max_workers: int, deadline: Optional[float] = None,
+                       on_result: Optional[Callable[[str, bool, Dict], None]] = None) -> int:
         """
-        Scrape and save news for a single ticker (used in parallel processing)
+        Run the (ticker, source) tasks of companies and save each ticker as it finishes
         
         Args:
-            idx: Current ticker index
-            total: Total number of tickers
-            ticker_info: Ticker information dict
-            
+            companies: ticker -> company name, in dispatch order
+            max_workers: Size of the shared worker pool
+            deadline: Optional time.monotonic() after which no task is started
+            on_result: Optional callback(ticker, ok, news_data) once a ticker's
+                       writes are flushed (runs on the writer thread)
+        
         Returns:
-            bool: True if successful
+            int: Number of tasks skipped because of the deadline
         """
-        ticker = ticker_info['ticker']
-        company_name = ticker_info['company_name']
+        tasks = [
+            ScrapeTask(ticker, source_name, domain, scrape_func)
+            for ticker, company_name in companies.items()
+            for source_name, domain, scrape_func in self.get_sources(ticker, company_name)
+        ]
+        logger.info(f"SCHEDULER: {len(tasks)} tasks on {max_workers} workers, per-domain rate limits")
         
-        logger.info(f"\n[{idx}/{total}] Processing {ticker}...")
+        def on_complete(ticker: str, done: List[ScrapeTask]):
+            results = [(t.source, t.result, t.error) for t in done]
+            self._save_ticker_result(self.build_news_data(ticker, companies[ticker], results), on_result)
         
+        self._start_watermarks(companies)
+        self.rate_limiter = DomainRateLimiter()
+        set_request_gate(self.rate_limiter)
         try:
-            # Scrape news
-            news_data = self.scrape_news_for_ticker(ticker, company_name)
+            with self._batch_writer():
+                return ScrapeScheduler(max_workers).run(tasks, on_complete, deadline=deadline)
+        finally:
+            set_request_gate(None)
+            self.rate_limiter = None
+            self._finish_watermarks()
+    
+    def enqueue_tickers(self, test_mode: bool = False) -> int:
+        """Queue every ranked ticker for --worker processes"""
+        tickers = self.get_all_tickers()
+        if test_mode:
+            tickers = tickers[:3]
+        queued = ScrapeQueue(self.db[config.QUEUE_COLLECTION]).enqueue(tickers)
+        logger.info(f"Queued {queued} tickers")
+        return queued
+    
+    def run_worker(self, max_workers: int = config.MAX_WORKERS, batch_size: int = config.QUEUE_BATCH_SIZE):
+        """
+        Claim and scrape batches from the shared queue until it is drained
+        
+        Leases are extended by a heartbeat thread while the batch runs;
+        finished tickers are marked done, failed ones go back to the queue
+        until QUEUE_MAX_ATTEMPTS. A crashed worker's leases expire and are
+        claimed by the others.
+        """
+        queue = ScrapeQueue(self.db[config.QUEUE_COLLECTION])
+        owner = worker_id()
+        self.stats['start_time'] = datetime.utcnow()
+        logger.info(f"WORKER {owner}: claiming batches of {batch_size}")
+        
+        while True:
+            batch = queue.claim(owner, batch_size)
+            if not batch:
+                break
+            self.stats['total_tickers'] += len(batch)
+            companies = {doc['ticker']: doc.get('company_name') or doc['ticker'] for doc in batch}
+            logger.info(f"WORKER {owner}: leased {len(batch)} tickers")
             
-            # Save to MongoDB
-            if self.save_to_mongodb(news_data):
+            with LeaseHeartbeat(queue, owner, list(companies)) as heartbeat:
+                def on_result(ticker: str, ok: bool, news_data: Dict):
+                    heartbeat.finished(ticker)
+                    if ok:
+                        queue.complete(owner, ticker)
+                    else:
+                        queue.fail(owner, ticker, news_data.get('error_message') or 'Save failed')
+                
+                self.scrape_tickers(companies, max_workers, on_result=on_result)
+        
+        self.stats['end_time'] = datetime.utcnow()
+        logger.info(f"WORKER {owner}: queue drained {queue.counts()}")
+        self._print_summary()
+    
+    def build_linker(self) -> TickerLinker:
+        """Ticker linker over every stock mapping plus watchlist tickers without one"""
+        mappings = self.db[config.STOCK_MAPPINGS_COLLECTION].find(
+            {}, {'_id': 0, 'ticker': 1, 'official_name': 1, 'company_name': 1, 'synonyms': 1, 'search_terms': 1}
+        )
+        watched = self.db[config.WATCHLIST_COLLECTION].distinct('ticker')
+        linker = TickerLinker.from_mappings(mappings, extra_tickers=watched)
+        logger.info(f"Entity linker: {linker.term_count} terms for {len(linker.tickers)} tickers")
+        return linker
+
+    def scrape_sources(self, test_mode: bool = False, max_workers: int = config.MAX_WORKERS):
+        """
+        Source-first ingestion: fetch every feed in config.SOURCE_FEEDS once
+
+        Articles are linked to tickers by name, synonym and search term, so
+        the number of requests depends on the feeds, not on the tickers
+        tracked. Articles that mention no known ticker are dropped. The
+        company_news status of every linked ticker (this run or before) is
+        refreshed at the end.
+
+        Args:
+            test_mode: If True, only fetch the first 3 feeds
+            max_workers: Size of the shared worker pool
+        """
+        self.stats['start_time'] = datetime.utcnow()
+        feeds = config.SOURCE_FEEDS[:3] if test_mode else config.SOURCE_FEEDS
+        linker = self.build_linker()
+        self.stats['total_tickers'] = len(linker.tickers)
+
+        tasks = [
+            ScrapeTask(url, source, DomainRateLimiter.domain_of(url), self._feed_task(url, source, url))
+            for source, url in feeds
+        ]
+
+        logger.info("=" * 70)
+        logger.info(f"STARTING SOURCE-FIRST INGESTION FROM {len(feeds)} FEEDS")
+        logger.info("=" * 70)
+
+        linked_counts = {}
+        feed_results = {'ok': 0, 'failed': 0, 'unlinked': 0}
+
+        def on_complete(url: str, done: List[ScrapeTask]):
+            task = done[0]
+            if task.error:
+                feed_results['failed'] += 1
+                logger.warning(f"  ✗ {task.source} ({url}): {task.error}")
+                return
+            feed_results['ok'] += 1
+            updates = []
+            for article in self._deduplicate_articles(task.result):
+                tickers = linker.link(article['title'], article['content'])
+                if not tickers:
+                    feed_results['unlinked'] += 1
+                    continue
+                updates.append((article['url_hash'], self._article_update(article, sorted(tickers))))
+                for ticker in tickers:
+                    linked_counts[ticker] = linked_counts.get(ticker, 0) + 1
+            
+            def on_saved(ok: bool, url=url, source=task.source):
+                # Unsaved articles must not be marked as seen
+                if not ok and self.watermarks is not None:
+                    logger.error(f"  [ERROR] Failed to save {source} articles")
+                    self.watermarks.discard(url)
+            
+            if self.watermarks is not None:
+                # Unlinked entries stay unseen, so a ticker added later can still claim them
+                self.watermarks.keep(url, (url_hash for url_hash, _ in updates))
+            if updates:
+                self.writer.add(updates, callback=on_saved, links=self._story_links(updates))
+            self.stats['total_articles'] += len(updates)
+            logger.info(f"  ✓ {task.source}: {len(task.result)} new entries, {len(updates)} linked")
+
+        self._start_watermarks([url for _, url in feeds])
+        self.rate_limiter = DomainRateLimiter()
+        try:
+            with self._batch_writer():
+                ScrapeScheduler(max_workers).run(tasks, on_complete)
+                
+                # The feeds cover every ticker at once, so every linked ticker is fresh
+                if feed_results['ok']:
+                    now = datetime.utcnow()
+                    known = self.news_collection.distinct('ticker', {'ticker': {'$in': sorted(linker.tickers)}})
+                    for ticker in known:
+                        linked_counts.setdefault(ticker, 0)
+                    status = 'success' if feed_results['failed'] < len(feeds) / 2 else 'partial'
+                    for ticker, count in linked_counts.items():
+                        self.writer.add([], (ticker, {
+                            '$set': {
+                                'ticker': ticker,
+                                'last_updated': now,
+                                'scrape_status': status,
+                                'article_count': count,
+                                'sources_tried': len(feeds),
+                                'sources_succeeded': feed_results['ok'],
+                                'error_message': None
+                            },
+                            '$setOnInsert': {'company_name': ticker},
+                            '$unset': {'articles': ''}
+                        }))
+                    self.stats['successful' if status == 'success' else 'partial'] = len(linked_counts)
+        finally:
+            self.rate_limiter = None
+            self._finish_watermarks()
+
+        self.stats['end_time'] = datetime.utcnow()
+        logger.info(f"Feeds: {feed_results['ok']} fetched, {feed_results['failed']} failed; "
+                    f"{feed_results['unlinked']} articles matched no ticker")
+        self._print_summary()
+
+    def extract_full_text(self, max_workers: int = config.MAX_WORKERS):
+        """
+        Optional full-text stage: fetch and extract the pages of recent articles
+        
+        Pages are fetched on the shared scheduler with per-domain rate limits
+        and parsed by trafilatura in a process pool (see full_text.py).
+        """
+        if not full_text_available():
+            logger.warning("EXTRACT_FULL_TEXT is set but trafilatura is not installed; skipping extraction")
+            return
+        logger.info(f"FULL TEXT: extracting up to {config.EXTRACT_MAX_ARTICLES} articles "
+                    f"on {config.EXTRACT_PROCESSES} processes")
+        self.rate_limiter = DomainRateLimiter()
+        try:
+            stats = FullTextExtractor(self.articles_collection, self.rate_limiter).run(
+                max_workers, deadline=time.monotonic() + config.EXTRACT_TIMEOUT)
+        except Exception as e:
+            logger.error(f"[ERROR] Full-text extraction failed: {e}")
+            return
+        finally:
+            self.rate_limiter = None
+        logger.info(f"FULL TEXT: {stats['candidates']} pages, {stats['extracted']} extracted, "
+                    f"{stats['unchanged']} unchanged, {stats['empty']} without text, {stats['failed']} failed")
+    
+    def _save_ticker_result(self, news_data: Dict,
+                            on_result: Optional[Callable[[str, bool, Dict], None]] = None):
+        """
+        Queue one ticker's scrape result; stats are updated once it is written
+        
+        Args:
+            on_result: Optional callback(ticker, ok, news_data) after the flush
+        """
+        def on_saved(saved: bool):
+            if saved:
                 if news_data['scrape_status'] == 'success':
                     self.stats['successful'] += 1
                 elif news_data['scrape_status'] == 'partial':
                     self.stats['partial'] += 1
                 else:
                     self.stats['failed'] += 1
-                
                 self.stats['total_articles'] += news_data['article_count']
-                return True
             else:
+                # Unsaved articles must not be marked as seen
+                logger.error(f"  [ERROR] Failed to save {news_data['ticker']}")
+                if self.watermarks is not None:
+                    self.watermarks.discard(news_data['ticker'])
                 self.stats['failed'] += 1
-                return False
-                
-        except Exception as e:
-            logger.error(f"  ✗ Error processing {ticker}: {e}")
-            self.stats['failed'] += 1
-            return False
-
+            if on_result is not None:
+                on_result(news_data['ticker'], saved and news_data['scrape_status'] != 'failed', news_data)
+        
+        self.save_to_mongodb(news_data, on_saved)
+    
+    def _batch_writer(self) -> BatchWriter:
+        """Start a batching writer (and story clusters) for this run (use as a context manager)"""
+        if config.CLUSTER_STORIES:
+            self.stories = StoryClusterer(self.articles_collection).load()
+        self.writer = BatchWriter(self.articles_collection, self.news_collection)
+        return self.writer
     
     def _print_summary(self):
         """Print scraping summary statistics"""
@@ -363,7 +641,18 @@ def main():
     parser = argparse.ArgumentParser(description='Scrape news for company tickers')
     parser.add_argument('--ticker', type=str, help='Scrape news for a specific ticker only')
     parser.add_argument('--test', action='store_true', help='Test mode: process only 3 tickers')
-    parser.add_argument('--workers', type=int, default=3, help='Number of parallel workers (default: 3)')
+    parser.add_argument('--workers', type=int, default=config.MAX_WORKERS,
+                        help=f'Shared scrape worker pool size (default: {config.MAX_WORKERS})')
+    parser.add_argument('--source-first', action='store_true',
+                        help='Fetch each source feed once and link articles to tickers')
+    parser.add_argument('--enqueue', action='store_true',
+                        help='Queue the ranked tickers for --worker processes and exit')
+    parser.add_argument('--worker', action='store_true',
+                        help='Claim batches from the shared scrape queue until it is drained')
+    parser.add_argument('--batch-size', type=int, default=config.QUEUE_BATCH_SIZE,
+                        help=f'Tickers leased per batch in --worker mode (default: {config.QUEUE_BATCH_SIZE})')
+    parser.add_argument('--extract', action=argparse.BooleanOptionalAction, default=config.EXTRACT_FULL_TEXT,
+                        help='Fetch and extract full article text after scraping (default: EXTRACT_FULL_TEXT)')
     args = parser.parse_args()
     
     scraper = NewsScraperService()
@@ -374,6 +663,24 @@ def main():
             logger.error("Failed to connect to MongoDB. Exiting.")
             sys.exit(1)
         
+        if args.enqueue:
+            scraper.enqueue_tickers(test_mode=args.test)
+            return
+        
+        if args.worker:
+            scraper.run_worker(max_workers=args.workers, batch_size=args.batch_size)
+            if args.extract:
+                scraper.extract_full_text(max_workers=args.workers)
+            logger.info("\n[OK] Worker finished")
+            return
+        
+        if args.source_first:
+            scraper.scrape_sources(test_mode=args.test, max_workers=args.workers)
+            if args.extract:
+                scraper.extract_full_text(max_workers=args.workers)
+            logger.info("\n[OK] Source-first ingestion completed successfully")
+            return
+        
         # Get tickers
         if args.ticker:
             # Single ticker mode
@@ -389,6 +696,8 @@ def main():
         
         # Scrape news with parallel processing
         scraper.scrape_all_tickers(tickers, test_mode=args.test, max_workers=args.workers)
+        if args.extract:
+            scraper.extract_full_text(max_workers=args.workers)
         
         logger.info("\n[OK] News scraping completed successfully")
         
@@ -0,0 +1,104 @@
+"""
+Scrape priorities
+Ranks tickers by the expected value of scraping them now: how many users
+watch or hold them, times the number of unseen articles they probably have
+(historical news rate x time since the last scrape). Runs dispatch tickers
+in this order so the time budget goes to the highest-value ones first
+"""
+
+import logging
+import math
+from datetime import datetime, timedelta
+from typing import Dict, List, Optional
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+def priority_score(watchers: int, holders: int, age_days: Optional[float], news_rate: float) -> float:
+    """
+    Priority of one ticker
+
+    Args:
+        watchers: Users with the ticker in a watchlist
+        holders: Users holding a position in it
+        age_days: Days since its news was last scraped (None if never)
+        news_rate: Articles per day it historically gets
+
+    Returns:
+        float: (1 + demand) x expected unseen articles
+    """
+    demand = math.log1p(watchers) + config.PRIORITY_HOLDER_WEIGHT * math.log1p(holders)
+    max_age = config.PRIORITY_MAX_AGE_DAYS
+    age = max_age if age_days is None else min(max(age_days, 0.0), max_age)
+    return (1.0 + demand) * (news_rate + config.PRIORITY_RATE_PRIOR) * age
+
+
+def _count_users(collection, field: str, query: Dict) -> Dict[str, int]:
+    """Distinct users per ticker in a watchlist / positions collection"""
+    pipeline = [
+        {'$match': query},
+        {'$group': {'_id': f'${field}', 'users': {'$addToSet': '$user_email'}}},
+        {'$project': {'count': {'$size': '$users'}}}
+    ]
+    return {doc['_id']: doc['count'] for doc in collection.aggregate(pipeline) if doc['_id']}
+
+
+def rank_tickers(db, include_universe: bool = True) -> List[Dict]:
+    """
+    Tickers to scrape, highest priority first
+
+    Tracked tickers (watched or held) come first, ordered by score; the rest
+    of the stock_mappings universe follows (also by score) and is covered
+    with whatever budget the run has left.
+
+    Returns:
+        list: {'ticker', 'company_name', 'priority', 'tracked'} dicts
+    """
+    now = datetime.utcnow()
+    watchers = _count_users(db[config.WATCHLIST_COLLECTION], 'ticker', {})
+    holders = _count_users(db[config.POSITIONS_COLLECTION], 'symbol', {'quantity': {'$gt': 0}})
+
+    names = {}
+    if include_universe:
+        for mapping in db[config.STOCK_MAPPINGS_COLLECTION].find(
+                {}, {'_id': 0, 'ticker': 1, 'official_name': 1, 'company_name': 1}):
+            if mapping.get('ticker'):
+                names[mapping['ticker']] = mapping.get('official_name') or mapping.get('company_name') or mapping['ticker']
+    tickers = set(watchers) | set(holders) | set(names)
+    if not tickers:
+        return []
+
+    last_updated = {
+        doc['ticker']: doc.get('last_updated')
+        for doc in db[config.NEWS_COLLECTION].find(
+            {'ticker': {'$in': list(tickers)}}, {'_id': 0, 'ticker': 1, 'last_updated': 1})
+    }
+
+    # Historical news rate: articles per day over the last PRIORITY_RATE_DAYS
+    rate_days = config.PRIORITY_RATE_DAYS
+    rates = {
+        doc['_id']: doc['count'] / rate_days
+        for doc in db[config.ARTICLES_COLLECTION].aggregate([
+            {'$match': {'published_at': {'$gte': now - timedelta(days=rate_days)}}},
+            {'$unwind': '$tickers'},
+            {'$group': {'_id': '$tickers', 'count': {'$sum': 1}}}
+        ])
+    }
+
+    ranked = []
+    for ticker in tickers:
+        updated = last_updated.get(ticker)
+        age_days = (now - updated).total_seconds() / 86400 if isinstance(updated, datetime) else None
+        w, h = watchers.get(ticker, 0), holders.get(ticker, 0)
+        ranked.append({
+            'ticker': ticker,
+            'company_name': names.get(ticker, ticker),
+            'priority': round(priority_score(w, h, age_days, rates.get(ticker, 0.0)), 4),
+            'tracked': bool(w or h)
+        })
+
+    ranked.sort(key=lambda t: (t['tracked'], t['priority']), reverse=True)
+    logger.info(f"Ranked {len(ranked)} tickers ({sum(t['tracked'] for t in ranked)} tracked)")
+    return ranked
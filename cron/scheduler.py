@@ -0,0 +1,174 @@
+"""
+Scrape task scheduler
+Runs (ticker, source) scrape tasks on one shared worker pool. Politeness is
+enforced per domain with token buckets instead of a blanket random sleep,
+so different domains are fetched in parallel while each stays within its
+own request rate
+"""
+
+import logging
+import threading
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from typing import Callable, Dict, Iterable, List, Optional
+from urllib.parse import urlparse
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """Token bucket: `rate` requests per second with bursts of up to `burst`"""
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.updated = time.monotonic()
+        self.lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """
+        Take one token, going into debt if none is left
+
+        Returns:
+            float: Seconds the caller must wait before using it
+        """
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+
+class DomainRateLimiter:
+    """Per-domain token buckets (rates from config.DOMAIN_RATES)"""
+
+    def __init__(self, rates: Optional[Dict[str, float]] = None, default_rate: Optional[float] = None,
+                 burst: Optional[int] = None):
+        self.rates = rates if rates is not None else config.DOMAIN_RATES
+        self.default_rate = default_rate or config.DOMAIN_DEFAULT_RATE
+        self.burst = burst or config.DOMAIN_BURST
+        self.buckets = {}
+        self.lock = threading.Lock()
+
+    @staticmethod
+    def domain_of(url: str) -> str:
+        """Bucket key for a URL (host without a leading www.)"""
+        host = (urlparse(url).hostname or '').lower()
+        return host[4:] if host.startswith('www.') else host
+
+    def _bucket(self, domain: str) -> TokenBucket:
+        with self.lock:
+            bucket = self.buckets.get(domain)
+            if bucket is None:
+                bucket = TokenBucket(self.rates.get(domain, self.default_rate), self.burst)
+                self.buckets[domain] = bucket
+            return bucket
+
+    def __call__(self, url: str):
+        """Block until a request to url is allowed (used as the scraper request gate)"""
+        delay = self._bucket(self.domain_of(url)).reserve()
+        if delay > 0:
+            time.sleep(delay)
+
+
+class ScrapeTask:
+    """One source for one ticker"""
+
+    __slots__ = ('key', 'source', 'domain', 'func', 'result', 'error')
+
+    def __init__(self, key: str, source: str, domain: str, func: Callable[[], List[Dict]]):
+        self.key = key
+        self.source = source
+        self.domain = domain
+        self.func = func
+        self.result = None
+        self.error = None
+
+
+class ScrapeScheduler:
+    """
+    Dispatches scrape tasks over a shared pool
+
+    Tasks are queued per domain and dispatched round-robin across domains,
+    with at most DOMAIN_MAX_IN_FLIGHT running per domain, so a slow or
+    strictly limited domain cannot occupy the whole pool. When every task
+    of a key (ticker) has finished, on_complete(key, tasks) is called from
+    the dispatching thread.
+    """
+
+    def __init__(self, max_workers: int, max_in_flight: Optional[int] = None):
+        self.max_workers = max_workers
+        self.max_in_flight = max_in_flight or config.DOMAIN_MAX_IN_FLIGHT
+
+    @staticmethod
+    def _run(task: ScrapeTask) -> ScrapeTask:
+        try:
+            task.result = task.func() or []
+        except Exception as e:
+            task.error = str(e)
+            task.result = []
+        return task
+
+    def run(self, tasks: Iterable[ScrapeTask], on_complete: Callable[[str, List[ScrapeTask]], None],
+            deadline: Optional[float] = None):
+        """
+        Run tasks until done (or until the monotonic deadline passes)
+
+        Returns:
+            int: Number of tasks left undispatched because of the deadline
+        """
+        queues = {}
+        remaining = {}
+        finished = {}
+        for task in tasks:
+            queues.setdefault(task.domain, deque()).append(task)
+            remaining[task.key] = remaining.get(task.key, 0) + 1
+            finished.setdefault(task.key, [])
+
+        domains = deque(queues)
+        in_flight = {domain: 0 for domain in queues}
+        running = set()
+
+        with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix='scrape') as executor:
+            while domains or running:
+                expired = deadline is not None and time.monotonic() > deadline
+
+                # Round-robin over domains with queued work and free slots
+                if not expired:
+                    for _ in range(len(domains)):
+                        if len(running) >= self.max_workers:
+                            break
+                        domain = domains[0]
+                        domains.rotate(-1)
+                        if in_flight[domain] >= self.max_in_flight:
+                            continue
+                        running.add(executor.submit(ScrapeScheduler._run, queues[domain].popleft()))
+                        in_flight[domain] += 1
+                        if not queues[domain]:
+                            domains.remove(domain)
+                elif not running:
+                    break
+
+                if not running:
+                    continue
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    running.discard(future)
+                    task = future.result()
+                    in_flight[task.domain] -= 1
+                    finished[task.key].append(task)
+                    remaining[task.key] -= 1
+                    if remaining[task.key] == 0:
+                        on_complete(task.key, finished.pop(task.key))
+
+        # Deadline hit: report keys with partial results
+        skipped = sum(len(q) for q in queues.values())
+        for key, tasks_done in finished.items():
+            if tasks_done:
+                on_complete(key, tasks_done)
+        return skipped
@@ -0,0 +1,94 @@
+"""
+Source feeds
+RSS feed fetching with conditional requests: the market and business feeds
+of Indian news sites fetched once per cycle for source-first ingestion (see
+config.SOURCE_FEEDS), and per-ticker Google News searches
+"""
+
+import logging
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+import feedparser
+import requests
+from bs4 import BeautifulSoup
+
+from config import config
+from scraper import random_headers
+
+logger = logging.getLogger(__name__)
+
+
+def _strip_html(html: str) -> str:
+    """Plain text of an RSS summary (some feeds embed images and links)"""
+    if not html or '<' not in html:
+        return html or ''
+    return BeautifulSoup(html, 'html.parser').get_text(' ', strip=True)
+
+
+def fetch_feed(source: str, url: str, gate: Optional[Callable[[str], None]] = None,
+               etag: Optional[str] = None, last_modified: Optional[str] = None) -> Tuple[Optional[List[Dict]], Dict]:
+    """
+    Fetch one feed and return its entries as raw articles
+
+    Args:
+        source: Source name stored on the articles
+        url: Feed URL
+        gate: Optional callable(url) that blocks until the request is allowed
+        etag, last_modified: Validators of the previous fetch; when given the
+                             request is conditional
+
+    Returns:
+        tuple: (articles with title, content, url, source and published_at in
+               feed order, or None if the feed is unchanged (304);
+               {'etag', 'last_modified'} of the response)
+
+    Raises:
+        RuntimeError: If the feed could not be fetched
+    """
+    headers = dict(random_headers())
+    if etag:
+        headers['If-None-Match'] = etag
+    if last_modified:
+        headers['If-Modified-Since'] = last_modified
+
+    response = None
+    for attempt in range(config.MAX_RETRIES):
+        if gate is not None:
+            gate(url)
+        try:
+            response = requests.get(url, headers=headers, timeout=config.TIMEOUT)
+        except requests.RequestException as e:
+            if attempt == config.MAX_RETRIES - 1:
+                raise RuntimeError(f"{source}: {e}")
+            time.sleep(1)
+            continue
+        if response.status_code in (200, 304):
+            break
+        if response.status_code not in (429, 403, 503) or attempt == config.MAX_RETRIES - 1:
+            raise RuntimeError(f"{source}: HTTP {response.status_code}")
+        time.sleep(2 * (attempt + 1))
+
+    if response.status_code == 304:
+        return None, {'etag': etag, 'last_modified': last_modified}
+    validators = {
+        'etag': response.headers.get('ETag'),
+        'last_modified': response.headers.get('Last-Modified')
+    }
+
+    feed = feedparser.parse(response.content)
+    articles = []
+    for entry in feed.entries:
+        title = (entry.get('title') or '').strip()
+        link = entry.get('link') or ''
+        if not title and not link:
+            continue
+        articles.append({
+            'title': title,
+            'content': _strip_html(entry.get('summary') or entry.get('description') or ''),
+            'url': link,
+            'source': source,
+            'published_at': entry.get('published') or entry.get('updated')
+        })
+    logger.debug(f"  {source}: {len(articles)} entries from {url}")
+    return articles, validators
@@ -0,0 +1,93 @@
+"""
+Story clusters
+Groups near-duplicate articles (one story syndicated by several outlets,
+usually with a reworded headline) at ingest time. The first article of a
+story is its canonical copy; later copies get is_duplicate=True and the
+canonical's url_hash as story_id, so reads can return one article per story.
+Articles are only compared with stories of the same ticker
+"""
+
+import logging
+import threading
+from datetime import datetime, timedelta
+from typing import Dict, Iterable, List
+
+from config import config
+from utils.story_utils import NUM_PERM, NearDuplicateIndex, minhash_signature, shingles
+
+logger = logging.getLogger(__name__)
+
+
+class StoryClusterer:
+    """
+    Story assignment for one run
+
+    Loaded with the signatures of the last CLUSTER_WINDOW_DAYS of canonical
+    articles (one index per ticker), then shared by the scrape callbacks.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.indexes: Dict[str, NearDuplicateIndex] = {}  # ticker -> canonical articles
+        self.signatures: Dict[str, List[int]] = {}  # url_hash -> signature of canonical articles
+        self.stories: Dict[str, Dict] = {}  # url_hash -> story fields
+        self.lock = threading.Lock()
+
+    def _index(self, url_hash: str, tickers: Iterable[str]):
+        """Add a canonical article to the indexes of its tickers"""
+        for ticker in tickers:
+            self.indexes.setdefault(ticker, NearDuplicateIndex()).add(url_hash, self.signatures[url_hash])
+
+    def load(self) -> 'StoryClusterer':
+        """Index the recent canonical articles"""
+        since = datetime.utcnow() - timedelta(days=config.CLUSTER_WINDOW_DAYS)
+        cursor = self.collection.find(
+            {'published_at': {'$gte': since}, 'minhash': {'$exists': True}},
+            {'_id': 0, 'url_hash': 1, 'story_id': 1, 'is_duplicate': 1, 'minhash': 1, 'tickers': 1}
+        )
+        for doc in cursor:
+            fields = {'story_id': doc.get('story_id') or doc['url_hash'],
+                      'is_duplicate': bool(doc.get('is_duplicate'))}
+            self.stories[doc['url_hash']] = fields
+            # Signatures from an older shingling scheme are not comparable
+            if not fields['is_duplicate'] and len(doc['minhash']) == NUM_PERM:
+                self.signatures[doc['url_hash']] = doc['minhash']
+                self._index(doc['url_hash'], doc.get('tickers') or [])
+        logger.info(f"Story clusters: {len(self.signatures)} recent stories loaded")
+        return self
+
+    def assign(self, article: Dict, tickers: Iterable[str]) -> Dict:
+        """
+        Story fields of a normalized article linked to tickers
+
+        Articles seen before keep their story. A new article joins the most
+        similar recent canonical article of one of its tickers, or starts a
+        story of its own.
+
+        Returns:
+            dict: {'story_id', 'is_duplicate'} plus 'minhash' for new articles
+        """
+        url_hash = article['url_hash']
+        tickers = list(tickers)
+        with self.lock:
+            known = self.stories.get(url_hash)
+            if known is not None:
+                # A canonical article scraped for another ticker joins its index
+                if url_hash in self.signatures:
+                    self._index(url_hash, tickers)
+                return dict(known)
+
+            signature = minhash_signature(shingles(article.get('title', ''), article.get('content')))
+            match = None
+            if signature is not None:
+                candidates = [self.indexes[t].match(signature) for t in tickers if t in self.indexes]
+                match = max((c for c in candidates if c is not None), key=lambda c: c[1], default=None)
+            if match is not None:
+                fields = {'story_id': self.stories[match[0]]['story_id'], 'is_duplicate': True}
+            else:
+                fields = {'story_id': url_hash, 'is_duplicate': False}
+                if signature is not None:
+                    self.signatures[url_hash] = signature
+                    self._index(url_hash, tickers)
+            self.stories[url_hash] = fields
+        return {**fields, 'minhash': signature} if signature is not None else dict(fields)
@@ -0,0 +1,153 @@
+"""
+Scrape watermarks
+Per-(key, source) record of the newest articles already stored and the
+ETag / Last-Modified of the last fetch, so incremental runs send
+conditional requests and only write articles they have not seen before.
+The key is a ticker, or the feed URL in source-first mode
+"""
+
+import hashlib
+import threading
+from datetime import datetime
+from typing import Dict, Iterable, List, Optional
+
+from pymongo import UpdateOne
+
+from config import config
+
+
+def article_key(article: Dict) -> Optional[str]:
+    """Dedup key of a raw article: hash of its URL, or of its title without one"""
+    key_string = article.get('url') or article.get('link') or article.get('title') or ''
+    if not key_string:
+        return None
+    return hashlib.md5(key_string.encode()).hexdigest()
+
+
+class WatermarkStore:
+    """
+    Watermarks for one run
+
+    Loaded once, updated from the worker threads as sources finish, and
+    written with flush() after the articles they cover have been saved.
+    New articles only become "seen" once keep() confirms they were handed
+    to the writer, so articles dropped before saving are fetched again.
+    """
+
+    def __init__(self, collection):
+        self.collection = collection
+        self.marks: Dict[tuple, Dict] = {}
+        self.pending: Dict[tuple, Dict] = {}
+        self.fresh: Dict[tuple, List[str]] = {}  # (key, source) -> article keys awaiting keep()
+        self.checked = set()  # (key, source) fetched successfully this run
+        self.lock = threading.Lock()
+
+    def load(self, keys: Iterable[str]) -> 'WatermarkStore':
+        """Read the watermarks of keys with one indexed $in query"""
+        keys = list(keys)
+        if keys:
+            for doc in self.collection.find({'key': {'$in': keys}}, {'_id': 0}):
+                self.marks[(doc['key'], doc['source'])] = doc
+        return self
+
+    def get(self, key: str, source: str) -> Dict:
+        with self.lock:
+            return self.marks.get((key, source)) or {}
+
+    def advance(self, key: str, source: str, articles: Optional[List[Dict]],
+                etag: Optional[str] = None, last_modified: Optional[str] = None) -> List[Dict]:
+        """
+        Keep the articles not seen before and stage the new watermark
+
+        The new articles are not added to the seen list here; see keep().
+        Articles are read in source order; parsing stops after
+        config.WATERMARK_SEEN_RUN consecutive already-seen items (feeds that
+        are not strictly date-ordered can interleave a few old items).
+
+        Args:
+            articles: Raw articles in source order, or None if the source
+                      answered 304 Not Modified
+            etag, last_modified: Validators of this response
+
+        Returns:
+            list: The new articles
+        """
+        mark = self.get(key, source)
+        seen = set(mark.get('seen', []))
+        fresh, fresh_keys, run = [], [], 0
+        for article in articles or []:
+            k = article_key(article)
+            if k is None:
+                continue
+            if k in seen:
+                run += 1
+                if run >= config.WATERMARK_SEEN_RUN:
+                    break
+                continue
+            run = 0
+            seen.add(k)
+            fresh.append(article)
+            fresh_keys.append(k)
+
+        update = {'key': key, 'source': source, 'last_checked': datetime.utcnow()}
+        if articles is None:
+            update['last_status'] = 'not_modified'
+        else:
+            update['last_status'] = 'new' if fresh else 'no_new'
+            update['etag'] = etag
+            update['last_modified'] = last_modified
+
+        with self.lock:
+            if articles is not None and not articles and not mark.get('seen'):
+                # Nothing parsed and nothing known: likely a swallowed error, not a success
+                return []
+            self.pending[(key, source)] = update
+            self.fresh[(key, source)] = fresh_keys
+            self.checked.add((key, source))
+        return fresh
+
+    def keep(self, key: str, saved_keys: Iterable[str]):
+        """
+        Mark the new articles of key that are being saved as seen
+
+        Args:
+            saved_keys: article_key of every article handed to the writer
+                        (normalized articles carry it as url_hash)
+        """
+        saved_keys = set(saved_keys)
+        with self.lock:
+            for k in [k for k in self.fresh if k[0] == key]:
+                kept = [a for a in self.fresh.pop(k) if a in saved_keys]
+                if not kept or k not in self.pending:
+                    continue
+                update = self.pending[k]
+                update['seen'] = (kept + self.marks.get(k, {}).get('seen', []))[:config.WATERMARK_SEEN_ITEMS]
+                update['last_new_at'] = update['last_checked']
+
+    def discard(self, key: str):
+        """Drop staged watermarks for key (its articles failed to save)"""
+        with self.lock:
+            for k in [k for k in self.pending if k[0] == key]:
+                del self.pending[k]
+            for k in [k for k in self.fresh if k[0] == key]:
+                del self.fresh[k]
+
+    def flush(self) -> int:
+        """
+        Write staged watermarks with one unordered bulk_write
+
+        Returns:
+            int: Number of watermarks written
+        """
+        with self.lock:
+            pending, self.pending = self.pending, {}
+            self.fresh = {}
+            for k, update in pending.items():
+                self.marks[k] = {**self.marks.get(k, {}), **update}
+        if not pending:
+            return 0
+        self.collection.bulk_write([
+            UpdateOne({'key': key, 'source': source}, {'$set': update}, upsert=True)
+            for (key, source), update in pending.items()
+        ], ordered=False)
+        return len(pending)
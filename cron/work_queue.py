@@ -0,0 +1,179 @@
+"""
+Scrape work queue
+MongoDB-backed queue of ticker scrape tasks shared by any number of
+`news_scraper.py --worker` processes. Workers claim batches under a lease,
+extend it with heartbeats while scraping, and mark each ticker done or
+failed; leases of crashed workers expire and are claimed again until a
+ticker runs out of attempts
+"""
+
+import logging
+import os
+import socket
+import threading
+import uuid
+from datetime import datetime, timedelta
+from typing import Dict, List
+
+from pymongo import DESCENDING, UpdateOne
+
+from config import config
+
+logger = logging.getLogger(__name__)
+
+PENDING = 'pending'
+LEASED = 'leased'
+DONE = 'done'
+FAILED = 'failed'
+
+
+def worker_id() -> str:
+    """Lease owner name of this process"""
+    return f"{socket.gethostname()}:{os.getpid()}"
+
+
+class ScrapeQueue:
+    """Lease-based scrape queue (one document per ticker, _id = ticker)"""
+
+    def __init__(self, collection):
+        self.collection = collection
+
+    def enqueue(self, tickers: List[Dict]) -> int:
+        """
+        Queue tickers for scraping (e.g. from priority.rank_tickers)
+
+        New tickers are inserted as pending; finished ones are reset to
+        pending with fresh attempts. Tickers under a live lease keep it and
+        only get their new priority.
+
+        Returns:
+            int: Number of tickers queued
+        """
+        if not tickers:
+            return 0
+        now = datetime.utcnow()
+        operations = [
+            UpdateOne(
+                {'_id': t['ticker']},
+                {'$set': {'company_name': t.get('company_name') or t['ticker'],
+                          'priority': t.get('priority', 0.0), 'enqueued_at': now},
+                 '$setOnInsert': {'ticker': t['ticker'], 'status': PENDING, 'attempts': 0}},
+                upsert=True
+            )
+            for t in tickers
+        ]
+        self.collection.bulk_write(operations, ordered=False)
+        self.collection.update_many(
+            {'_id': {'$in': [t['ticker'] for t in tickers]}, 'status': {'$in': [DONE, FAILED]}},
+            {'$set': {'status': PENDING, 'attempts': 0, 'last_error': None}}
+        )
+        return len(tickers)
+
+    def reap(self) -> int:
+        """Fail expired leases of tickers that have used all their attempts"""
+        result = self.collection.update_many(
+            {'status': LEASED, 'lease_expires': {'$lt': datetime.utcnow()},
+             'attempts': {'$gte': config.QUEUE_MAX_ATTEMPTS}},
+            {'$set': {'status': FAILED, 'last_error': 'Lease expired on the last attempt'}}
+        )
+        return result.modified_count
+
+    def claim(self, owner: str, batch_size: int) -> List[Dict]:
+        """
+        Lease up to batch_size tickers, highest priority first
+
+        Pending tickers and expired leases are both claimable. Candidates are
+        leased with one update_many that re-checks the claim condition per
+        document, so concurrent workers never get the same ticker.
+
+        Returns:
+            list: Claimed queue documents
+        """
+        self.reap()
+        now = datetime.utcnow()
+        claimable = {
+            '$or': [{'status': PENDING}, {'status': LEASED, 'lease_expires': {'$lt': now}}],
+            'attempts': {'$lt': config.QUEUE_MAX_ATTEMPTS}
+        }
+        ids = [doc['_id'] for doc in self.collection.find(claimable, {'_id': 1})
+               .sort('priority', DESCENDING).limit(batch_size)]
+        if not ids:
+            return []
+
+        lease_id = uuid.uuid4().hex
+        self.collection.update_many(
+            {'_id': {'$in': ids}, **claimable},
+            {'$set': {'status': LEASED, 'lease_id': lease_id, 'lease_owner': owner, 'leased_at': now,
+                      'lease_expires': now + timedelta(seconds=config.QUEUE_LEASE_SECONDS)},
+             '$inc': {'attempts': 1}}
+        )
+        return list(self.collection.find({'lease_id': lease_id}).sort('priority', DESCENDING))
+
+    def heartbeat(self, owner: str, tickers: List[str]) -> int:
+        """Extend this worker's leases on tickers still being scraped"""
+        if not tickers:
+            return 0
+        result = self.collection.update_many(
+            {'_id': {'$in': tickers}, 'status': LEASED, 'lease_owner': owner},
+            {'$set': {'lease_expires': datetime.utcnow() + timedelta(seconds=config.QUEUE_LEASE_SECONDS)}}
+        )
+        return result.modified_count
+
+    def complete(self, owner: str, ticker: str) -> bool:
+        """Mark a leased ticker done (False if the lease was lost)"""
+        result = self.collection.update_one(
+            {'_id': ticker, 'status': LEASED, 'lease_owner': owner},
+            {'$set': {'status': DONE, 'finished_at': datetime.utcnow(), 'last_error': None}}
+        )
+        return result.modified_count == 1
+
+    def fail(self, owner: str, ticker: str, error: str) -> bool:
+        """Return a leased ticker to the queue, or fail it after QUEUE_MAX_ATTEMPTS"""
+        doc = self.collection.find_one({'_id': ticker, 'status': LEASED, 'lease_owner': owner}, {'attempts': 1})
+        if doc is None:
+            return False
+        status = FAILED if doc.get('attempts', 0) >= config.QUEUE_MAX_ATTEMPTS else PENDING
+        self.collection.update_one(
+            {'_id': ticker, 'status': LEASED, 'lease_owner': owner},
+            {'$set': {'status': status, 'last_error': error, 'finished_at': datetime.utcnow()}}
+        )
+        return True
+
+    def counts(self) -> Dict[str, int]:
+        """Number of queue documents per status"""
+        pipeline = [{'$group': {'_id': '$status', 'count': {'$sum': 1}}}]
+        return {doc['_id']: doc['count'] for doc in self.collection.aggregate(pipeline)}
+
+
+class LeaseHeartbeat:
+    """Background thread extending a worker's leases until stopped"""
+
+    def __init__(self, queue: ScrapeQueue, owner: str, tickers: List[str]):
+        self.queue = queue
+        self.owner = owner
+        self.active = set(tickers)
+        self.lock = threading.Lock()
+        self.stopped = threading.Event()
+        self.thread = threading.Thread(target=self._run, name='lease-heartbeat', daemon=True)
+
+    def _run(self):
+        while not self.stopped.wait(config.QUEUE_HEARTBEAT_SECONDS):
+            with self.lock:
+                tickers = list(self.active)
+            try:
+                self.queue.heartbeat(self.owner, tickers)
+            except Exception as e:
+                logger.warning(f"Lease heartbeat failed: {e}")
+
+    def finished(self, ticker: str):
+        """Stop extending the lease of a finished ticker"""
+        with self.lock:
+            self.active.discard(ticker)
+
+    def __enter__(self):
+        self.thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.stopped.set()
+        self.thread.join()